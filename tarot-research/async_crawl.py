@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Engine crawl bất đồng bộ (asyncio) dùng chung cho crawl_tarot_content và crawl_tarot_data.
+Giới hạn số request đang chạy cùng lúc và số request/giây cho từng host,
+thay cho các lệnh time.sleep cố định giữa các lá bài.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+
+# Mỗi job là (url, hàm crawl đồng bộ, tham số cho hàm đó)
+CrawlJob = Tuple[str, Callable[..., Any], Sequence[Any]]
+
+
+class HostRateLimiter:
+    """
+    Giới hạn số request/giây theo từng host.
+    Các request tới cùng một host được xếp lịch cách nhau ít nhất 1/rps giây.
+    """
+
+    def __init__(self, rps: float):
+        self.interval = 1.0 / rps if rps and rps > 0 else 0.0
+        self._next_slot: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def acquire(self, url: str) -> None:
+        """Chờ tới lượt được gửi request tới host của url."""
+        if not self.interval:
+            return
+
+        host = urlsplit(url).netloc
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+async def _crawl_jobs(jobs: List[CrawlJob], concurrency: int, rps: float,
+                     on_result: Optional[Callable[[int, Any], None]]) -> List[Any]:
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = HostRateLimiter(rps)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        async def run(index: int, job: CrawlJob) -> Any:
+            url, func, args = job
+            async with semaphore:
+                await limiter.acquire(url)
+                result = await loop.run_in_executor(executor, func, *args)
+            if on_result:
+                # Kết quả đã được giao cho on_result, không giữ lại trong bộ nhớ
+                on_result(index, result)
+                return None
+            return result
+
+        # gather giữ nguyên thứ tự đầu vào, bất kể job nào xong trước
+        return await asyncio.gather(*(run(i, job) for i, job in enumerate(jobs)))
+
+
+def crawl_concurrently(jobs: List[CrawlJob], concurrency: int = 8, rps: float = 4.0,
+                       on_result: Optional[Callable[[int, Any], None]] = None) -> List[Any]:
+    """
+    Chạy các hàm crawl đồng bộ song song trên thread pool, điều phối bằng asyncio.
+
+    Args:
+        jobs: List các (url, hàm crawl, tham số). url dùng để tính giới hạn theo host
+        concurrency: Số request tối đa đang chạy cùng lúc
+        rps: Số request tối đa mỗi giây cho mỗi host (<= 0 để bỏ giới hạn)
+        on_result: Hàm gọi ngay khi một job xong, với (vị trí job, kết quả),
+                   vd. để ghi kết quả ra file mà không chờ cả lượt crawl
+
+    Returns:
+        List kết quả của từng job, theo đúng thứ tự của jobs
+        (toàn None khi có on_result, vì kết quả đã được chuyển cho hàm đó)
+    """
+    if not jobs:
+        return []
+    return asyncio.run(_crawl_jobs(jobs, max(1, concurrency), rps, on_result))
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Kiểm tra và benchmark extract_asset_refs.scan_file với srcset/data-srcset.
+Kiểm tra fixtures/asset_refs_srcset.html (srcset là data: URI placeholder của lazy-load,
+URL có dấu phẩy kiểu https://res.cloudinary.com/w_100,h_100/..., descriptor 1x/2x/300w)
+khớp với fixtures/asset_refs_srcset.expected.json, các trường hợp tách srcset theo HTML spec,
+rồi đo thời gian quét khi trang lớn dần.
+
+Chạy:
+    python benchmarks/bench_asset_refs.py
+"""
+
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+from extract_asset_refs import _split_srcset, scan_file  # noqa: E402
+
+FIXTURES_DIR = BENCH_DIR / 'fixtures'
+FIXTURE_HOSTS = ('tarotoo.com', 'cloudinary.com')
+FIXTURE_BASE_URL = 'https://tarotoo.com/'
+
+SRCSET_CASES = (
+    ('a.jpg 1x, b.jpg 2x', ['a.jpg', 'b.jpg']),
+    ('data:image/gif;base64,R0lGODlhAQABAAAAACw=', ['data:image/gif;base64,R0lGODlhAQABAAAAACw=']),
+    ('https://res.cloudinary.com/w_100,h_100/a.jpg 1x, b.jpg 2x',
+     ['https://res.cloudinary.com/w_100,h_100/a.jpg', 'b.jpg']),
+    ('a.jpg, b.jpg', ['a.jpg', 'b.jpg']),
+    ('  , a.jpg 100w ,b.jpg', ['a.jpg', 'b.jpg']),
+    ('a.jpg,, b.jpg 2x,', ['a.jpg', 'b.jpg']),
+    ('', []),
+)
+
+
+def check_fixture():
+    for value, expected in SRCSET_CASES:
+        if _split_srcset(value) != expected:
+            raise AssertionError(f'_split_srcset({value!r}) = {_split_srcset(value)}, mong đợi {expected}')
+
+    refs = scan_file(FIXTURES_DIR / 'asset_refs_srcset.html', FIXTURE_HOSTS, FIXTURE_BASE_URL)
+    with open(FIXTURES_DIR / 'asset_refs_srcset.expected.json', 'r', encoding='utf-8') as f:
+        expected = [tuple(ref) for ref in json.load(f)]
+    if refs != expected:
+        raise AssertionError('Kết quả khác fixtures/asset_refs_srcset.expected.json')
+    junk = [url for url, _ in refs if 'R0lGOD' in url or url.endswith(('/w_100', '/w_200'))]
+    if junk:
+        raise AssertionError(f'Tham chiếu rác từ srcset: {junk}')
+    print(f'✅ asset_refs_srcset.html: {len(refs)} tham chiếu, {len(SRCSET_CASES)} trường hợp srcset')
+
+
+def main():
+    check_fixture()
+    page = (FIXTURES_DIR / 'asset_refs_srcset.html').read_text(encoding='utf-8')
+    print(f"\n{'copies':>8} {'size (KB)':>10} {'time (ms)':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'page.html'
+        for copies in (10, 100, 1000):
+            path.write_text(page * copies, encoding='utf-8')
+            best = float('inf')
+            for _ in range(5):
+                start = time.perf_counter()
+                scan_file(path, FIXTURE_HOSTS, FIXTURE_BASE_URL)
+                best = min(best, time.perf_counter() - start)
+            print(f"{copies:>8} {path.stat().st_size / 1024:>10.0f} {best * 1000:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark extract_content_blocks (duyệt một lượt) so với extract_content_blocks_legacy.
+Tạo các trang card giả lập với nhiều cấu trúc list lồng nhau, kiểm tra hai hàm cho ra
+blocks giống hệt nhau, rồi đo thời gian trên các trang có kích thước tăng dần.
+
+Chạy:
+    python benchmarks/bench_content_blocks.py
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from crawl_tarot_content import extract_content_blocks, extract_content_blocks_legacy  # noqa: E402
+
+WORDS = ('the fool new beginnings journey trust intuition cups wands swords pentacles '
+         'love career reversed upright meaning energy change').split()
+
+
+def _text(rng, n=12):
+    return ' '.join(rng.choice(WORDS) for _ in range(n))
+
+
+def _fragment(rng, depth=0):
+    """Một đoạn HTML ngẫu nhiên gồm p/h/ul/ol/li lồng nhau, có và không có <a>."""
+    kind = rng.randrange(9 if depth < 4 else 4)
+    if kind == 0:
+        return f'<p>{_text(rng)} <strong>{_text(rng, 2)}</strong></p>'
+    if kind == 1:
+        return f'<h{rng.randint(1, 3)}>{_text(rng, 3)}</h{rng.randint(1, 3)}>'
+    if kind == 2:
+        return '<p>   </p>'
+    if kind == 3:
+        return f'<p>{_text(rng)} <a href="/x">{_text(rng, 2)}</a></p>'
+    if kind in (4, 5):
+        items = []
+        for _ in range(rng.randint(1, 5)):
+            inner = _text(rng, 4)
+            if rng.random() < 0.3:
+                inner += f' <a href="/card">{_text(rng, 1)}</a>'
+            if rng.random() < 0.3:
+                inner += _fragment(rng, depth + 1)
+            items.append(f'<li>{inner}</li>')
+        return f'<ul class="list">\n  {"  ".join(items)}\n</ul>'
+    if kind == 6:
+        items = ''.join(f'<li>{_text(rng, 3)}</li>' if rng.random() < 0.7
+                        else f'<li><a href="/y">{_text(rng, 2)}</a></li>'
+                        for _ in range(rng.randint(1, 4)))
+        return f'<ol>{items}</ol>'
+    if kind == 7:
+        return f'<div class="box">{_fragment(rng, depth + 1)}{_fragment(rng, depth + 1)}</div>'
+    return f'<blockquote>{_fragment(rng, depth + 1)}<!-- ghi chú --></blockquote>'
+
+
+def make_page(seed, n_fragments):
+    """Trang HTML có div.content__body chứa n_fragments đoạn ngẫu nhiên."""
+    rng = random.Random(seed)
+    body = '\n'.join(_fragment(rng) for _ in range(n_fragments))
+    nav = ''.join(f'<li><a href="/c{i}">Card {i}</a></li>' for i in range(40))
+    return (f'<html><head><title>Card</title></head><body><nav><ul>{nav}</ul></nav>'
+            f'<div class="content__body">{body}</div><footer><p>Footer</p></footer></body></html>')
+
+
+def check_identical(pages=200):
+    """Kiểm tra hai cài đặt cho ra cùng kết quả trên nhiều trang ngẫu nhiên."""
+    for seed in range(pages):
+        soup = BeautifulSoup(make_page(seed, 30), 'lxml')
+        if extract_content_blocks(soup) != extract_content_blocks_legacy(soup):
+            raise AssertionError(f'Kết quả khác nhau ở trang seed={seed}')
+    print(f'✅ Kết quả giống hệt nhau trên {pages} trang ngẫu nhiên')
+
+
+def best_of(func, soup, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(soup)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    check_identical()
+    print(f"\n{'fragments':>10} {'blocks':>8} {'legacy (ms)':>12} {'new (ms)':>10} {'speedup':>8}")
+    for n_fragments in (50, 200, 800, 3200):
+        soup = BeautifulSoup(make_page(42, n_fragments), 'lxml')
+        blocks = extract_content_blocks(soup)
+        legacy = best_of(extract_content_blocks_legacy, soup)
+        new = best_of(extract_content_blocks, soup)
+        print(f'{n_fragments:>10} {len(blocks):>8} {legacy * 1000:>12.1f} {new * 1000:>10.1f} '
+              f'{legacy / new:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
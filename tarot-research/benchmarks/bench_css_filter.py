@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark filter_css_for_elements trên stylesheet có nhiều @keyframes/@font-face.
+Kiểm tra output trên fixtures/css_at_rules.css (có @keyframes/@font-face được giữ và bị bỏ,
+tên gần giống nhau, tên font nhiều từ, shorthand font/animation, @media/@supports lồng nhau)
+khớp với fixtures/css_at_rules.expected.css, rồi đo thời gian khi stylesheet lớn dần
+để thấy thời gian tăng tuyến tính theo kích thước.
+
+Chạy:
+    python benchmarks/bench_css_filter.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+from extract_css import filter_css_for_elements  # noqa: E402
+
+FIXTURES_DIR = BENCH_DIR / 'fixtures'
+FIXTURE_CLASSES = {'card-list', 'card-list__item', 'card-list__title', 'card-list__image'}
+FIXTURE_IDS = {'main-list'}
+
+KEPT = ('"Open Sans"', "'Tarot Display'", '@keyframes fade-in', '@-webkit-keyframes fade-in',
+        '@keyframes "pulse"')
+DROPPED = ('Unused Serif', '"Icons"', '@keyframes fade ', '@keyframes spin', '.unrelated-widget',
+           '@page', '@import', '.other')
+
+
+def check_fixture():
+    css = (FIXTURES_DIR / 'css_at_rules.css').read_text(encoding='utf-8')
+    expected = (FIXTURES_DIR / 'css_at_rules.expected.css').read_text(encoding='utf-8').rstrip('\n')
+    output = filter_css_for_elements(css, FIXTURE_CLASSES, FIXTURE_IDS)
+    if output != expected:
+        raise AssertionError('Output khác fixtures/css_at_rules.expected.css')
+    missing = [text for text in KEPT if text not in output]
+    leaked = [text for text in DROPPED if text in output]
+    if missing or leaked:
+        raise AssertionError(f'Thiếu {missing}, thừa {leaked}')
+    print(f'✅ css_at_rules.css: giữ {len(KEPT)} @keyframes/@font-face, bỏ {len(DROPPED)} phần không dùng')
+
+
+def make_sheet(rules):
+    """Mỗi nhóm gồm một @keyframes, một @font-face và một rule dùng cả hai."""
+    parts = []
+    for i in range(rules):
+        parts.append(f'@keyframes anim-{i} {{ from {{ opacity: 0; }} to {{ opacity: 1; }} }}')
+        parts.append(f'@font-face {{ font-family: "Font {i}"; src: url(/fonts/{i}.woff2); }}')
+        parts.append(f'.c{i} {{ animation: anim-{i} 1s ease; font-family: "Font {i}", serif; color: red; }}')
+    return '\n'.join(parts)
+
+
+def main():
+    check_fixture()
+    print(f"\n{'groups':>8} {'size (KB)':>10} {'time (ms)':>10} {'µs/KB':>8}")
+    for groups in (1000, 4000, 16000, 64000):
+        css = make_sheet(groups)
+        classes = {f'c{i}' for i in range(0, groups, 2)}
+        start = time.perf_counter()
+        filter_css_for_elements(css, classes, set())
+        elapsed = time.perf_counter() - start
+        size_kb = len(css) / 1024
+        print(f'{groups:>8} {size_kb:>10.0f} {elapsed * 1000:>10.1f} {elapsed * 1e6 / size_kb:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
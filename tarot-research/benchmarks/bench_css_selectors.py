@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark SelectorIndex (tách token + giao tập hợp) so với is_selector_relevant_regex.
+Kiểm tra hai cách cho cùng quyết định giữ/bỏ trên cặp cardList.html/extracted_css.css
+và trên stylesheet giả lập, rồi đo thời gian với số rule và số class tăng dần.
+
+Chạy:
+    python benchmarks/bench_css_selectors.py
+"""
+
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from extract_css import (SelectorIndex, extract_classes_and_ids,  # noqa: E402
+                         is_selector_relevant_regex)
+
+SELECTOR_RE = re.compile(r'([^{}]+)\{')
+COMBINATORS = (' ', ' > ', ' + ', ' ~ ', ', ', '')
+PSEUDOS = ('', ':hover', '::before', ':not(.x)', '[data-x]', ':nth-child(2)', '.-active')
+
+
+def real_selectors():
+    """Các selector trong extracted_css.css (kể cả selector bên trong @media)."""
+    css = (BASE_DIR / 'extracted_css.css').read_text(encoding='utf-8')
+    return [s.strip() for s in SELECTOR_RE.findall(css) if not s.strip().startswith('@')]
+
+
+def synthetic(rng, n_classes, n_rules):
+    """Tập class/id và danh sách selector ngẫu nhiên (có cả tên gần giống, tên có ký tự lạ)."""
+    classes = {f'card-{i}__el' for i in range(n_classes)} | {'title', 'video', 'w-1/2', 'md:flex'}
+    ids = {f'block-{i}' for i in range(n_classes // 10 + 1)} | {'main'}
+    pool = list(classes) + [f'card-{i}__el-other' for i in range(n_classes)] + ['div', 'span', 'x']
+
+    def simple():
+        name = rng.choice(pool)
+        kind = rng.random()
+        if kind < 0.6:
+            return '.' + name + rng.choice(PSEUDOS)
+        if kind < 0.75:
+            return '#' + rng.choice(list(ids) + ['block-x']) + rng.choice(PSEUDOS)
+        return name + rng.choice(PSEUDOS)
+
+    selectors = []
+    for _ in range(n_rules):
+        parts = [simple() for _ in range(rng.randint(1, 4))]
+        selector = parts[0]
+        for part in parts[1:]:
+            selector += rng.choice(COMBINATORS) + part
+        selectors.append(selector)
+    return classes, ids, selectors
+
+
+def check_identical():
+    card_list = (BASE_DIR / 'cardList.html').read_text(encoding='utf-8')
+    classes, ids = extract_classes_and_ids(card_list)
+    index = SelectorIndex(classes, ids)
+    selectors = real_selectors()
+    for selector in selectors:
+        if index.matches(selector) != is_selector_relevant_regex(selector.strip(), classes, ids):
+            raise AssertionError(f'Khác nhau với selector: {selector!r}')
+    print(f'✅ cardList.html/extracted_css.css: {len(selectors)} selector, cùng quyết định')
+
+    rng = random.Random(7)
+    classes, ids, selectors = synthetic(rng, 60, 3000)
+    index = SelectorIndex(classes, ids)
+    for selector in selectors:
+        if index.matches(selector) != is_selector_relevant_regex(selector, classes, ids):
+            raise AssertionError(f'Khác nhau với selector: {selector!r}')
+    print(f'✅ Stylesheet giả lập: {len(selectors)} selector, cùng quyết định')
+
+
+def main():
+    check_identical()
+    print(f"\n{'classes':>8} {'rules':>7} {'regex (ms)':>11} {'index (ms)':>11} {'speedup':>8}")
+    # Từ khoảng 100 class, số regex vượt cache của module re nên cách cũ chậm đi rất nhiều
+    for n_classes, n_rules in ((20, 500), (50, 2000), (110, 200)):
+        classes, ids, selectors = synthetic(random.Random(n_rules), n_classes, n_rules)
+
+        start = time.perf_counter()
+        regex_kept = sum(is_selector_relevant_regex(s, classes, ids) for s in selectors)
+        regex_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = SelectorIndex(classes, ids)
+        index_kept = sum(index.matches(s) for s in selectors)
+        index_time = time.perf_counter() - start
+
+        assert regex_kept == index_kept
+        print(f'{n_classes:>8} {n_rules:>7} {regex_time * 1000:>11.1f} {index_time * 1000:>11.1f} '
+              f'{regex_time / index_time:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
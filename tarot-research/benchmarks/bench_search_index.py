@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark tra cứu bằng index của search_index.py so với quét toàn bộ tarot_cards_content.json.
+Kiểm tra hai cách cho ra cùng tập block với mỗi truy vấn, rồi đo thời gian và số byte phải đọc
+(cả file JSON khi quét, manifest + các shard cần thiết khi dùng index).
+
+Không có tarot_cards_content.json thì corpus được dựng từ các trang trong benchmarks/fixtures
+(nhân lên 78 lá bài).
+
+Chạy:
+    python benchmarks/bench_search_index.py
+    python benchmarks/bench_search_index.py --input ../client/src/data/tarot_cards_content.json
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+BENCH_DIR = Path(__file__).resolve().parent
+BASE_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from crawl_tarot_content import extract_content_blocks  # noqa: E402
+from search_index import (MANIFEST_NAME, STOPWORDS, SearchIndex, block_text,  # noqa: E402
+                          build_index, parse_query, tokenize, write_index)
+
+QUERIES = ('new beginnings', 'love', '"reversed meaning"', 'career money',
+           'intuition', '"key actions"', 'tình yêu', 'fool journey')
+
+
+def make_corpus(path: Path, cards: int = 78) -> None:
+    """tarot_cards_content.json giả lập từ các trang fixture."""
+    pages = [p.read_text(encoding='utf-8') for p in sorted((BENCH_DIR / 'fixtures').glob('card_*.html'))]
+    blocks = [extract_content_blocks(BeautifulSoup(page, 'lxml')) for page in pages]
+    records = [{'url': f'https://tarotoo.com/tarot-card-meanings/card-{i}', 'status': 'success',
+                'cardId': i, 'total_blocks': len(blocks[i % len(blocks)]), 'blocks': blocks[i % len(blocks)]}
+               for i in range(1, cards + 1)]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(records, f, ensure_ascii=False, indent=2)
+
+
+def scan_search(path: Path, query: str):
+    """Tìm bằng cách đọc cả file và tách token từng block (cách client đang làm)."""
+    groups = parse_query(query)
+    with open(path, 'r', encoding='utf-8') as f:
+        records = json.load(f)
+    found = set()
+    for record in records:
+        for block in record['blocks']:
+            tokens = tokenize(block_text(block['html']))
+            positions = {}
+            for position, term in enumerate(tokens):
+                if term not in STOPWORDS:
+                    positions.setdefault(term, set()).add(position)
+            if all(any(all(p - group[0][1] + offset in positions.get(term, ())
+                           for term, offset in group)
+                       for p in positions.get(group[0][0], ()))
+                   for group in groups):
+                found.add((record['cardId'], block['index']))
+    return found
+
+
+def best_of(func, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def parse_args():
+    """Đọc tham số dòng lệnh."""
+    parser = argparse.ArgumentParser(description='So sánh tra cứu bằng index với quét toàn bộ nội dung')
+    parser.add_argument('--input', type=Path, default=None,
+                        help='tarot_cards_content.json (mặc định: file cạnh script nếu có, '
+                             'không thì dựng từ fixtures)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        corpus = args.input or BASE_DIR / 'tarot_cards_content.json'
+        if not corpus.exists():
+            corpus = tmp_dir / 'tarot_cards_content.json'
+            make_corpus(corpus)
+        with open(corpus, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+
+        index_dir = tmp_dir / 'search_index'
+        start = time.perf_counter()
+        postings, cards = build_index(records)
+        write_index(postings, cards, index_dir)
+        print(f"🏗️  Dựng index: {(time.perf_counter() - start) * 1000:.0f} ms, "
+              f"{len(postings)} term, corpus {corpus.stat().st_size:,} byte")
+        manifest_bytes = (index_dir / MANIFEST_NAME).stat().st_size
+
+        print(f"\n{'query':<22} {'hits':>5} {'scan (ms)':>10} {'index (ms)':>11} {'speedup':>8} "
+              f"{'scan (B)':>10} {'index (B)':>10}")
+        for query in QUERIES:
+            index = SearchIndex(index_dir)
+            hits = index.search(query, limit=10 ** 6)
+            expected = scan_search(corpus, query)
+            if {(hit['cardId'], hit['block']) for hit in hits} != expected:
+                raise AssertionError(f'Kết quả khác nhau với truy vấn "{query}"')
+
+            scan = best_of(lambda: scan_search(corpus, query), repeat=3)
+            # Mỗi lần đo là một lần tra cứu "nguội": đọc manifest và các shard cần thiết
+            cold = best_of(lambda: SearchIndex(index_dir).search(query))
+            read = manifest_bytes + index.loaded_bytes
+            print(f"{query:<22} {len(hits):>5} {scan * 1000:>10.1f} {cold * 1000:>11.2f} "
+                  f"{scan / cold:>7.0f}x {corpus.stat().st_size:>10,} {read:>10,}")
+
+
+if __name__ == '__main__':
+    main()
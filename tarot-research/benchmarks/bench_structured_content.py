@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+So sánh extract_structured_content (html.parser, mặc định của crawl_tarot_data.py) với
+extract_structured_content_fast (lxml, --fast-structured).
+Kiểm tra từng parser trên fixtures/structured_malformed.html (<p> lồng nhau, <div> trong <p>,
+<p> không đóng) khớp với fixtures/structured_malformed.expected.json, hai parser cho cùng
+kết quả trên các trang card_*.html, rồi đo thời gian của cả hai.
+
+Chạy:
+    python benchmarks/bench_structured_content.py
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+from crawl_tarot_data import extract_structured_content, extract_structured_content_fast  # noqa: E402
+
+FIXTURES_DIR = BENCH_DIR / 'fixtures'
+EXTRACTORS = {'html.parser': extract_structured_content, 'lxml': extract_structured_content_fast}
+
+
+def check_malformed():
+    page = (FIXTURES_DIR / 'structured_malformed.html').read_text(encoding='utf-8')
+    with open(FIXTURES_DIR / 'structured_malformed.expected.json', 'r', encoding='utf-8') as f:
+        expected = json.load(f)
+    for name, extract in EXTRACTORS.items():
+        if extract(page) != expected[name]:
+            raise AssertionError(f'Kết quả {name} khác structured_malformed.expected.json')
+    texts = {name: [p['text'] for p in result['paragraphs']] for name, result in expected.items()}
+    print('✅ structured_malformed.html: khớp kết quả mong đợi của từng parser')
+    for name, paragraphs in texts.items():
+        print(f'   {name}: {paragraphs}')
+
+
+def best_of(func, repeat=20):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    check_malformed()
+    print(f"\n{'page':<28} {'html.parser (ms)':>17} {'lxml (ms)':>10} {'speedup':>8}")
+    for path in sorted(FIXTURES_DIR.glob('card_*.html')):
+        page = path.read_text(encoding='utf-8')
+        if extract_structured_content(page) != extract_structured_content_fast(page):
+            raise AssertionError(f'Hai parser cho kết quả khác nhau ở {path.name}')
+        slow = best_of(lambda: extract_structured_content(page))
+        fast = best_of(lambda: extract_structured_content_fast(page))
+        print(f"{path.stem:<28} {slow * 1000:>17.2f} {fast * 1000:>10.2f} {slow / fast:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
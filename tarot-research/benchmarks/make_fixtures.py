@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Tạo lại các trang card mẫu trong benchmarks/fixtures từ nội dung đã crawl
+(client/src/data/tarot_cards_content.json), theo cấu trúc trang tarotoo.com:
+meta og:description, h1, ảnh thumbnail, div.content__body, các dòng "phuc"
+và ảnh/link tới tarotoo.com ở header/footer.
+Các file này được commit để run_benchmarks.py chạy hoàn toàn offline.
+
+Chạy:
+    python benchmarks/make_fixtures.py
+"""
+
+import html
+import json
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+FIXTURES_DIR = BENCH_DIR / 'fixtures'
+CONTENT_FILE = BENCH_DIR.parent.parent / 'client' / 'src' / 'data' / 'tarot_cards_content.json'
+
+# Một lá Major Arcana ngắn và một lá Minor Arcana dài
+CARD_IDS = (1, 78)
+
+ASSET = 'https://tarotoo.com/wp-content/themes/tarotootheme/assets'
+
+PAGE_TEMPLATE = '''<!DOCTYPE html>
+<html lang="en-US">
+<head>
+<meta charset="UTF-8">
+<title>{title} Tarot Card Meanings | Tarotoo</title>
+<meta property="og:title" content="{title} Tarot Card Meanings">
+<meta property="og:description" content="{description}">
+<link rel="stylesheet" href="https://tarotoo.com/wp-content/themes/tarotootheme/style.css">
+</head>
+<body class="post-template-default single">
+<header class="header">
+  <a href="https://tarotoo.com/" class="header__logo"><img src="{asset}/logo/logo.svg" alt="Tarotoo"></a>
+  <nav class="header__nav">
+    <ul class="menu">
+      <li><a href="https://tarotoo.com/love"><img data-src="{asset}/navigation-icon/icon-love-50_base.svg" alt=""> Love</a></li>
+      <li><a href="https://tarotoo.com/career"><img data-src="{asset}/navigation-icon/icon-career-50_base.svg" alt=""> Career</a></li>
+      <li><a href="https://tarotoo.com/tarot-card-meanings">Card meanings</a></li>
+    </ul>
+  </nav>
+</header>
+<main class="content">
+  <article class="post">
+    <h1 class="post__title">{title}</h1>
+    <img src="https://tarotoo.com/wp-content/uploads/{slug}.jpg" class="attachment-post-thumbnail size-post-thumbnail" alt="{title}">
+    <div class="content__body">
+{blocks}
+      <ul class="related-cards">
+        <li><a href="https://tarotoo.com/tarot-card-meanings/the-magician">The Magician</a></li>
+        <li><a href="https://tarotoo.com/tarot-card-meanings/the-high-priestess">The High Priestess</a></li>
+      </ul>
+    </div>
+{phuc}
+  </article>
+</main>
+<footer class="footer">
+  <a href="https://apps.apple.com/"><img src="https://tarotoo.com/wp-content/uploads/appstore.png" alt="App Store"></a>
+  <a href="https://play.google.com/"><img src="https://tarotoo.com/wp-content/uploads/googleplay.png" alt="Google Play"></a>
+  <video class="card-video" data-src="https://tarotoo.com/wp-content/uploads/{card_index}.mp4" data-src-webm="https://tarotoo.com/wp-content/uploads/{card_index}.webm"></video>
+</footer>
+</body>
+</html>
+'''
+
+
+def build_page(card):
+    slug = card['url'].rstrip('/').rsplit('/', 1)[-1]
+    title = slug.replace('-', ' ').title()
+    blocks = [block['html'] for block in card['blocks']]
+    first_text = next((b for b in blocks if b.startswith('<p>')), '')
+    description = html.escape(first_text[3:200].split('<', 1)[0], quote=True)
+
+    body_lines = []
+    for i, block in enumerate(blocks):
+        # Một số block nằm trong div bọc ngoài như trên trang thật
+        if i % 5 == 4:
+            body_lines.append(f'      <div class="wp-block-group">{block}</div>')
+        else:
+            body_lines.append(f'      {block}')
+
+    phuc_lines = []
+    for block in blocks[:6]:
+        if block.startswith('<p>'):
+            phuc_lines.append(f'phuc {block}')
+    phuc_lines.append('  Phuc <h2>Keywords</h2>')
+
+    return PAGE_TEMPLATE.format(title=title, description=description, asset=ASSET, slug=slug,
+                                blocks='\n'.join(body_lines), phuc='\n'.join(phuc_lines),
+                                card_index=card['cardId'] - 1)
+
+
+def main():
+    with open(CONTENT_FILE, 'r', encoding='utf-8') as f:
+        cards = {card['cardId']: card for card in json.load(f)}
+
+    FIXTURES_DIR.mkdir(exist_ok=True)
+    for card_id in CARD_IDS:
+        card = cards[card_id]
+        slug = card['url'].rstrip('/').rsplit('/', 1)[-1]
+        path = FIXTURES_DIR / f'card_{slug}.html'
+        path.write_text(build_page(card), encoding='utf-8')
+        print(f'✅ {path.relative_to(BENCH_DIR)} ({path.stat().st_size / 1024:.1f} KB)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Bộ micro-benchmark cho các extractor trong tarot-research, chạy hoàn toàn offline.
+Đo thời gian (min/median qua nhiều lần chạy) và bộ nhớ đỉnh (tracemalloc) của
+từng extractor trên các trang mẫu trong benchmarks/fixtures, cardList.html,
+extracted_css.css và các bản phóng to sinh ra lúc chạy, rồi so với baseline đã lưu.
+
+Chạy:
+    python benchmarks/run_benchmarks.py                  # đo và so với baseline.json
+    python benchmarks/run_benchmarks.py --save-baseline  # lưu kết quả làm baseline mới
+    python benchmarks/run_benchmarks.py --check          # exit code 1 nếu có extractor chậm đi
+    python benchmarks/run_benchmarks.py --filter css     # chỉ chạy benchmark có tên chứa "css"
+
+Baseline phụ thuộc vào máy: lưu lại baseline trên máy của bạn trước khi so sánh.
+"""
+
+import argparse
+import json
+import re
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from bs4 import BeautifulSoup
+
+BENCH_DIR = Path(__file__).resolve().parent
+BASE_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from crawl_tarot_content import extract_content_blocks  # noqa: E402
+from crawl_tarot_data import (extract_phuc_content, extract_phuc_content_fast,  # noqa: E402
+                              extract_structured_content, extract_structured_content_fast)
+from extract_asset_refs import scan_file  # noqa: E402
+from extract_css import extract_classes_and_ids, filter_css_for_elements  # noqa: E402
+from extract_tarotoo_src import extract_tarotoo_src  # noqa: E402
+from extract_video_links import extract_video_links  # noqa: E402
+
+FIXTURES_DIR = BENCH_DIR / 'fixtures'
+BASELINE_FILE = BENCH_DIR / 'baseline.json'
+
+# Hệ số phóng to cho các bản "large"
+LARGE_CONTENT_REPEAT = 25
+LARGE_CARD_LIST_ITEMS = 312  # 78 lá x 4
+LARGE_CSS_REPEAT = 10
+
+BODY_START = '<div class="content__body">\n'
+BODY_END = '\n      <ul class="related-cards">'
+
+CSS_CLASS_RE = re.compile(r'\.([a-zA-Z_][\w-]*)')
+
+Benchmark = Tuple[str, Callable[[], object]]
+
+
+def _scale_card_page(page: str, repeat: int) -> str:
+    """Nhân nội dung content__body và các dòng "phuc" của một trang card lên repeat lần."""
+    start = page.index(BODY_START) + len(BODY_START)
+    end = page.index(BODY_END)
+    page = page[:start] + '\n'.join([page[start:end]] * repeat) + page[end:]
+    lines = page.split('\n')
+    phuc = [line for line in lines if line.lstrip().lower().startswith('phuc')]
+    at = lines.index(phuc[-1]) + 1
+    return '\n'.join(lines[:at] + phuc * (repeat - 1) + lines[at:])
+
+
+def _scale_card_list(card_list: str, items: int) -> str:
+    """Trang danh sách lá bài với items thẻ card-list__item."""
+    return '<div class="card-list">\n' + '\n'.join([card_list] * items) + '\n</div>\n'
+
+
+def build_benchmarks(tmp_dir: Path) -> List[Benchmark]:
+    """Dựng danh sách (tên, hàm không tham số) cho mọi extractor ở cả kích thước nhỏ và lớn."""
+    pages = {path.stem: path.read_text(encoding='utf-8')
+             for path in sorted(FIXTURES_DIR.glob('card_*.html'))}
+    card_list = (BASE_DIR / 'cardList.html').read_text(encoding='utf-8')
+    css = (BASE_DIR / 'extracted_css.css').read_text(encoding='utf-8')
+
+    largest = max(pages.values(), key=len)
+    pages['card_large'] = _scale_card_page(largest, LARGE_CONTENT_REPEAT)
+
+    card_list_files = {'card_list': BASE_DIR / 'cardList.html',
+                       'card_list_large': tmp_dir / 'card_list_large.html'}
+    card_list_files['card_list_large'].write_text(
+        _scale_card_list(card_list, LARGE_CARD_LIST_ITEMS), encoding='utf-8')
+
+    src_files = dict(card_list_files)
+    src_files['card_large'] = tmp_dir / 'card_large.html'
+    src_files['card_large'].write_text(pages['card_large'], encoding='utf-8')
+
+    # Class/id của cardList (như extract_css.main) và một tập lấy từ chính CSS để output khác rỗng
+    list_classes, list_ids = extract_classes_and_ids(card_list)
+    css_classes = set(sorted(set(CSS_CLASS_RE.findall(css)))[::2])
+    css_inputs = {
+        'card_list_classes': (css, list_classes, list_ids),
+        'css_classes': (css, css_classes, set()),
+        'large': ('\n'.join([css] * LARGE_CSS_REPEAT), css_classes, set()),
+        # @keyframes/@font-face được giữ và bị bỏ (xem bench_css_filter.py)
+        'at_rules': ((FIXTURES_DIR / 'css_at_rules.css').read_text(encoding='utf-8'),
+                     {'card-list', 'card-list__item', 'card-list__title', 'card-list__image'},
+                     {'main-list'}),
+    }
+
+    benchmarks: List[Benchmark] = []
+    for name, page in pages.items():
+        benchmarks += [
+            (f'content_blocks[{name}]', lambda p=page: extract_content_blocks(BeautifulSoup(p, 'lxml'))),
+            (f'structured_content[{name}]', lambda p=page: extract_structured_content(p)),
+            (f'structured_content_fast[{name}]', lambda p=page: extract_structured_content_fast(p)),
+            (f'phuc_content[{name}]', lambda p=page: extract_phuc_content(p)),
+            (f'phuc_content_fast[{name}]', lambda p=page: extract_phuc_content_fast(p)),
+        ]
+    for name, path in card_list_files.items():
+        benchmarks.append((f'video_links[{name}]', lambda p=path: extract_video_links(str(p))))
+    for name, path in src_files.items():
+        benchmarks.append((f'tarotoo_src[{name}]', lambda p=path: extract_tarotoo_src(p)))
+        benchmarks.append((f'asset_refs[{name}]', lambda p=path: scan_file(p, ('tarotoo.com',))))
+    for name, args in css_inputs.items():
+        benchmarks.append((f'filter_css[{name}]', lambda a=args: filter_css_for_elements(*a)))
+    return benchmarks
+
+
+def measure(func: Callable[[], object], min_time: float, max_runs: int) -> Dict[str, float]:
+    """
+    Đo một extractor: chạy lặp tới khi đủ min_time giây (tối đa max_runs lần),
+    sau đó chạy thêm một lần dưới tracemalloc để lấy bộ nhớ đỉnh.
+    """
+    func()  # làm nóng (import, cache regex)
+    times = []
+    total = 0.0
+    while total < min_time and len(times) < max_runs:
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        times.append(elapsed)
+        total += elapsed
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'time_ms': round(min(times) * 1000, 3),
+        'median_ms': round(statistics.median(times) * 1000, 3),
+        'peak_kb': round(peak / 1024, 1),
+        'runs': len(times),
+    }
+
+
+def load_baseline(path: Path) -> Dict[str, Dict]:
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('results', {})
+
+
+def save_baseline(path: Path, results: Dict[str, Dict]) -> None:
+    data = {
+        'python': sys.version.split()[0],
+        'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+
+
+def parse_args():
+    """Đọc tham số dòng lệnh."""
+    parser = argparse.ArgumentParser(description='Micro-benchmark cho các extractor tarot-research')
+    parser.add_argument('--filter', default='',
+                        help='Chỉ chạy các benchmark có tên chứa chuỗi này')
+    parser.add_argument('--baseline', type=Path, default=BASELINE_FILE,
+                        help='File baseline (mặc định: benchmarks/baseline.json)')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Ghi kết quả lần chạy này làm baseline')
+    parser.add_argument('--check', action='store_true',
+                        help='Thoát với mã 1 nếu có benchmark chậm hơn/tốn bộ nhớ hơn baseline quá ngưỡng')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='Tỉ lệ so với baseline bị coi là chậm đi (mặc định: 1.25)')
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help='Thời gian chạy lặp tối thiểu cho mỗi benchmark, giây (mặc định: 0.2)')
+    parser.add_argument('--max-runs', type=int, default=50,
+                        help='Số lần chạy tối đa cho mỗi benchmark (mặc định: 50)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    baseline = load_baseline(args.baseline)
+
+    results: Dict[str, Dict] = {}
+    regressions = []
+    with tempfile.TemporaryDirectory() as tmp:
+        benchmarks = [(name, func) for name, func in build_benchmarks(Path(tmp))
+                      if args.filter in name]
+
+        print(f"{'benchmark':<48} {'min (ms)':>10} {'median':>10} {'peak (KB)':>10} {'vs baseline':>16}")
+        for name, func in benchmarks:
+            result = measure(func, args.min_time, args.max_runs)
+            results[name] = result
+
+            compare = ''
+            base = baseline.get(name)
+            if base:
+                time_ratio = result['time_ms'] / base['time_ms'] if base['time_ms'] else 1.0
+                mem_ratio = result['peak_kb'] / base['peak_kb'] if base['peak_kb'] else 1.0
+                compare = f"{time_ratio:.2f}x / {mem_ratio:.2f}x"
+                if time_ratio > args.threshold or mem_ratio > args.threshold:
+                    regressions.append(name)
+                    compare += ' ⚠️'
+            print(f"{name:<48} {result['time_ms']:>10.2f} {result['median_ms']:>10.2f} "
+                  f"{result['peak_kb']:>10.1f} {compare:>16}")
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"\n💾 Đã lưu baseline vào {args.baseline}")
+    elif not baseline:
+        print(f"\nChưa có baseline ({args.baseline}); chạy với --save-baseline để tạo.")
+
+    if regressions:
+        print(f"\n⚠️  {len(regressions)} benchmark vượt ngưỡng {args.threshold}x so với baseline "
+              f"(thời gian / bộ nhớ đỉnh):")
+        for name in regressions:
+            print(f"   - {name}")
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
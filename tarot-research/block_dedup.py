@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Khử trùng lặp block giữa các lá bài: mỗi block (type + html đã sanitize) được băm
+sha256; block xuất hiện từ min_refs lần trở lên (tiêu đề chung, "Key Actions",
+danh sách lá bài...) chỉ được lưu một lần trong bảng "blocks" và lá bài tham chiếu
+bằng hash. Block chỉ dùng một lần vẫn nằm tại chỗ (bỏ trường index), vì một tham
+chiếu hash còn tốn chỗ hơn chính block đó. min_refs=1 để tham chiếu mọi block bằng hash.
+
+Định dạng tarot_cards_content.dedup.json:
+    {
+      "version": 1,
+      "blocks": {"<hash>": {"type": "h2", "html": "<h2>Key Actions</h2>"}, ...},
+      "cards": [{"url": ..., "status": ..., "cardId": ..., "total_blocks": ...,
+                 "blocks": ["<hash>", {"type": "p", "html": "<p>...</p>"}, ...]}, ...]
+    }
+
+expand_card/expand_records dựng lại đúng mảng blocks hiện tại ({'index', 'type', 'html'},
+index đánh số từ 1 như extract_content_blocks).
+
+Chạy:
+    python block_dedup.py                      # tarot_cards_content.json -> .dedup.json
+    python block_dedup.py --expand out.json    # dựng lại file JSON gốc từ .dedup.json
+"""
+
+import argparse
+import hashlib
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Union
+
+from jsonl_output import write_json_array
+
+DEDUP_VERSION = 1
+
+# 16 ký tự hex (64 bit) là đủ cho vài nghìn block; trùng hash được phát hiện khi thêm block
+HASH_LENGTH = 16
+
+
+def block_hash(block: Dict) -> str:
+    """Hash nội dung của một block (type và html), không phụ thuộc vị trí."""
+    digest = hashlib.sha256(f"{block['type']}\0{block['html']}".encode('utf-8'))
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+class BlockTable:
+    """Bảng hash -> {'type', 'html'}, mỗi nội dung block chỉ lưu một lần."""
+
+    def __init__(self, blocks: Optional[Dict[str, Dict]] = None):
+        self.blocks: Dict[str, Dict] = dict(blocks or {})
+        self.references = 0
+
+    def add(self, block: Dict) -> str:
+        """Thêm block (nếu chưa có) và trả về hash để lá bài tham chiếu."""
+        key = block_hash(block)
+        body = {'type': block['type'], 'html': block['html']}
+        existing = self.blocks.setdefault(key, body)
+        if existing != body:
+            raise ValueError(f"Trùng hash {key} cho hai block khác nhau")
+        self.references += 1
+        return key
+
+    def expand(self, refs: List[Union[str, Dict]]) -> List[Dict]:
+        """Dựng lại mảng blocks theo định dạng của extract_content_blocks."""
+        blocks = []
+        for index, ref in enumerate(refs, 1):
+            body = self.blocks[ref] if isinstance(ref, str) else ref
+            blocks.append({'index': index, 'type': body['type'], 'html': body['html']})
+        return blocks
+
+
+def dedupe_card(record: Dict, table: BlockTable, shared: Optional[Set[str]] = None) -> Dict:
+    """
+    Thay mảng blocks của một record bằng các tham chiếu (các trường khác giữ nguyên thứ tự).
+
+    Args:
+        shared: Các hash được đưa vào bảng chung; None để đưa tất cả
+    """
+    def ref(block: Dict) -> Union[str, Dict]:
+        if shared is None or block_hash(block) in shared:
+            return table.add(block)
+        return {'type': block['type'], 'html': block['html']}
+
+    return {key: [ref(block) for block in value] if key == 'blocks' else value
+            for key, value in record.items()}
+
+
+def expand_card(card: Dict, table: BlockTable) -> Dict:
+    """Dựng lại record của một lá bài như trong tarot_cards_content.json."""
+    return {key: table.expand(value) if key == 'blocks' else value
+            for key, value in card.items()}
+
+
+def dedupe_records(records: List[Dict], min_refs: int = 2) -> Dict[str, Any]:
+    """
+    Khử trùng lặp toàn bộ các record, trả về dict theo định dạng .dedup.json.
+
+    Args:
+        min_refs: Số lần xuất hiện tối thiểu để block được đưa vào bảng chung
+    """
+    counts = Counter(block_hash(block) for record in records for block in record['blocks'])
+    shared = {key for key, count in counts.items() if count >= min_refs}
+    table = BlockTable()
+    cards = [dedupe_card(record, table, shared) for record in records]
+    return {'version': DEDUP_VERSION, 'blocks': table.blocks, 'cards': cards}
+
+
+def expand_records(data: Dict[str, Any]) -> Iterator[Dict]:
+    """Lần lượt các record đầy đủ từ dữ liệu đã khử trùng lặp."""
+    if data.get('version') != DEDUP_VERSION:
+        raise ValueError(f"Không hỗ trợ phiên bản dedup {data.get('version')}")
+    table = BlockTable(data['blocks'])
+    for card in data['cards']:
+        yield expand_card(card, table)
+
+
+def parse_args():
+    """Đọc tham số dòng lệnh."""
+    script_dir = Path(__file__).parent
+    parser = argparse.ArgumentParser(description='Khử trùng lặp block giữa các lá bài')
+    parser.add_argument('--input', type=Path, default=None,
+                        help='File input (mặc định: tarot_cards_content.json, hoặc '
+                             'tarot_cards_content.dedup.json khi dùng --expand)')
+    parser.add_argument('--output', type=Path,
+                        default=script_dir / 'tarot_cards_content.dedup.json',
+                        help='File output đã khử trùng lặp')
+    parser.add_argument('--expand', type=Path, default=None, metavar='JSON_FILE',
+                        help='Dựng lại file JSON đầy đủ từ file đã khử trùng lặp')
+    parser.add_argument('--min-refs', type=int, default=2,
+                        help='Block xuất hiện từ số lần này trở lên mới được đưa vào bảng chung '
+                             '(mặc định: 2; 1 để tham chiếu mọi block bằng hash)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    script_dir = Path(__file__).parent
+
+    if args.expand:
+        input_file = args.input or script_dir / 'tarot_cards_content.dedup.json'
+        with open(input_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        count = write_json_array(args.expand, expand_records(data))
+        print(f"✅ Đã dựng lại {count} lá bài vào {args.expand}")
+        return
+
+    input_file = args.input or script_dir / 'tarot_cards_content.json'
+    print(f"📖 Đang đọc file {input_file}...")
+    with open(input_file, 'r', encoding='utf-8') as f:
+        records = json.load(f)
+
+    data = dedupe_records(records, min_refs=args.min_refs)
+    # Ghi gọn (không thụt lề) vì file này dùng để gửi cho frontend
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+
+    total = sum(len(card['blocks']) for card in data['cards'])
+    shared = sum(isinstance(ref, str) for card in data['cards'] for ref in card['blocks'])
+    before = len(json.dumps(records, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    after = args.output.stat().st_size
+    print(f"\n📊 Thống kê:")
+    print(f"   🧱 Block: {total}, {shared} tham chiếu tới {len(data['blocks'])} block dùng chung")
+    print(f"   📦 Kích thước (JSON gọn): {before:,} -> {after:,} byte "
+          f"({(1 - after / before) * 100 if before else 0:.1f}% nhỏ hơn)")
+    print(f"\n✨ Hoàn thành! Kết quả đã được lưu vào {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Xuất kết quả crawl nội dung lá bài ra các file nạp hàng loạt cho database,
+để seed/làm mới bảng tarot bằng một lệnh COPY / LOAD DATA thay vì insert từng dòng:
+
+    - PostgreSQL COPY định dạng text (.pg.txt) và CSV (.pg.csv)
+    - MySQL LOAD DATA (.mysql.tsv)
+
+Mỗi định dạng gồm hai bảng:
+    tarot_card_contents (card_id, url, status, total_blocks, blocks, error)
+        blocks là mảng JSON (cột jsonb / JSON), giống trường blocks trong JSON hiện tại
+    tarot_card_blocks (card_id, block_index, type, html)
+        mỗi block một dòng, khi cần truy vấn theo block
+
+kèm file load_postgres.sql / load_mysql.sql tạo bảng và nạp dữ liệu trong một transaction.
+Input được đọc lần lượt từng lá bài (JSON, JSONL hoặc SQLite) và ghi ra theo từng lô dòng.
+
+Chạy:
+    python bulk_export.py                                   # đọc tarot_cards_content.json
+    python bulk_export.py --input tarot_cards_content.db --format pg-csv
+    cd bulk_load && psql "$DATABASE_URL" -f load_postgres.sql
+"""
+
+import argparse
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from jsonl_output import iter_json_array, iter_latest_records
+from sqlite_output import SqliteStore
+
+CARDS_TABLE = 'tarot_card_contents'
+BLOCKS_TABLE = 'tarot_card_blocks'
+CARD_COLUMNS = ('card_id', 'url', 'status', 'total_blocks', 'blocks', 'error')
+BLOCK_COLUMNS = ('card_id', 'block_index', 'type', 'html')
+
+# Ký tự phải escape trong định dạng text của COPY và mặc định của LOAD DATA
+_PG_TEXT_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+_MYSQL_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r', '\0': '\\0'})
+
+
+def _pg_text_field(value: Any) -> str:
+    if value is None:
+        return '\\N'
+    return str(value).translate(_PG_TEXT_ESCAPES)
+
+
+def _mysql_field(value: Any) -> str:
+    if value is None:
+        return '\\N'
+    return str(value).translate(_MYSQL_ESCAPES)
+
+
+def _csv_field(value: Any) -> str:
+    # COPY ... (FORMAT csv): ô trống không có ngoặc là NULL, "" là chuỗi rỗng,
+    # nên luôn đặt chuỗi trong ngoặc kép
+    if value is None:
+        return ''
+    if isinstance(value, (int, float)):
+        return str(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _tab_row(field: Callable[[Any], str]) -> Callable[[Sequence[Any]], str]:
+    return lambda row: '\t'.join(field(value) for value in row) + '\n'
+
+
+def _csv_row(row: Sequence[Any]) -> str:
+    return ','.join(_csv_field(value) for value in row) + '\n'
+
+
+# Định dạng -> (đuôi file, hàm ghi một dòng)
+FORMATS = {
+    'pg-text': ('pg.txt', _tab_row(_pg_text_field)),
+    'pg-csv': ('pg.csv', _csv_row),
+    'mysql': ('mysql.tsv', _tab_row(_mysql_field)),
+}
+
+
+def blocks_json(blocks: List[Dict]) -> str:
+    """Mảng blocks dạng JSON gọn (không thụt lề), giữ nguyên ký tự Unicode."""
+    return json.dumps(blocks, ensure_ascii=False, separators=(',', ':'))
+
+
+def card_row(record: Dict) -> tuple:
+    return (record['cardId'], record['url'], record['status'], record['total_blocks'],
+            blocks_json(record['blocks']), record.get('error'))
+
+
+def block_rows(record: Dict) -> Iterator[tuple]:
+    for block in record['blocks']:
+        yield (record['cardId'], block['index'], block['type'], block['html'])
+
+
+class ChunkedWriter:
+    """Gom các dòng đã định dạng và ghi xuống file mỗi chunk_size dòng."""
+
+    def __init__(self, path: Path, format_row: Callable[[Sequence[Any]], str], chunk_size: int):
+        self.path = path
+        self.format_row = format_row
+        self.chunk_size = max(1, chunk_size)
+        self.rows = 0
+        self._buffer: List[str] = []
+        # newline='' để giữ nguyên '\n' cuối dòng trên mọi hệ điều hành
+        self._file = open(path, 'w', encoding='utf-8', newline='')
+
+    def write(self, row: Sequence[Any]) -> None:
+        self._buffer.append(self.format_row(row))
+        self.rows += 1
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buffer:
+            self._file.write(''.join(self._buffer))
+            self._buffer = []
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+
+
+def iter_records(input_path: Path, order: Optional[Iterable[Any]] = None) -> Iterator[Dict]:
+    """
+    Đọc lần lượt các record từ tarot_cards_content.json, .jsonl hoặc SQLite (.db/.sqlite).
+    Cả ba dạng đều được đọc dần từng record, không nạp cả file vào bộ nhớ.
+    """
+    suffix = input_path.suffix.lower()
+    if suffix == '.jsonl':
+        yield from iter_latest_records(input_path, key='cardId', order=order)
+    elif suffix in ('.db', '.sqlite', '.sqlite3'):
+        with SqliteStore(input_path) as store:
+            yield from store.iter_records(order)
+    else:
+        yield from iter_json_array(input_path)
+
+
+def postgres_script(files: Dict[str, Dict[str, str]]) -> str:
+    """Script psql tạo bảng (nếu chưa có) và nạp lại toàn bộ dữ liệu trong một transaction."""
+    lines = [
+        f"CREATE TABLE IF NOT EXISTS {CARDS_TABLE} (",
+        "    card_id integer PRIMARY KEY,",
+        "    url text NOT NULL,",
+        "    status text NOT NULL,",
+        "    total_blocks integer NOT NULL,",
+        "    blocks jsonb NOT NULL,",
+        "    error text",
+        ");",
+        f"CREATE TABLE IF NOT EXISTS {BLOCKS_TABLE} (",
+        f"    card_id integer NOT NULL REFERENCES {CARDS_TABLE} (card_id) ON DELETE CASCADE,",
+        "    block_index integer NOT NULL,",
+        "    type text NOT NULL,",
+        "    html text NOT NULL,",
+        "    PRIMARY KEY (card_id, block_index)",
+        ");",
+        f"CREATE INDEX IF NOT EXISTS {BLOCKS_TABLE}_type_idx ON {BLOCKS_TABLE} (type);",
+        "",
+        "BEGIN;",
+        f"TRUNCATE {BLOCKS_TABLE}, {CARDS_TABLE};",
+    ]
+    for fmt in ('pg-text', 'pg-csv'):
+        if fmt in files:
+            options = "(FORMAT csv)" if fmt == 'pg-csv' else "(FORMAT text)"
+            for table, columns in ((CARDS_TABLE, CARD_COLUMNS), (BLOCKS_TABLE, BLOCK_COLUMNS)):
+                lines.append(f"\\copy {table} ({', '.join(columns)}) FROM '{files[fmt][table]}' "
+                             f"WITH {options}")
+            break
+    lines += ["COMMIT;", ""]
+    return '\n'.join(lines)
+
+
+def mysql_script(files: Dict[str, str]) -> str:
+    """Script MySQL tạo bảng (nếu chưa có) và nạp lại dữ liệu bằng LOAD DATA LOCAL INFILE."""
+    lines = [
+        f"CREATE TABLE IF NOT EXISTS {CARDS_TABLE} (",
+        "    card_id INT PRIMARY KEY,",
+        "    url VARCHAR(512) NOT NULL,",
+        "    status VARCHAR(16) NOT NULL,",
+        "    total_blocks INT NOT NULL,",
+        "    blocks JSON NOT NULL,",
+        "    error TEXT NULL,",
+        "    INDEX idx_url (url)",
+        ") CHARACTER SET utf8mb4;",
+        f"CREATE TABLE IF NOT EXISTS {BLOCKS_TABLE} (",
+        "    card_id INT NOT NULL,",
+        "    block_index INT NOT NULL,",
+        "    type VARCHAR(16) NOT NULL,",
+        "    html MEDIUMTEXT NOT NULL,",
+        "    PRIMARY KEY (card_id, block_index),",
+        "    INDEX idx_type (type)",
+        ") CHARACTER SET utf8mb4;",
+        "",
+        "START TRANSACTION;",
+        f"DELETE FROM {BLOCKS_TABLE};",
+        f"DELETE FROM {CARDS_TABLE};",
+    ]
+    for table, columns in ((CARDS_TABLE, CARD_COLUMNS), (BLOCKS_TABLE, BLOCK_COLUMNS)):
+        lines += [
+            f"LOAD DATA LOCAL INFILE '{files[table]}' INTO TABLE {table}",
+            "    CHARACTER SET utf8mb4",
+            "    FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\'",
+            "    LINES TERMINATED BY '\\n'",
+            f"    ({', '.join(columns)});",
+        ]
+    lines += ["COMMIT;", ""]
+    return '\n'.join(lines)
+
+
+def export_bulk(records: Iterable[Dict], out_dir: Path, formats: Sequence[str],
+                chunk_size: int = 1000) -> Dict[str, Dict[str, Any]]:
+    """
+    Ghi các record ra file nạp hàng loạt trong out_dir, đọc input đúng một lần.
+
+    Returns:
+        Dict {định dạng: {bảng: (tên file, số dòng)}}
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    writers = {}
+    for fmt in formats:
+        ext, format_row = FORMATS[fmt]
+        writers[fmt] = {
+            CARDS_TABLE: ChunkedWriter(out_dir / f"cards.{ext}", format_row, chunk_size),
+            BLOCKS_TABLE: ChunkedWriter(out_dir / f"blocks.{ext}", format_row, chunk_size),
+        }
+
+    try:
+        for record in records:
+            row = card_row(record)
+            blocks = list(block_rows(record))
+            for tables in writers.values():
+                tables[CARDS_TABLE].write(row)
+                for block in blocks:
+                    tables[BLOCKS_TABLE].write(block)
+    finally:
+        for tables in writers.values():
+            for writer in tables.values():
+                writer.close()
+
+    return {
+        fmt: {table: (writer.path.name, writer.rows) for table, writer in tables.items()}
+        for fmt, tables in writers.items()
+    }
+
+
+def parse_args():
+    """Đọc tham số dòng lệnh."""
+    script_dir = Path(__file__).parent
+    parser = argparse.ArgumentParser(
+        description='Xuất nội dung lá bài ra file COPY (PostgreSQL) / LOAD DATA (MySQL)')
+    parser.add_argument('--input', type=Path, default=script_dir / 'tarot_cards_content.json',
+                        help='tarot_cards_content.json, .jsonl hoặc SQLite (.db) '
+                             '(mặc định: tarot_cards_content.json cạnh script)')
+    parser.add_argument('--out-dir', type=Path, default=script_dir / 'bulk_load',
+                        help='Thư mục output (mặc định: bulk_load cạnh script)')
+    parser.add_argument('--format', choices=sorted(FORMATS) + ['all'], default='all',
+                        help='Định dạng cần xuất (mặc định: all)')
+    parser.add_argument('--order', type=Path, default=None,
+                        help='File tarot_card.json để ghi theo đúng thứ tự lá bài')
+    parser.add_argument('--chunk-size', type=int, default=1000,
+                        help='Số dòng gom lại trước mỗi lần ghi file (mặc định: 1000)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    formats = sorted(FORMATS) if args.format == 'all' else [args.format]
+
+    order = None
+    if args.order:
+        with open(args.order, 'r', encoding='utf-8') as f:
+            order = [card['id'] for card in json.load(f)]
+
+    print(f"📖 Đang đọc {args.input}...")
+    results = export_bulk(iter_records(args.input, order), args.out_dir, formats,
+                          chunk_size=args.chunk_size)
+
+    for fmt, tables in results.items():
+        for table, (name, rows) in tables.items():
+            print(f"   {fmt:<8} {table:<20} {rows:>6} dòng -> {args.out_dir / name}")
+
+    pg_files = {fmt: {table: name for table, (name, _) in tables.items()}
+                for fmt, tables in results.items() if fmt.startswith('pg-')}
+    if pg_files:
+        (args.out_dir / 'load_postgres.sql').write_text(postgres_script(pg_files), encoding='utf-8')
+        print(f"🐘 PostgreSQL: cd {args.out_dir} && psql \"$DATABASE_URL\" -f load_postgres.sql")
+    if 'mysql' in results:
+        files = {table: name for table, (name, _) in results['mysql'].items()}
+        (args.out_dir / 'load_mysql.sql').write_text(mysql_script(files), encoding='utf-8')
+        print(f"🐬 MySQL: cd {args.out_dir} && mysql --local-infile=1 <db> < load_mysql.sql")
+
+    print(f"\n✨ Hoàn thành! Các file đã được lưu vào {args.out_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Pipeline crawl một lần cho cả crawl_tarot_data và crawl_tarot_content.
+Mỗi trang tarot card chỉ được tải một lần và parse một lần (lxml), sau đó tất cả
+extractor đã đăng ký chạy trên cùng một cây DOM. Một lượt chạy ghi ra cả
+tarot_cards_data.json và tarot_cards_content.json.
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from bs4 import BeautifulSoup
+
+import http_client
+from async_crawl import crawl_concurrently
+from crawl_paragraphs import extract_paragraphs
+from crawl_tarot_content import build_content_error, build_content_result, extract_content_blocks
+from crawl_tarot_data import (build_card_data, build_card_data_error, extract_phuc_content_fast,
+                              extract_structured_from_soup)
+from http_cache import HttpCache
+from jsonl_output import JsonlWriter, finalize_jsonl
+from throttle import AdaptiveThrottle
+
+
+class ParsedPage:
+    """Một trang đã tải và parse: URL, HTML dạng text và soup (lxml)."""
+
+    def __init__(self, url: str, text: str, soup: BeautifulSoup):
+        self.url = url
+        self.text = text
+        self.soup = soup
+
+
+# Tên extractor -> hàm nhận ParsedPage
+EXTRACTORS: Dict[str, Callable[[ParsedPage], Any]] = {}
+
+
+def register_extractor(name: str):
+    """Decorator đăng ký một extractor chạy trên ParsedPage."""
+    def decorator(func: Callable[[ParsedPage], Any]) -> Callable[[ParsedPage], Any]:
+        EXTRACTORS[name] = func
+        return func
+    return decorator
+
+
+@register_extractor('structured_content')
+def _extract_structured(page: ParsedPage) -> Dict:
+    return extract_structured_from_soup(page.soup)
+
+
+@register_extractor('phuc_marked_content')
+def _extract_phuc(page: ParsedPage) -> List[Dict]:
+    # Đánh dấu "phuc" nằm trên HTML gốc nên quét text, không cần cây DOM
+    return extract_phuc_content_fast(page.text)
+
+
+@register_extractor('content_blocks')
+def _extract_blocks(page: ParsedPage) -> List[Dict]:
+    return extract_content_blocks(page.soup)
+
+
+@register_extractor('paragraphs')
+def _extract_paragraphs(page: ParsedPage) -> List[Dict]:
+    return extract_paragraphs(page.soup)
+
+
+# Extractor cần cho từng file output
+DATA_EXTRACTORS = ('structured_content', 'phuc_marked_content')
+CONTENT_EXTRACTORS = ('content_blocks',)
+PARAGRAPH_EXTRACTORS = ('paragraphs',)
+
+
+def fetch_page(url: str) -> ParsedPage:
+    """
+    Tải và parse một trang đúng một lần. Parse từ bytes như crawl_tarot_content để
+    BeautifulSoup tự nhận charset (BOM, <meta charset>) thay vì charset requests đoán từ
+    header (ISO-8859-1 khi header không có charset, làm hỏng tiếng Việt); text cho
+    extractor "phuc" được giải mã bằng cùng charset đó.
+    """
+    response = http_client.fetch(url)
+    soup = BeautifulSoup(response.content, 'lxml')
+    text = response.content.decode(soup.original_encoding or 'utf-8', errors='replace')
+    return ParsedPage(url, text, soup)
+
+
+def run_extractors(page: ParsedPage, names: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Chạy các extractor đã đăng ký trên cùng một trang.
+
+    Args:
+        page: Trang đã parse
+        names: Tên các extractor cần chạy (mặc định: tất cả)
+
+    Returns:
+        Dict tên extractor -> kết quả
+    """
+    return {name: EXTRACTORS[name](page) for name in (names or list(EXTRACTORS))}
+
+
+def load_cards(cards_file: Path, video_links_file: Path) -> List[Dict]:
+    """
+    Gộp tarot_card.json (cho output content) và video_links.json (cho output data) theo card_url.
+
+    Returns:
+        List các entry {card_url, card_id, video_link}, giữ thứ tự của tarot_card.json,
+        các URL chỉ có trong video_links.json được xếp sau
+    """
+    entries: Dict[str, Dict] = {}
+    if cards_file.exists():
+        with open(cards_file, 'r', encoding='utf-8') as f:
+            for card in json.load(f):
+                entries[card['card_url']] = {'card_url': card['card_url'],
+                                             'card_id': card['id'], 'video_link': None}
+    if video_links_file.exists():
+        with open(video_links_file, 'r', encoding='utf-8') as f:
+            for link in json.load(f):
+                entry = entries.setdefault(link['card_url'], {'card_url': link['card_url'],
+                                                              'card_id': None})
+                entry['video_link'] = link
+    return list(entries.values())
+
+
+def _add_video_links(card_data: Dict, link: Dict) -> None:
+    """Thêm video URLs vào record data, giống crawl_tarot_data."""
+    card_data['video_mp4'] = link.get('video_mp4')
+    card_data['video_webm'] = link.get('video_webm')
+
+
+def process_card(entry: Dict, with_paragraphs: bool = False) -> Dict[str, Optional[Dict]]:
+    """
+    Tải + parse trang của một lá bài một lần và dựng record cho từng file output.
+
+    Returns:
+        Dict {'content': ..., 'data': ..., 'paragraphs': ...}; giá trị None nếu
+        lá bài không thuộc file output đó
+    """
+    card_url = entry['card_url']
+    card_id = entry['card_id']
+    link = entry['video_link']
+
+    names = []
+    if link is not None:
+        names.extend(DATA_EXTRACTORS)
+    if card_id is not None:
+        names.extend(CONTENT_EXTRACTORS)
+    if with_paragraphs:
+        names.extend(PARAGRAPH_EXTRACTORS)
+
+    records: Dict[str, Optional[Dict]] = {'content': None, 'data': None, 'paragraphs': None}
+    try:
+        page = fetch_page(card_url)
+        outputs = run_extractors(page, names)
+    except Exception as e:
+        if card_id is not None:
+            records['content'] = build_content_error(card_url, card_id, e)
+        if link is not None:
+            records['data'] = build_card_data_error(card_url, link['card_name'], e)
+            _add_video_links(records['data'], link)
+        if with_paragraphs:
+            records['paragraphs'] = {'url': card_url, 'status': 'error', 'error': str(e)}
+        return records
+
+    if card_id is not None:
+        records['content'] = build_content_result(card_url, card_id, outputs['content_blocks'])
+    if link is not None:
+        records['data'] = build_card_data(card_url, link['card_name'], outputs['structured_content'],
+                                          outputs['phuc_marked_content'])
+        _add_video_links(records['data'], link)
+    if with_paragraphs:
+        paragraphs = outputs['paragraphs']
+        records['paragraphs'] = {
+            'url': card_url,
+            'status': 'success',
+            'total_paragraphs': len(paragraphs),
+            'paragraphs': paragraphs
+        }
+    return records
+
+
+def parse_args():
+    """Đọc tham số dòng lệnh."""
+    parser = argparse.ArgumentParser(
+        description='Crawl một lần, ghi cả tarot_cards_data.json và tarot_cards_content.json')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='Crawl song song bằng asyncio thay vì tuần tự có sleep')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='Số request chạy cùng lúc ở chế độ async (mặc định: 8)')
+    parser.add_argument('--rps', type=float, default=4.0,
+                        help='Số request/giây tối đa cho mỗi host ở chế độ async (mặc định: 4)')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Tự điều chỉnh tốc độ theo response của server thay cho delay cố định: '
+                             'bắt đầu từ --rps, tăng dần tới --max-rps, giảm khi gặp 429/5xx hoặc response chậm')
+    parser.add_argument('--max-rps', type=float, default=8.0,
+                        help='Số request/giây tối đa cho mỗi host khi dùng --adaptive (mặc định: 8)')
+    parser.add_argument('--retries', type=int, default=http_client.DEFAULT_RETRIES,
+                        help='Số lần thử lại mỗi trang khi lỗi kết nối hoặc 408/429/5xx, '
+                             f'backoff lũy thừa có jitter (mặc định: {http_client.DEFAULT_RETRIES})')
+    parser.add_argument('--cache-dir', type=Path, default=None,
+                        help='Thư mục cache HTTP (mặc định: .http_cache cạnh script)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Tải lại toàn bộ trang, không dùng cache HTTP')
+    parser.add_argument('--paragraphs', action='store_true',
+                        help='Ghi thêm tarot_cards_paragraphs.json (tất cả thẻ <p> của từng trang)')
+    return parser.parse_args()
+
+
+def main():
+    """Crawl tất cả lá bài một lượt và ghi các file output."""
+    args = parse_args()
+
+    script_dir = Path(__file__).parent
+    entries = load_cards(script_dir / 'tarot_card.json', script_dir / 'video_links.json')
+    outputs = {
+        'content': script_dir / 'tarot_cards_content.json',
+        'data': script_dir / 'tarot_cards_data.json',
+    }
+    if args.paragraphs:
+        outputs['paragraphs'] = script_dir / 'tarot_cards_paragraphs.json'
+    keys = {'content': 'cardId', 'data': 'card_url', 'paragraphs': 'url'}
+
+    cache = None
+    if not args.no_cache:
+        cache = HttpCache(args.cache_dir or script_dir / '.http_cache')
+        http_client.set_cache(cache)
+
+    # Điều tốc thích ứng thay cho delay cố định; thử lại khi lỗi tạm thời trong mọi chế độ
+    throttle = None
+    if args.adaptive:
+        throttle = AdaptiveThrottle(start_rps=args.rps, max_rps=args.max_rps)
+        http_client.set_throttle(throttle)
+    http_client.configure(retries=args.retries)
+
+    print(f"📋 Tìm thấy {len(entries)} trang cần crawl (mỗi trang tải và parse một lần)\n")
+
+    writers = {name: JsonlWriter(path.with_suffix('.jsonl'), append=False)
+               for name, path in outputs.items()}
+
+    def save(records: Dict[str, Optional[Dict]]) -> None:
+        for name, writer in writers.items():
+            if records[name] is not None:
+                writer.write(records[name])
+
+    try:
+        if args.use_async:
+            if throttle:
+                print(f"⚡ Chế độ async: {args.concurrency} request song song, tốc độ thích ứng "
+                      f"{args.rps}-{args.max_rps} request/giây\n")
+            else:
+                print(f"⚡ Chế độ async: {args.concurrency} request song song, tối đa {args.rps} request/giây\n")
+            jobs = [(entry['card_url'], process_card, (entry, args.paragraphs)) for entry in entries]
+            crawl_concurrently(jobs, concurrency=args.concurrency, rps=0 if throttle else args.rps,
+                               on_result=lambda _, records: save(records))
+        else:
+            for idx, entry in enumerate(entries, 1):
+                print(f"[{idx}/{len(entries)}] Đang crawl: {entry['card_url']}")
+                save(process_card(entry, args.paragraphs))
+                if idx < len(entries) and not throttle:
+                    time.sleep(1)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    # Gộp từng file JSONL thành file JSON theo thứ tự đầu vào
+    order = {
+        'content': [e['card_id'] for e in entries if e['card_id'] is not None],
+        'data': [e['card_url'] for e in entries if e['video_link'] is not None],
+        'paragraphs': [e['card_url'] for e in entries],
+    }
+    print()
+    for name, path in outputs.items():
+        count = finalize_jsonl(path.with_suffix('.jsonl'), path, key=keys[name], order=order[name])
+        print(f"💾 Đã lưu {count} lá bài vào {path}")
+    if cache:
+        print(f"   💾 Cache: {cache.summary()}")
+    if throttle:
+        print(f"   🚦 Điều tốc: {throttle.summary()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Xuất nội dung lá bài thành các file JSON tĩnh nhỏ cho frontend: mỗi lá bài một shard
+JSON gọn, tên file chứa hash nội dung (card-<cardId>.<hash>.json) nên có thể cache vĩnh viễn
+(Cache-Control: immutable), kèm bản nén sẵn .gz và .br cạnh mỗi shard để web server
+trả thẳng (gzip_static / brotli_static của nginx, hoặc các host tĩnh hỗ trợ file nén sẵn).
+
+manifest.json (không nên cache lâu) ánh xạ cardId -> file và hash:
+    {
+      "version": 1,
+      "cards": {"1": {"file": "card-1.3f2a9c1b7e40.json", "sha256": "...", "bytes": 6120,
+                      "gzip": 2301, "br": 1987, "status": "success", "total_blocks": 58}, ...}
+    }
+
+Trang lá bài chỉ cần tải manifest (vài KB) rồi shard của lá đó, thay vì cả tarot_cards_content.json.
+Shard không đổi nội dung thì giữ nguyên tên file và không ghi lại; shard cũ không còn
+trong manifest bị xóa. Bản .br cần brotli hoặc brotlicffi (pip install brotli).
+
+Chạy:
+    python card_shards.py                                   # tarot_cards_content.json -> card_shards/
+    python card_shards.py --input tarot_cards_content.db --out-dir ../client/public/data/cards
+"""
+
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from bulk_export import iter_records
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+SHARDS_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+SHARD_PREFIX = 'card-'
+
+# 12 ký tự hex là đủ để đổi tên file mỗi khi nội dung đổi
+HASH_LENGTH = 12
+
+
+def gzip_bytes(data: bytes, level: int = 9) -> bytes:
+    """Nén gzip với mtime=0 và không có tên file trong header, để cùng input luôn cho cùng output."""
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=level, mtime=0) as f:
+        f.write(data)
+    return buffer.getvalue()
+
+
+def brotli_bytes(data: bytes, quality: int = 11) -> Optional[bytes]:
+    """Nén brotli (chế độ text), None nếu chưa cài brotli/brotlicffi."""
+    if brotli is None:
+        return None
+    return brotli.compress(data, mode=brotli.MODE_TEXT, quality=quality)
+
+
+def shard_bytes(record: Dict) -> bytes:
+    """JSON gọn của một lá bài, cùng các trường như trong tarot_cards_content.json."""
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def write_shard(record: Dict, out_dir: Path, use_brotli: bool = True) -> Dict:
+    """
+    Ghi shard của một lá bài cùng bản .gz/.br (bỏ qua nếu file cùng hash đã có).
+
+    Returns:
+        Entry trong manifest: file, sha256, kích thước từng bản, status, total_blocks,
+        và 'written' (False khi shard không đổi so với lần xuất trước)
+    """
+    data = shard_bytes(record)
+    digest = hashlib.sha256(data).hexdigest()
+    name = f"{SHARD_PREFIX}{record['cardId']}.{digest[:HASH_LENGTH]}.json"
+    path = out_dir / name
+
+    entry = {'file': name, 'sha256': digest, 'bytes': len(data)}
+    variants = {'.gz': ('gzip', gzip_bytes)}
+    if use_brotli and brotli is not None:
+        variants['.br'] = ('br', brotli_bytes)
+
+    # Tên file chứa hash nên shard đã có nghĩa là nội dung không đổi. Bản nén được ghi
+    # trước bản gốc: có file gốc nghĩa là lần xuất trước đã ghi xong các bản nén
+    is_new = not path.exists()
+    for suffix, (key, compress) in variants.items():
+        variant_path = out_dir / (name + suffix)
+        if is_new or not variant_path.exists():
+            _write_atomic(variant_path, compress(data))
+        entry[key] = variant_path.stat().st_size
+    if is_new:
+        _write_atomic(path, data)
+
+    entry['status'] = record['status']
+    entry['total_blocks'] = record['total_blocks']
+    entry['written'] = is_new
+    return entry
+
+
+def export_shards(records: Iterable[Dict], out_dir: Path, use_brotli: bool = True) -> Dict:
+    """
+    Xuất tất cả lá bài thành shard, ghi manifest.json sau cùng (để manifest không bao giờ
+    trỏ tới shard chưa ghi xong) rồi xóa các shard cũ không còn dùng, kể cả các bản .br
+    không được tạo lại ở lần xuất này. Trả về manifest.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    cards: Dict[str, Dict] = {}
+    written = 0
+    for record in records:
+        entry = write_shard(record, out_dir, use_brotli)
+        written += entry.pop('written')
+        cards[str(record['cardId'])] = entry
+
+    manifest = {'version': SHARDS_VERSION, 'cards': cards}
+    data = json.dumps(manifest, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    _write_atomic(out_dir / MANIFEST_NAME, data)
+    _write_atomic(out_dir / (MANIFEST_NAME + '.gz'), gzip_bytes(data))
+    manifest_br = brotli_bytes(data) if use_brotli else None
+    if manifest_br is not None:
+        _write_atomic(out_dir / (MANIFEST_NAME + '.br'), manifest_br)
+    else:
+        # Không tạo .br lần này (--no-brotli hoặc thiếu brotli): bỏ bản .br cũ để web server
+        # không trả manifest/shard đã lỗi thời cho client nhận brotli
+        try:
+            (out_dir / (MANIFEST_NAME + '.br')).unlink()
+        except FileNotFoundError:
+            pass
+
+    keep = {entry['file'] + suffix for entry in cards.values()
+            for suffix, key in (('', 'bytes'), ('.gz', 'gzip'), ('.br', 'br')) if key in entry}
+    removed = 0
+    for path in out_dir.glob(SHARD_PREFIX + '*.json*'):
+        if path.name not in keep:
+            path.unlink()
+            removed += 1
+
+    manifest['written'] = written
+    manifest['removed'] = removed
+    return manifest
+
+
+def parse_args():
+    """Đọc tham số dòng lệnh."""
+    script_dir = Path(__file__).parent
+    parser = argparse.ArgumentParser(
+        description='Xuất mỗi lá bài thành một file JSON tĩnh (kèm .gz/.br) và manifest có hash')
+    parser.add_argument('--input', type=Path, default=script_dir / 'tarot_cards_content.json',
+                        help='tarot_cards_content.json, .jsonl hoặc SQLite (.db) '
+                             '(mặc định: tarot_cards_content.json cạnh script)')
+    parser.add_argument('--out-dir', type=Path, default=script_dir / 'card_shards',
+                        help='Thư mục output (mặc định: card_shards cạnh script)')
+    parser.add_argument('--order', type=Path, default=None,
+                        help='File tarot_card.json để ghi manifest theo đúng thứ tự lá bài')
+    parser.add_argument('--no-brotli', action='store_true',
+                        help='Không tạo bản .br')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    use_brotli = not args.no_brotli
+    if use_brotli and brotli is None:
+        print("⚠️  Chưa cài brotli/brotlicffi (pip install brotli), chỉ tạo bản .gz")
+
+    order = None
+    if args.order:
+        with open(args.order, 'r', encoding='utf-8') as f:
+            order = [card['id'] for card in json.load(f)]
+
+    print(f"📖 Đang đọc {args.input}...")
+    manifest = export_shards(iter_records(args.input, order), args.out_dir, use_brotli)
+
+    cards = manifest['cards'].values()
+    total = sum(entry['bytes'] for entry in cards)
+    print(f"\n📊 {len(manifest['cards'])} shard ({manifest['written']} ghi mới, "
+          f"{manifest['removed']} file cũ đã xóa)")
+    if cards:
+        largest = max(cards, key=lambda entry: entry['bytes'])
+        print(f"   📦 Tổng {total:,} byte, trung bình {total // len(cards):,} byte/lá bài, "
+              f"lớn nhất {largest['bytes']:,} ({largest['file']})")
+        for key, label in (('gzip', 'gzip'), ('br', 'brotli')):
+            sizes = [entry[key] for entry in cards if key in entry]
+            if sizes:
+                print(f"   🗜️  {label}: trung bình {sum(sizes) // len(sizes):,} byte/lá bài "
+                      f"({(1 - sum(sizes) / total) * 100:.0f}% nhỏ hơn)")
+    print(f"\n✨ Hoàn thành! Các shard và {MANIFEST_NAME} đã được lưu vào {args.out_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Lưu sha256 của body từng trang và phiên bản extractor cạnh file output
+(vd. tarot_cards_content.hashes.json), để lần crawl sau dùng lại kết quả cũ
+cho các trang không đổi thay vì parse lại.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+# Chỉ dùng lại các kết quả trích xuất thành công
+REUSABLE_STATUSES = ('success', 'warning')
+
+
+def body_digest(body: bytes) -> str:
+    """sha256 của body thô (trước khi parse)."""
+    return hashlib.sha256(body).hexdigest()
+
+
+class ContentHashes:
+    """
+    Bảng key (vd. cardId) -> {url, sha256, extractor_version} của lượt crawl trước,
+    cùng các record output tương ứng để dùng lại.
+    """
+
+    def __init__(self, path: Union[str, Path], extractor_version: Any,
+                 previous_records: Optional[Dict[Any, Dict]] = None):
+        """
+        Args:
+            path: File sidecar .hashes.json
+            extractor_version: Phiên bản extractor hiện tại; khác phiên bản đã lưu thì trích xuất lại
+            previous_records: Record output của lượt trước theo key
+        """
+        self.path = Path(path)
+        self.extractor_version = extractor_version
+        self.previous_records = previous_records or {}
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict] = {}
+        self.changed: List[Any] = []
+        self.unchanged: List[Any] = []
+
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f).get('entries', {})
+            except ValueError:
+                self.entries = {}
+
+    def reuse(self, key: Any, digest: str) -> Optional[Dict]:
+        """
+        Record của lượt trước nếu body và phiên bản extractor không đổi, ngược lại None.
+        """
+        entry = self.entries.get(str(key))
+        record = self.previous_records.get(key)
+        if (entry is None or record is None or entry.get('sha256') != digest
+                or entry.get('extractor_version') != self.extractor_version
+                or record.get('status') not in REUSABLE_STATUSES):
+            return None
+        with self._lock:
+            self.unchanged.append(key)
+        return record
+
+    def record(self, key: Any, url: str, digest: str) -> None:
+        """Ghi hash mới của một trang sẽ được trích xuất lại."""
+        with self._lock:
+            self.entries[str(key)] = {
+                'url': url,
+                'sha256': digest,
+                'extractor_version': self.extractor_version,
+            }
+            self.changed.append(key)
+
+    def save(self) -> None:
+        """Ghi sidecar (ghi ra file tạm rồi đổi tên)."""
+        tmp_path = self.path.with_suffix('.json.tmp')
+        with self._lock:
+            data = {'extractor_version': self.extractor_version, 'entries': self.entries}
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def load_previous_records(json_path: Union[str, Path], key: str = 'cardId') -> Dict[Any, Dict]:
+    """Các record trong file output JSON của lượt trước, theo key (rỗng nếu chưa có file)."""
+    json_path = Path(json_path)
+    if not json_path.exists():
+        return {}
+    try:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            return {record[key]: record for record in json.load(f) if key in record}
+    except ValueError:
+        return {}
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Đo thời gian từng giai đoạn crawl (tải, parse, trích xuất, ghi file), số byte
+và số block của từng trang, rồi xuất ra file JSON và định dạng text của Prometheus.
+
+Dùng:
+    with crawl_metrics.page(url) as record:
+        with crawl_metrics.fetch_stage() as fetched:
+            fetched['response'] = response = http_client.fetch(url)
+        with crawl_metrics.stage('parse'):
+            soup = BeautifulSoup(response.content, 'lxml')
+        ...
+        record['status'] = result['status']
+
+    crawl_metrics.write_reports('tarot_cards_content.metrics')
+
+Các giai đoạn:
+    fetch         toàn bộ request (DNS + kết nối + chờ server + tải body)
+    connect_ttfb  từ lúc gửi request tới khi nhận xong headers (response.elapsed);
+                  requests không tách được DNS/kết nối/TLS nên gộp chung
+    download      phần còn lại của fetch: đọc body
+    parse, extract, write
+"""
+
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+# Bucket (giây) giống mặc định của thư viện client Prometheus
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Bucket kích thước trang (byte)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+METRIC_PREFIX = 'tarot_crawl'
+
+
+class Histogram:
+    """Histogram cộng dồn theo bucket, giữ cả các giá trị để tính percentile."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.values: List[float] = []
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.values.append(value)
+        self.sum += value
+
+    def percentile(self, q: float) -> float:
+        if not self.values:
+            return 0.0
+        ordered = sorted(self.values)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def summary(self) -> Dict[str, float]:
+        count = len(self.values)
+        return {
+            'count': count,
+            'sum': round(self.sum, 6),
+            'mean': round(self.sum / count, 6) if count else 0.0,
+            'p50': round(self.percentile(0.5), 6),
+            'p95': round(self.percentile(0.95), 6),
+            'max': round(max(self.values), 6) if count else 0.0,
+        }
+
+    def cumulative(self) -> List[int]:
+        """Số quan sát <= mỗi bucket (thêm +Inf ở cuối), như Prometheus."""
+        result = []
+        total = 0
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+
+class CrawlMetrics:
+    """Bộ đếm và histogram cho một lượt crawl, dùng được từ nhiều thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.started_at = time.time()
+        self.stages: Dict[str, Histogram] = {}
+        self.page_bytes = Histogram(SIZE_BUCKETS)
+        self.counters: Dict[str, float] = {}
+        self.pages_by_status: Dict[str, int] = {}
+        self.pages: List[Dict] = []
+
+    def observe_stage(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.stages.setdefault(name, Histogram(LATENCY_BUCKETS)).observe(seconds)
+        record = getattr(self._local, 'record', None)
+        if record is not None:
+            record['stages'][name] = round(record['stages'].get(name, 0.0) + seconds, 6)
+
+    def count(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+        record = getattr(self._local, 'record', None)
+        if record is not None:
+            record[name] = record.get(name, 0) + value
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(name, time.perf_counter() - start)
+
+    @contextmanager
+    def page(self, url: str) -> Iterator[Dict]:
+        record = new_page_record(url)
+        start = time.perf_counter()
+        try:
+            with self.attach(record):
+                yield record
+        finally:
+            record['total'] = round(time.perf_counter() - start, 6)
+            self.add_page(record)
+
+    @contextmanager
+    def attach(self, record: Dict) -> Iterator[Dict]:
+        """
+        Ghi các giai đoạn và bộ đếm trên thread hiện tại vào record của một trang, không thêm
+        record vào danh sách trang (dùng khi một trang đi qua nhiều thread/process, add_page sau).
+        """
+        previous = getattr(self._local, 'record', None)
+        self._local.record = record
+        try:
+            yield record
+        finally:
+            self._local.record = previous
+
+    def add_page(self, record: Dict) -> None:
+        """Thêm record của một trang được đo ở nơi khác (vd. parse trong process con)."""
+        record.setdefault('stages', {})
+        record.setdefault('total', round(sum(record['stages'].values()), 6))
+        with self._lock:
+            self.pages.append(record)
+            status = record.get('status') or 'unknown'
+            self.pages_by_status[status] = self.pages_by_status.get(status, 0) + 1
+            if 'bytes' in record:
+                self.page_bytes.observe(record['bytes'])
+
+    def record_response(self, response, fetch_seconds: Optional[float] = None) -> None:
+        """Ghi số byte, cache hit và tách fetch thành connect_ttfb + download."""
+        self.count('bytes', len(response.content))
+        if getattr(response, 'from_cache', False):
+            self.count('cache_hits')
+        elapsed = getattr(response, 'elapsed', None)
+        if elapsed is not None:
+            ttfb = elapsed.total_seconds()
+            self.observe_stage('connect_ttfb', ttfb)
+            if fetch_seconds is not None:
+                self.observe_stage('download', max(0.0, fetch_seconds - ttfb))
+
+    def to_dict(self, slowest: int = 10) -> Dict:
+        with self._lock:
+            pages = list(self.pages)
+            return {
+                'started_at': self.started_at,
+                'duration': round(time.time() - self.started_at, 3),
+                'pages': len(pages),
+                'pages_by_status': dict(self.pages_by_status),
+                'counters': dict(self.counters),
+                'stages': {name: hist.summary() for name, hist in sorted(self.stages.items())},
+                'page_bytes': self.page_bytes.summary(),
+                'slowest_pages': sorted(pages, key=lambda p: p['total'], reverse=True)[:slowest],
+                'per_page': pages,
+            }
+
+    def to_prometheus(self) -> str:
+        lines = []
+
+        def histogram(name: str, help_text: str, hists: Dict[str, Histogram], label: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, hist in hists.items():
+                labels = f'{label}="{key}",' if label else ''
+                for le, count in zip(list(hist.buckets) + ['+Inf'], hist.cumulative()):
+                    lines.append(f'{name}_bucket{{{labels}le="{le}"}} {count}')
+                suffix = f'{{{labels.rstrip(",")}}}' if label else ''
+                lines.append(f"{name}_sum{suffix} {hist.sum:.6f}")
+                lines.append(f"{name}_count{suffix} {len(hist.values)}")
+
+        with self._lock:
+            histogram(f"{METRIC_PREFIX}_stage_seconds", 'Thời gian từng giai đoạn crawl (giây)',
+                      dict(sorted(self.stages.items())), 'stage')
+            histogram(f"{METRIC_PREFIX}_page_bytes", 'Kích thước body của từng trang (byte)',
+                      {'': self.page_bytes}, '')
+
+            name = f"{METRIC_PREFIX}_pages_total"
+            lines.append(f"# HELP {name} Số trang đã crawl theo trạng thái")
+            lines.append(f"# TYPE {name} counter")
+            for status, count in sorted(self.pages_by_status.items()):
+                lines.append(f'{name}{{status="{status}"}} {count}')
+
+            for counter, value in sorted(self.counters.items()):
+                name = f"{METRIC_PREFIX}_{counter}_total"
+                lines.append(f"# TYPE {name} counter")
+                lines.append(f"{name} {value:g}")
+        return '\n'.join(lines) + '\n'
+
+
+def new_page_record(url: Optional[str] = None) -> Dict:
+    """Record rỗng của một trang, cùng dạng với record của page()."""
+    return {'url': url, 'status': None, 'stages': {}}
+
+
+_metrics = CrawlMetrics()
+
+
+def get_metrics() -> CrawlMetrics:
+    """Bộ metrics dùng chung của process hiện tại."""
+    return _metrics
+
+
+def reset() -> None:
+    """Bắt đầu một lượt đo mới."""
+    global _metrics
+    _metrics = CrawlMetrics()
+
+
+def stage(name: str):
+    """Context manager đo thời gian một giai đoạn (gắn vào trang đang crawl trên thread này, nếu có)."""
+    return _metrics.stage(name)
+
+
+def page(url: str):
+    """Context manager gom các giai đoạn của một trang; trả về record để ghi status, số block..."""
+    return _metrics.page(url)
+
+
+def attach(record: Dict):
+    """Context manager gắn record của một trang vào thread hiện tại (xem CrawlMetrics.attach)."""
+    return _metrics.attach(record)
+
+
+def count(name: str, value: float = 1) -> None:
+    """Cộng vào một bộ đếm (vd. 'blocks') cho cả lượt crawl và trang hiện tại."""
+    _metrics.count(name, value)
+
+
+@contextmanager
+def fetch_stage() -> Iterator[Dict]:
+    """
+    Đo giai đoạn fetch; gán response vào dict trả về để tách connect_ttfb/download:
+        with crawl_metrics.fetch_stage() as fetched:
+            fetched['response'] = response = http_client.fetch(url)
+    """
+    fetched: Dict = {}
+    start = time.perf_counter()
+    try:
+        yield fetched
+    finally:
+        seconds = time.perf_counter() - start
+        _metrics.observe_stage('fetch', seconds)
+        if fetched.get('response') is not None:
+            _metrics.record_response(fetched['response'], seconds)
+
+
+def write_reports(path: Union[str, Path]) -> Dict[str, Path]:
+    """
+    Ghi metrics ra <path>.json và <path>.prom.
+
+    Returns:
+        Dict {'json': đường dẫn, 'prometheus': đường dẫn}
+    """
+    path = Path(path)
+    json_path = path.with_name(path.name + '.json')
+    prom_path = path.with_name(path.name + '.prom')
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(_metrics.to_dict(), f, ensure_ascii=False, indent=2)
+    with open(prom_path, 'w', encoding='utf-8') as f:
+        f.write(_metrics.to_prometheus())
+    return {'json': json_path, 'prometheus': prom_path}
+
+
+def format_summary() -> str:
+    """Vài dòng tóm tắt các giai đoạn để in cuối lượt crawl."""
+    data = _metrics.to_dict(slowest=3)
+    lines = []
+    for name, summary in data['stages'].items():
+        lines.append(f"{name}: {summary['count']} lần, trung bình {summary['mean'] * 1000:.1f} ms, "
+                     f"p95 {summary['p95'] * 1000:.1f} ms, tổng {summary['sum']:.2f}s")
+    for slow in data['slowest_pages']:
+        if not slow['total']:
+            continue
+        lines.append(f"chậm: {slow['url']} ({slow['total']:.2f}s)")
+    return '\n'.join(lines)
@@ -3,9 +3,34 @@
 Script để crawl và lấy tất cả nội dung trong các thẻ <p> từ trang tarotoo.com
 """
 
-import requests
 from bs4 import BeautifulSoup
 import json
+from typing import Dict, List
+
+import http_client
+
+def extract_paragraphs(soup: BeautifulSoup) -> List[Dict]:
+    """
+    Lấy nội dung text và HTML của tất cả các thẻ <p> có nội dung trong trang
+    
+    Args:
+        soup: BeautifulSoup object của trang HTML
+        
+    Returns:
+        List các dictionary {index, text, html}; index là vị trí của thẻ <p> trong trang
+    """
+    results = []
+    for idx, p in enumerate(soup.find_all('p'), 1):
+        text = p.get_text(strip=True)
+        
+        # Chỉ lấy các thẻ <p> có nội dung
+        if text:
+            results.append({
+                'index': idx,
+                'text': text,
+                'html': str(p)
+            })
+    return results
 
 def crawl_paragraphs(url: str):
     """
@@ -20,34 +45,14 @@ def crawl_paragraphs(url: str):
     print(f"Đang crawl: {url}")
     
     try:
-        # Headers để giả lập trình duyệt
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        # Gửi request
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
+        # Gửi request qua client dùng chung (headers giả lập trình duyệt, keep-alive)
+        response = http_client.fetch(url)
         
         # Parse HTML
         soup = BeautifulSoup(response.text, 'html.parser')
         
-        # Tìm tất cả các thẻ <p>
-        paragraphs = soup.find_all('p')
-        
-        # Lưu kết quả
-        results = []
-        for idx, p in enumerate(paragraphs, 1):
-            text = p.get_text(strip=True)
-            html = str(p)
-            
-            # Chỉ lấy các thẻ <p> có nội dung
-            if text:
-                results.append({
-                    'index': idx,
-                    'text': text,
-                    'html': html
-                })
+        # Lấy nội dung các thẻ <p>
+        results = extract_paragraphs(soup)
         
         return {
             'url': url,
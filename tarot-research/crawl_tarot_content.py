@@ -4,14 +4,26 @@ Script để crawl nội dung từ các trang tarot card.
 Lấy dữ liệu từ div.content__body và format theo chuẩn JSON.
 """
 
+import argparse
 import json
 import re
 import time
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import requests
 from bs4 import BeautifulSoup
+from bs4.element import Tag
+
+import crawl_metrics
+import http_client
+from async_crawl import crawl_concurrently
+from content_hashes import ContentHashes, body_digest, load_previous_records
+from http_cache import HttpCache, open_archive
+from jsonl_output import JsonlWriter, finalize_jsonl, load_completed_keys
+from parse_pool import parse_concurrently
+from sqlite_output import SqliteStore
+from throttle import AdaptiveThrottle
 
 
 def sanitize_html(html: str) -> str:
@@ -35,10 +47,121 @@ def should_skip_li(li_tag) -> bool:
     return li_tag.find('a') is not None
 
 
+# Tăng mỗi khi extract_content_blocks/sanitize_html cho ra blocks khác đi,
+# để lần crawl sau trích xuất lại cả các trang không đổi (xem content_hashes.py)
+EXTRACTOR_VERSION = 1
+
+# Các thẻ được lấy làm block (ngoài <ul> và <li>)
+BLOCK_TAGS = ('p', 'h1', 'h2', 'h3')
+LIST_TAGS = ('ul', 'li')
+
+
+def _open_tag(tag: Tag) -> str:
+    """HTML của thẻ mở, vd. '<ul class="x">', serialize giống str(tag)."""
+    shell = str(Tag(name=tag.name, attrs=tag.attrs))
+    return shell[:len(shell) - len(tag.name) - 3]
+
+
+def render_ul_without_link_items(ul: Tag) -> str:
+    """
+    HTML của <ul> sau khi bỏ các <li> con trực tiếp có chứa <a>, không sửa DOM gốc.
+    
+    Returns:
+        HTML chưa sanitize, hoặc '' nếu không còn <li> nào hoặc không còn nội dung text
+    """
+    parts = []
+    has_li = False
+    has_text = False
+    for child in ul.contents:
+        if isinstance(child, Tag):
+            if child.name == 'li' and should_skip_li(child):
+                continue
+            if not has_li:
+                has_li = child.name == 'li' or child.find('li') is not None
+        if not has_text:
+            has_text = bool(child.get_text(strip=True))
+        parts.append(str(child))
+    
+    if not (has_li and has_text):
+        return ''
+    return _open_tag(ul) + ''.join(parts) + f'</{ul.name}>'
+
+
 def extract_content_blocks(soup: BeautifulSoup) -> List[Dict]:
     """
     Trích xuất các block nội dung từ div.content__body.
     
+    Duyệt cây DOM theo chiều sâu đúng một lần, mang theo trạng thái "đang nằm trong
+    <ul>/<li>" khi đi xuống, và không đi vào bên trong các phần tử đã lấy làm block.
+    Kết quả giống hệt extract_content_blocks_legacy.
+    
+    Args:
+        soup: BeautifulSoup object của trang HTML
+        
+    Returns:
+        List các block với format: {index, type, html}
+    """
+    content_body = soup.find('div', class_='content__body')
+    
+    if not content_body:
+        return []
+    
+    blocks = []
+    
+    def add_block(tag_type: str, html: str) -> None:
+        blocks.append({
+            'index': len(blocks) + 1,
+            'type': tag_type,
+            'html': sanitize_html(html)
+        })
+    
+    # content__body có thể nằm sẵn bên trong một list
+    root_in_list = any(parent.name in LIST_TAGS for parent in content_body.parents)
+    
+    # Stack (phần tử, có nằm trong <ul>/<li> không); đẩy con theo thứ tự ngược
+    # để lấy ra đúng thứ tự tài liệu
+    stack = [(child, root_in_list) for child in reversed(content_body.contents)
+             if isinstance(child, Tag)]
+    
+    while stack:
+        element, in_list = stack.pop()
+        tag_name = element.name
+        
+        # <ul>: bỏ các <li> có <a>, lấy cả khối nếu còn nội dung
+        if tag_name == 'ul':
+            html = render_ul_without_link_items(element)
+            if html:
+                add_block('ul', html)
+                continue
+        
+        # <li> độc lập (cha trực tiếp không phải <ul>) và không chứa <a>
+        elif tag_name == 'li':
+            parent = element.parent
+            if (not (parent and parent.name == 'ul')
+                    and not should_skip_li(element)
+                    and element.get_text(strip=True)):
+                add_block('li', str(element))
+                continue
+        
+        # p, h1, h2, h3 không nằm trong list
+        elif tag_name in BLOCK_TAGS:
+            if not in_list and element.get_text(strip=True):
+                add_block(tag_name, str(element))
+                continue
+        
+        # Phần tử không được lấy: tiếp tục đi xuống các con
+        child_in_list = in_list or tag_name in LIST_TAGS
+        stack.extend((child, child_in_list) for child in reversed(element.contents)
+                     if isinstance(child, Tag))
+    
+    return blocks
+
+
+def extract_content_blocks_legacy(soup: BeautifulSoup) -> List[Dict]:
+    """
+    Trích xuất các block nội dung từ div.content__body (cách cũ, O(phần tử × độ sâu)).
+    Giữ lại để đối chiếu kết quả và benchmark với extract_content_blocks.
+    
     Args:
         soup: BeautifulSoup object của trang HTML
         
@@ -153,13 +276,56 @@ def extract_content_blocks(soup: BeautifulSoup) -> List[Dict]:
     return blocks
 
 
-def crawl_card_content(card_url: str, card_id: int) -> Dict:
+def build_content_result(card_url: str, card_id: int, blocks: List[Dict]) -> Dict:
+    """
+    Dựng kết quả crawl của một lá bài từ các block đã trích xuất.
+    Status là 'warning' nếu không có block nào.
+    """
+    result = {
+        'url': card_url,
+        'status': 'success',
+        'cardId': card_id,
+        'total_blocks': len(blocks),
+        'blocks': blocks
+    }
+    
+    if len(blocks) == 0:
+        result['status'] = 'warning'
+        print(f"⚠️  Warning: Không tìm thấy nội dung cho card ID {card_id} ({card_url})")
+    else:
+        print(f"✅ Success: Crawl được {len(blocks)} blocks cho card ID {card_id}")
+    
+    return result
+
+
+def build_content_error(card_url: str, card_id: int, error: Exception) -> Dict:
+    """Dựng kết quả crawl lỗi của một lá bài và in thông báo lỗi."""
+    if isinstance(error, requests.exceptions.RequestException):
+        print(f"❌ Error: Không thể crawl card ID {card_id} ({card_url}): {error}")
+    else:
+        print(f"❌ Error: Lỗi không xác định khi crawl card ID {card_id}: {error}")
+    
+    return {
+        'url': card_url,
+        'status': 'error',
+        'cardId': card_id,
+        'total_blocks': 0,
+        'blocks': [],
+        'error': str(error)
+    }
+
+
+def crawl_card_content(card_url: str, card_id: int, delay: float = 1.0,
+                       hashes: Optional[ContentHashes] = None) -> Dict:
     """
     Crawl nội dung từ một URL cụ thể.
     
     Args:
         card_url: URL của trang tarot card
         card_id: ID của lá bài
+        delay: Số giây chờ trước khi gửi request (0 khi đã có engine async điều phối tốc độ)
+        hashes: Hash của lượt trước; trang có body và EXTRACTOR_VERSION không đổi
+                được dùng lại kết quả cũ, không parse lại
         
     Returns:
         Dict chứa thông tin crawl với format:
@@ -171,59 +337,130 @@ def crawl_card_content(card_url: str, card_id: int) -> Dict:
             'blocks': List[Dict]
         }
     """
-    result = {
-        'url': card_url,
-        'status': 'success',
-        'cardId': card_id,
-        'total_blocks': 0,
-        'blocks': []
-    }
-    
-    try:
-        # Thêm delay để tránh bị block
-        time.sleep(1)
-        
-        # Fetch HTML
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(card_url, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        # Parse HTML
-        soup = BeautifulSoup(response.content, 'lxml')
-        
-        # Extract blocks
-        blocks = extract_content_blocks(soup)
-        
-        result['total_blocks'] = len(blocks)
-        result['blocks'] = blocks
-        
-        if len(blocks) == 0:
-            result['status'] = 'warning'
-            print(f"⚠️  Warning: Không tìm thấy nội dung cho card ID {card_id} ({card_url})")
-        else:
-            print(f"✅ Success: Crawl được {len(blocks)} blocks cho card ID {card_id}")
+    with crawl_metrics.page(card_url) as record:
+        try:
+            # Thêm delay để tránh bị block
+            if delay > 0:
+                time.sleep(delay)
+            
+            # Fetch HTML qua client dùng chung (keep-alive, gzip/br)
+            with crawl_metrics.fetch_stage() as fetched:
+                fetched['response'] = response = http_client.fetch(card_url)
+            
+            result = reuse_unchanged(hashes, card_url, card_id, response.content)
+            if result is None:
+                result = parse_card_content(response.content, card_url, card_id)
             
-    except requests.exceptions.RequestException as e:
-        result['status'] = 'error'
-        result['error'] = str(e)
-        print(f"❌ Error: Không thể crawl card ID {card_id} ({card_url}): {e}")
+        except Exception as e:
+            result = build_content_error(card_url, card_id, e)
         
-    except Exception as e:
-        result['status'] = 'error'
-        result['error'] = str(e)
-        print(f"❌ Error: Lỗi không xác định khi crawl card ID {card_id}: {e}")
+        record['status'] = result['status']
+        return result
+
+
+def reuse_unchanged(hashes: Optional[ContentHashes], card_url: str, card_id: int,
+                    body: bytes) -> Optional[Dict]:
+    """
+    Kết quả của lượt trước nếu body không đổi, ngược lại ghi hash mới và trả về None
+    (trang cần được parse lại).
+    """
+    if hashes is None:
+        return None
+    digest = body_digest(body)
+    result = hashes.reuse(card_id, digest)
+    if result is not None:
+        crawl_metrics.count('reused')
+        print(f"⏩ Không đổi: card ID {card_id}, dùng lại {result['total_blocks']} blocks")
+        return result
+    hashes.record(card_id, card_url, digest)
+    return None
+
+
+def parse_card_content(body: bytes, card_url: str, card_id: int) -> Dict:
+    """
+    Parse HTML đã tải của một lá bài và dựng kết quả.
+    Là hàm cấp module để chạy được trong process pool (parse_pool.py).
+    """
+    # Parse HTML
+    with crawl_metrics.stage('parse'):
+        soup = BeautifulSoup(body, 'lxml')
     
-    return result
+    # Extract blocks
+    with crawl_metrics.stage('extract'):
+        blocks = extract_content_blocks(soup)
+    crawl_metrics.count('blocks', len(blocks))
+    
+    return build_content_result(card_url, card_id, blocks)
+
+
+def parse_args():
+    """Đọc tham số dòng lệnh."""
+    parser = argparse.ArgumentParser(description='Crawl nội dung 78 lá bài tarot')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='Crawl song song bằng asyncio thay vì tuần tự có sleep')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='Số request chạy cùng lúc ở chế độ async (mặc định: 8)')
+    parser.add_argument('--rps', type=float, default=4.0,
+                        help='Số request/giây tối đa cho mỗi host ở chế độ async (mặc định: 4)')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Tự điều chỉnh tốc độ theo response của server thay cho delay cố định: '
+                             'bắt đầu từ --rps, tăng dần tới --max-rps, giảm khi gặp 429/5xx hoặc response chậm')
+    parser.add_argument('--max-rps', type=float, default=8.0,
+                        help='Số request/giây tối đa cho mỗi host khi dùng --adaptive (mặc định: 8)')
+    parser.add_argument('--retries', type=int, default=http_client.DEFAULT_RETRIES,
+                        help='Số lần thử lại mỗi trang khi lỗi kết nối hoặc 408/429/5xx, '
+                             f'backoff lũy thừa có jitter (mặc định: {http_client.DEFAULT_RETRIES})')
+    parser.add_argument('--cache-dir', type=Path, default=None,
+                        help='Thư mục cache HTTP (mặc định: .http_cache cạnh script)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Tải lại toàn bộ trang, không dùng cache HTTP')
+    parser.add_argument('--resume', action='store_true',
+                        help='Chạy tiếp từ tarot_cards_content.jsonl, bỏ qua các lá bài đã crawl')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Parse trên process pool với số process này, tách khỏi tầng tải '
+                             '(mặc định: 0 = parse ngay trên thread tải)')
+    parser.add_argument('--queue-size', type=int, default=16,
+                        help='Số trang đã tải tối đa chờ parse ở chế độ --workers (mặc định: 16)')
+    parser.add_argument('--from-cache', action='store_true',
+                        help='Trích xuất lại từ các trang đã lưu trong cache HTTP, không gửi request')
+    parser.add_argument('--full', action='store_true',
+                        help='Trích xuất lại tất cả các trang, kể cả trang không đổi so với lần trước')
+    parser.add_argument('--metrics', type=Path, default=None,
+                        help='Tiền tố file metrics, ghi ra <tiền tố>.json và <tiền tố>.prom '
+                             '(mặc định: tarot_cards_content.metrics cạnh script)')
+    parser.add_argument('--db', type=Path, default=None,
+                        help='Ghi thêm kết quả vào SQLite (vd. tarot_cards_content.db), '
+                             'có index theo cardId, url và loại block')
+    parser.add_argument('--db-batch', type=int, default=50,
+                        help='Số lá bài ghi trong một transaction SQLite (mặc định: 50)')
+    return parser.parse_args()
 
 
 def main():
     """Hàm main để crawl tất cả các lá bài."""
+    args = parse_args()
+
     # Đường dẫn đến file tarot_card.json
     script_dir = Path(__file__).parent
     input_file = script_dir / 'tarot_card.json'
     output_file = script_dir / 'tarot_cards_content.json'
+    jsonl_file = script_dir / 'tarot_cards_content.jsonl'
+    hashes_file = script_dir / 'tarot_cards_content.hashes.json'
+    
+    # Cache HTTP trên đĩa: trang không đổi sẽ được server trả về 304
+    cache = None
+    if args.from_cache:
+        cache = open_archive(args.cache_dir or script_dir / '.http_cache')
+    elif not args.no_cache:
+        cache = HttpCache(args.cache_dir or script_dir / '.http_cache')
+        http_client.set_cache(cache)
+    
+    # Điều tốc thích ứng thay cho delay cố định; thử lại khi lỗi tạm thời trong mọi chế độ
+    throttle = None
+    if args.adaptive and not args.from_cache:
+        throttle = AdaptiveThrottle(start_rps=args.rps, max_rps=args.max_rps)
+        http_client.set_throttle(throttle)
+    http_client.configure(retries=args.retries)
     
     # Đọc danh sách các lá bài
     print(f"📖 Đang đọc file {input_file}...")
@@ -232,38 +469,125 @@ def main():
     
     print(f"📋 Tìm thấy {len(cards)} lá bài cần crawl\n")
     
-    # Crawl từng lá bài
-    results = []
+    # Mỗi lá bài được ghi ngay thành một dòng JSONL khi crawl xong
     total_cards = len(cards)
+    done_ids = load_completed_keys(jsonl_file, key='cardId') if args.resume else set()
+    pending = [card for card in cards if card['id'] not in done_ids]
+    if done_ids:
+        print(f"⏩ Resume: bỏ qua {total_cards - len(pending)} lá bài đã có trong {jsonl_file}\n")
     
-    for idx, card in enumerate(cards, 1):
-        card_id = card['id']
-        card_name = card['card_name']
-        card_url = card['card_url']
-        
-        print(f"[{idx}/{total_cards}] Đang crawl: {card_name} (ID: {card_id})...")
-        
-        result = crawl_card_content(card_url, card_id)
-        results.append(result)
-        
-        # Thêm delay nhỏ giữa các request
-        if idx < total_cards:
-            time.sleep(0.5)
+    # Trang có body không đổi so với lượt trước được dùng lại blocks cũ;
+    # --full vẫn ghi hash mới nhưng không dùng lại record nào
+    previous = {} if args.full else load_previous_records(output_file)
+    hashes = ContentHashes(hashes_file, EXTRACTOR_VERSION, previous)
+    
+    def read_archived(card_url: str) -> bytes:
+        with crawl_metrics.stage('read_cache'):
+            entry = cache.read(card_url)
+        if entry is None:
+            raise FileNotFoundError(f"Không có trong cache: {card_url}")
+        crawl_metrics.count('bytes', len(entry[0]))
+        return entry[0]
+    
+    def fetch_content(card_url: str) -> bytes:
+        with crawl_metrics.fetch_stage() as fetched:
+            fetched['response'] = response = http_client.fetch(card_url)
+        return response.content
+    
+    def save(result: Dict) -> None:
+        with crawl_metrics.stage('write'):
+            writer.write(result)
+            if store:
+                store.write(result)
+    
+    # SQLite (tùy chọn) được ghi song song với JSONL, commit theo lô
+    store = SqliteStore(args.db, batch_size=args.db_batch) if args.db else None
+    
+    with JsonlWriter(jsonl_file, append=args.resume) as writer:
+        if args.workers > 0 or args.from_cache:
+            # Tải trên thread, parse trên process pool; đọc cache thì không cần giới hạn tốc độ
+            print(f"⚙️  Parse song song: {args.workers or 'tất cả'} process, "
+                  f"tối đa {args.queue_size} trang chờ parse\n")
+            jobs = [(card['card_url'], (card['card_url'], card['id'])) for card in pending]
+            if args.from_cache:
+                fetch, rps = read_archived, 0
+            else:
+                fetch, rps = fetch_content, 0 if throttle else args.rps
+            parse_concurrently(jobs, fetch, parse_card_content, build_content_error,
+                               on_result=lambda _, result: save(result),
+                               workers=args.workers or None, queue_size=args.queue_size,
+                               concurrency=args.concurrency, rps=rps,
+                               reuse=lambda i, body: reuse_unchanged(hashes, *jobs[i][1], body))
+        elif args.use_async:
+            if throttle:
+                print(f"⚡ Chế độ async: {args.concurrency} request song song, tốc độ thích ứng "
+                      f"{args.rps}-{args.max_rps} request/giây\n")
+            else:
+                print(f"⚡ Chế độ async: {args.concurrency} request song song, tối đa {args.rps} request/giây\n")
+            jobs = [
+                (card['card_url'], crawl_card_content, (card['card_url'], card['id'], 0, hashes))
+                for card in pending
+            ]
+            crawl_concurrently(jobs, concurrency=args.concurrency, rps=0 if throttle else args.rps,
+                               on_result=lambda _, result: save(result))
+        else:
+            for idx, card in enumerate(pending, 1):
+                card_id = card['id']
+                card_name = card['card_name']
+                card_url = card['card_url']
+                
+                print(f"[{idx}/{len(pending)}] Đang crawl: {card_name} (ID: {card_id})...")
+                
+                result = crawl_card_content(card_url, card_id, delay=0 if throttle else 1.0, hashes=hashes)
+                save(result)
+                
+                # Thêm delay nhỏ giữa các request (throttle tự giãn cách khi dùng --adaptive)
+                if idx < len(pending) and not throttle:
+                    time.sleep(0.5)
+    
+    if store:
+        store.close()
+        print(f"\n🗄️  Đã ghi {store.count} lá bài vào SQLite {args.db}")
     
-    # Lưu kết quả
+    # Gộp JSONL thành file JSON dạng mảng, theo thứ tự trong tarot_card.json
     print(f"\n💾 Đang lưu kết quả vào {output_file}...")
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+    status_counts = {'success': 0, 'warning': 0, 'error': 0}
+    
+    def count_status(record):
+        if record['status'] == 'success' and record['total_blocks'] > 0:
+            status_counts['success'] += 1
+        elif record['status'] in ('warning', 'error'):
+            status_counts[record['status']] += 1
+    
+    with crawl_metrics.stage('finalize'):
+        finalize_jsonl(jsonl_file, output_file, key='cardId',
+                       order=[card['id'] for card in cards], on_record=count_status)
     
     # Thống kê
-    success_count = sum(1 for r in results if r['status'] == 'success' and r['total_blocks'] > 0)
-    warning_count = sum(1 for r in results if r['status'] == 'warning')
-    error_count = sum(1 for r in results if r['status'] == 'error')
+    success_count = status_counts['success']
+    warning_count = status_counts['warning']
+    error_count = status_counts['error']
     
     print(f"\n📊 Thống kê:")
     print(f"   ✅ Thành công: {success_count}/{total_cards}")
     print(f"   ⚠️  Cảnh báo (không có nội dung): {warning_count}/{total_cards}")
     print(f"   ❌ Lỗi: {error_count}/{total_cards}")
+    if cache:
+        print(f"   💾 Cache: {cache.summary()}")
+    if throttle:
+        print(f"   🚦 Điều tốc: {throttle.summary()}")
+    hashes.save()
+    print(f"   ⏩ Không đổi (dùng lại kết quả cũ): {len(hashes.unchanged)}")
+    print(f"   🔄 Trích xuất lại: {len(hashes.changed)}")
+    for card_id in hashes.changed:
+        print(f"      - {card_id}: {hashes.entries[str(card_id)]['url']}")
+    
+    # Metrics theo giai đoạn: JSON (kèm từng trang) và định dạng text của Prometheus
+    reports = crawl_metrics.write_reports(args.metrics or script_dir / 'tarot_cards_content.metrics')
+    print(f"\n⏱️  Thời gian theo giai đoạn:")
+    for line in crawl_metrics.format_summary().splitlines():
+        print(f"   {line}")
+    print(f"   📈 Metrics: {reports['json']}, {reports['prometheus']}")
     print(f"\n✨ Hoàn thành! Kết quả đã được lưu vào {output_file}")
 
 
@@ -4,14 +4,25 @@ Script để crawl dữ liệu tarot từ các URL trong video_links.json
 Lấy các nội dung được đánh dấu bằng "phuc" ở đầu dòng
 """
 
+import argparse
 import json
+import mmap
 import re
-import requests
-from bs4 import BeautifulSoup
-from typing import List, Dict
+from functools import partial
+from itertools import islice
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+from typing import List, Dict, Iterator, Union
 import time
 import os
 
+import crawl_metrics
+import http_client
+from async_crawl import crawl_concurrently
+from http_cache import HttpCache, open_archive
+from jsonl_output import JsonlWriter, finalize_jsonl, load_completed_keys
+from parse_pool import parse_concurrently
+from throttle import AdaptiveThrottle
+
 def load_video_links(json_path: str) -> List[Dict]:
     """Đọc danh sách URLs từ file JSON"""
     with open(json_path, 'r', encoding='utf-8') as f:
@@ -46,12 +57,198 @@ def extract_phuc_content(html_content: str) -> List[Dict]:
     
     return phuc_contents
 
+# Một lượt quét cho cả tài liệu: "^" ở chế độ MULTILINE chỉ khớp sau '\n',
+# giống với việc split('\n') rồi re.match từng dòng; [^\S\n] là khoảng trắng trừ '\n'
+PHUC_LINE_RE = re.compile(r'^[^\S\n]*phuc[^\S\n]*(.*)', re.IGNORECASE | re.MULTILINE)
+
+# Bản bytes (cho file mmap): khoảng trắng đầu dòng gồm các ký tự ASCII và dạng UTF-8
+# của các ký tự Unicode mà str.isspace() coi là khoảng trắng, để khớp giống bản str
+_UNICODE_SPACES_UTF8 = b'|'.join(re.escape(chr(c).encode('utf-8')) for c in (
+    0x85, 0xA0, 0x1680, *range(0x2000, 0x200B), 0x2028, 0x2029, 0x202F, 0x205F, 0x3000))
+PHUC_LINE_BYTES_RE = re.compile(
+    rb'^(?:[\t\x0b\x0c\r\x1c-\x1f ]|' + _UNICODE_SPACES_UTF8 + rb')*phuc[^\S\n]*(.*)',
+    re.IGNORECASE | re.MULTILINE
+)
+
+# Số đoạn "phuc" được lấy text chung một lần parse
+PHUC_TEXT_BATCH = 256
+
+# Thẻ đánh dấu chỗ kết thúc mỗi đoạn khi nối các đoạn lại để parse một lần
+_FRAGMENT_END_TAG = 'phuc-fragment-end'
+_FRAGMENT_END = f'<{_FRAGMENT_END_TAG}></{_FRAGMENT_END_TAG}>'
+
+# Đoạn có script/style/template chưa đóng sẽ đổi loại text (bị get_text bỏ qua) của các đoạn
+# phía sau, nên các đoạn này luôn được parse riêng
+_SEPARATE_PARSE_RE = re.compile(r'<(?:script|style|template)|' + _FRAGMENT_END_TAG, re.IGNORECASE)
+
+# '<' chưa có '>' hoặc entity bị cắt ở cuối đoạn
+_UNFINISHED_END_RE = re.compile(r'<[^>]*\Z|&#?\w*\Z')
+
+def _fragment_text(fragment: str) -> str:
+    """Text đã clean của một đoạn HTML, chỉ parse khi đoạn đó có thẻ hoặc entity"""
+    if '<' not in fragment and '&' not in fragment:
+        # Không có thẻ/entity: get_text(strip=True) chính là chuỗi đã strip
+        return fragment
+    return BeautifulSoup(fragment, 'html.parser').get_text(strip=True)
+
+def _can_share_parse(fragment: str) -> bool:
+    """
+    Đoạn có thể parse chung với các đoạn khác: không kết thúc bằng thẻ hay entity dở dang
+    (sẽ khác đi khi có đoạn khác nối phía sau) và không có script/style/template
+    """
+    return not _UNFINISHED_END_RE.search(fragment) and not _SEPARATE_PARSE_RE.search(fragment)
+
+def _fragment_texts(fragments: List[str]) -> List[str]:
+    """
+    Text đã clean của nhiều đoạn HTML, cùng kết quả với _fragment_text từng đoạn.
+    Các đoạn có thẻ/entity được nối lại, ngăn cách bằng thẻ đánh dấu, parse một lần bằng
+    html.parser rồi chia text theo thẻ đánh dấu. Nếu có thẻ đánh dấu bị nuốt (thẻ, comment
+    hay thuộc tính chưa đóng) thì cả lô được parse lại từng đoạn.
+    """
+    texts = [fragment if '<' not in fragment and '&' not in fragment else None
+             for fragment in fragments]
+    shared = [i for i, text in enumerate(texts) if text is None and _can_share_parse(fragments[i])]
+    if shared:
+        soup = BeautifulSoup(''.join(fragments[i] + _FRAGMENT_END for i in shared), 'html.parser')
+        # Cùng loại string mà soup.get_text() lấy (NavigableString, CData)
+        string_types = soup.interesting_string_types or Tag.MAIN_CONTENT_STRING_TYPES
+        joined, parts = [], []
+        for node in soup.descendants:
+            if isinstance(node, Tag):
+                if node.name == _FRAGMENT_END_TAG:
+                    joined.append(''.join(parts))
+                    parts = []
+            elif type(node) in string_types:
+                text = node.strip()
+                if text:
+                    parts.append(text)
+        if len(joined) == len(shared):
+            for i, text in zip(shared, joined):
+                texts[i] = text
+    return [text if text is not None else _fragment_text(fragment)
+            for text, fragment in zip(texts, fragments)]
+
+def _iter_phuc_matches(data: Union[str, bytes, mmap.mmap]) -> Iterator[tuple]:
+    """Các cặp (đoạn HTML sau "phuc" đã strip, số dòng), quét tài liệu một lượt"""
+    is_text = isinstance(data, str)
+    pattern = PHUC_LINE_RE if is_text else PHUC_LINE_BYTES_RE
+    newline = '\n' if is_text else b'\n'
+
+    line_number = 1
+    last_pos = 0
+    for match in pattern.finditer(data):
+        # Đếm số dòng tăng dần từ match trước, tổng cộng chỉ quét tài liệu một lần
+        # (mmap không có count() nên đếm trên lát cắt giữa hai match)
+        if isinstance(data, mmap.mmap):
+            line_number += data[last_pos:match.start()].count(newline)
+        else:
+            line_number += data.count(newline, last_pos, match.start())
+        last_pos = match.start()
+
+        content = match.group(1)
+        if not is_text:
+            content = content.decode('utf-8', errors='replace')
+        content = content.strip()
+        if content:
+            yield content, line_number
+
+def iter_phuc_content(data: Union[str, bytes, mmap.mmap], batch_size: int = PHUC_TEXT_BATCH) -> Iterator[Dict]:
+    """
+    Quét một lượt bằng regex đã compile, trả về lần lượt (lazy) các record
+    {html, text, line_number} giống extract_phuc_content, không tách tài liệu thành list dòng.
+    Text được tính theo lô batch_size đoạn (một lần parse HTML cho cả lô, xem _fragment_texts),
+    nên bộ nhớ chỉ phụ thuộc kích thước lô chứ không phụ thuộc kích thước tài liệu.
+
+    Args:
+        data: Nội dung HTML dạng str, hoặc bytes/mmap mã hóa UTF-8
+        batch_size: Số đoạn tối đa trong một lô
+    """
+    matches = _iter_phuc_matches(data)
+    while True:
+        batch = list(islice(matches, batch_size))
+        if not batch:
+            return
+        texts = _fragment_texts([content for content, _ in batch])
+        for (content, line_number), text in zip(batch, texts):
+            yield {
+                'html': content,
+                'text': text,
+                'line_number': line_number
+            }
+
+def extract_phuc_content_fast(html_content: Union[str, bytes]) -> List[Dict]:
+    """
+    extract_phuc_content cho tài liệu lớn, cùng kết quả: một lượt quét regex và một lần
+    parse HTML cho mỗi lô đoạn thay vì mỗi đoạn một lần
+    """
+    return list(iter_phuc_content(html_content))
+
+def iter_phuc_content_file(file_path: str) -> Iterator[Dict]:
+    """
+    Quét file HTML (UTF-8) qua mmap, không đọc cả file vào bộ nhớ
+    """
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield from iter_phuc_content(mapped)
+
+def extract_phuc_content_from_file(file_path: str) -> List[Dict]:
+    """Lấy toàn bộ nội dung "phuc" của một file HTML đã lưu"""
+    return list(iter_phuc_content_file(file_path))
+
+class StructuredContentStrainer(SoupStrainer):
+    """
+    Chỉ dựng cây cho các vùng extract_structured_content cần: h1, meta og:description,
+    img.attachment-post-thumbnail và div.content__body (kèm toàn bộ phần tử con)
+    """
+
+    @staticmethod
+    def _wanted(name, attrs) -> bool:
+        attrs = attrs or {}
+        if name == 'h1':
+            return True
+        if name == 'meta':
+            return attrs.get('property') == 'og:description'
+        if name in ('img', 'div'):
+            classes = attrs.get('class') or ''
+            if isinstance(classes, str):
+                classes = classes.split()
+            return ('attachment-post-thumbnail' if name == 'img' else 'content__body') in classes
+        return False
+
+    # bs4 >= 4.13
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        return self._wanted(name, attrs)
+
+    def allow_string_creation(self, string) -> bool:
+        return False
+
+    # bs4 < 4.13
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        return self._wanted(markup_name, markup_attrs)
+
 def extract_structured_content(html_content: str) -> Dict:
     """
     Trích xuất nội dung có cấu trúc từ HTML
     Lấy title, các đoạn văn, và các phần đặc biệt
     """
     soup = BeautifulSoup(html_content, 'html.parser')
+    return extract_structured_from_soup(soup)
+
+def extract_structured_content_fast(html_content: Union[str, bytes]) -> Dict:
+    """
+    Giống extract_structured_content nhưng dùng parser lxml (C) và chỉ dựng cây
+    cho các vùng cần thiết, nhanh và ít bộ nhớ hơn parse toàn trang bằng html.parser
+    """
+    soup = BeautifulSoup(html_content, 'lxml', parse_only=StructuredContentStrainer())
+    return extract_structured_from_soup(soup)
+
+def extract_structured_from_soup(soup: BeautifulSoup) -> Dict:
+    """
+    Lấy title, description, ảnh và phân loại các đoạn văn trong content__body
+    từ một soup đã parse sẵn
+    """
     result = {
         'title': '',
         'title_html': '',
@@ -111,85 +308,235 @@ def extract_structured_content(html_content: str) -> Dict:
     
     return result
 
-def crawl_card_data(card_url: str, card_name: str) -> Dict:
+def build_card_data(card_url: str, card_name: str, structured: Dict,
+                    phuc_contents: List[Dict]) -> Dict:
+    """Dựng kết quả crawl thành công của một lá bài"""
+    return {
+        'card_name': card_name,
+        'card_url': card_url,
+        'status': 'success',
+        'structured_content': structured,
+        'phuc_marked_content': phuc_contents,
+        'total_phuc_items': len(phuc_contents)
+    }
+
+def build_card_data_error(card_url: str, card_name: str, error: Exception) -> Dict:
+    """Dựng kết quả crawl lỗi của một lá bài và in thông báo lỗi"""
+    print(f"  ❌ Lỗi khi crawl {card_name}: {str(error)}")
+    return {
+        'card_name': card_name,
+        'card_url': card_url,
+        'status': 'error',
+        'error': str(error)
+    }
+
+def crawl_card_data(card_url: str, card_name: str, fast_structured: bool = False) -> Dict:
     """
     Crawl dữ liệu từ một URL cụ thể
     """
     print(f"Đang crawl: {card_name} - {card_url}")
     
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(card_url, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        html_content = response.text
-        
-        # Trích xuất nội dung có cấu trúc
-        structured = extract_structured_content(html_content)
-        
-        # Trích xuất các dòng có "phuc"
-        phuc_contents = extract_phuc_content(html_content)
-        
-        return {
-            'card_name': card_name,
-            'card_url': card_url,
-            'status': 'success',
-            'structured_content': structured,
-            'phuc_marked_content': phuc_contents,
-            'total_phuc_items': len(phuc_contents)
-        }
+    with crawl_metrics.page(card_url) as record:
+        try:
+            with crawl_metrics.fetch_stage() as fetched:
+                fetched['response'] = response = http_client.fetch(card_url)
+            
+            card_data = parse_card_data(response.text, card_url, card_name, fast_structured)
+            
+        except Exception as e:
+            card_data = build_card_data_error(card_url, card_name, e)
         
-    except Exception as e:
-        print(f"  ❌ Lỗi khi crawl {card_name}: {str(e)}")
-        return {
-            'card_name': card_name,
-            'card_url': card_url,
-            'status': 'error',
-            'error': str(e)
-        }
+        record['status'] = card_data['status']
+        return card_data
+
+def parse_card_data(html_content: str, card_url: str, card_name: str,
+                    fast_structured: bool = False) -> Dict:
+    """
+    Trích xuất dữ liệu từ HTML đã tải của một lá bài
+    (hàm cấp module để chạy được trong process pool của parse_pool.py)
+
+    Args:
+        fast_structured: Lấy structured_content bằng extract_structured_content_fast (lxml)
+            thay vì html.parser; nhanh hơn nhưng khác kết quả khi HTML lỗi (xem README_CRAWL.md)
+    """
+    # Trích xuất nội dung có cấu trúc
+    with crawl_metrics.stage('structured'):
+        if fast_structured:
+            structured = extract_structured_content_fast(html_content)
+        else:
+            structured = extract_structured_content(html_content)
+    
+    # Trích xuất các dòng có "phuc" (một lượt quét regex, cùng kết quả với extract_phuc_content)
+    with crawl_metrics.stage('phuc'):
+        phuc_contents = extract_phuc_content_fast(html_content)
+    crawl_metrics.count('paragraphs', len(structured['paragraphs']))
+    crawl_metrics.count('phuc_lines', len(phuc_contents))
+    
+    return build_card_data(card_url, card_name, structured, phuc_contents)
+
+def parse_args():
+    """Đọc tham số dòng lệnh"""
+    parser = argparse.ArgumentParser(description='Crawl dữ liệu tarot từ video_links.json')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='Crawl song song bằng asyncio thay vì tuần tự có sleep')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='Số request chạy cùng lúc ở chế độ async (mặc định: 8)')
+    parser.add_argument('--rps', type=float, default=4.0,
+                        help='Số request/giây tối đa cho mỗi host ở chế độ async (mặc định: 4)')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Tự điều chỉnh tốc độ theo response của server thay cho delay cố định: '
+                             'bắt đầu từ --rps, tăng dần tới --max-rps, giảm khi gặp 429/5xx hoặc response chậm')
+    parser.add_argument('--max-rps', type=float, default=8.0,
+                        help='Số request/giây tối đa cho mỗi host khi dùng --adaptive (mặc định: 8)')
+    parser.add_argument('--retries', type=int, default=http_client.DEFAULT_RETRIES,
+                        help='Số lần thử lại mỗi trang khi lỗi kết nối hoặc 408/429/5xx, '
+                             f'backoff lũy thừa có jitter (mặc định: {http_client.DEFAULT_RETRIES})')
+    parser.add_argument('--cache-dir', default=None,
+                        help='Thư mục cache HTTP (mặc định: .http_cache cạnh script)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Tải lại toàn bộ trang, không dùng cache HTTP')
+    parser.add_argument('--resume', action='store_true',
+                        help='Chạy tiếp từ tarot_cards_data.jsonl, bỏ qua các lá bài đã crawl')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Parse trên process pool với số process này, tách khỏi tầng tải '
+                             '(mặc định: 0 = parse ngay trên thread tải)')
+    parser.add_argument('--queue-size', type=int, default=16,
+                        help='Số trang đã tải tối đa chờ parse ở chế độ --workers (mặc định: 16)')
+    parser.add_argument('--from-cache', action='store_true',
+                        help='Trích xuất lại từ các trang đã lưu trong cache HTTP, không gửi request')
+    parser.add_argument('--metrics', default=None,
+                        help='Tiền tố file metrics, ghi ra <tiền tố>.json và <tiền tố>.prom '
+                             '(mặc định: tarot_cards_data.metrics cạnh script)')
+    parser.add_argument('--fast-structured', action='store_true',
+                        help='Lấy structured_content bằng lxml, chỉ dựng cây cho các vùng cần thiết '
+                             '(nhanh hơn, ít bộ nhớ hơn; khác html.parser với HTML lỗi như <p> lồng nhau)')
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+
     # Đường dẫn file
     script_dir = os.path.dirname(os.path.abspath(__file__))
     video_links_path = os.path.join(script_dir, 'video_links.json')
     output_path = os.path.join(script_dir, 'tarot_cards_data.json')
+    jsonl_path = os.path.join(script_dir, 'tarot_cards_data.jsonl')
+    
+    # Cache HTTP trên đĩa: trang không đổi sẽ được server trả về 304
+    cache = None
+    if args.from_cache:
+        cache = open_archive(args.cache_dir or os.path.join(script_dir, '.http_cache'))
+    elif not args.no_cache:
+        cache = HttpCache(args.cache_dir or os.path.join(script_dir, '.http_cache'))
+        http_client.set_cache(cache)
+    
+    # Điều tốc thích ứng thay cho delay cố định; thử lại khi lỗi tạm thời trong mọi chế độ
+    throttle = None
+    if args.adaptive and not args.from_cache:
+        throttle = AdaptiveThrottle(start_rps=args.rps, max_rps=args.max_rps)
+        http_client.set_throttle(throttle)
+    http_client.configure(retries=args.retries)
     
     # Đọc danh sách URLs
     print("Đang đọc danh sách URLs...")
     cards = load_video_links(video_links_path)
     print(f"Tìm thấy {len(cards)} lá bài\n")
     
-    # Crawl dữ liệu từng lá bài
-    all_data = []
+    # Crawl dữ liệu từng lá bài, ghi ngay từng lá vào file JSONL
     total = len(cards)
+    done_urls = load_completed_keys(jsonl_path, key='card_url') if args.resume else set()
+    pending = [card for card in cards if card['card_url'] not in done_urls]
+    if done_urls:
+        print(f"Resume: bỏ qua {total - len(pending)} lá bài đã có trong {jsonl_path}\n")
     
-    for idx, card in enumerate(cards, 1):
-        print(f"[{idx}/{total}] ", end='')
-        card_data = crawl_card_data(card['card_url'], card['card_name'])
-        all_data.append(card_data)
-        
+    def save_card(card, card_data):
         # Thêm video URLs vào kết quả
         card_data['video_mp4'] = card.get('video_mp4')
         card_data['video_webm'] = card.get('video_webm')
-        
-        # Delay nhỏ để tránh spam server
-        if idx < total:
-            time.sleep(1)
+        with crawl_metrics.stage('write'):
+            writer.write(card_data)
+    
+    def read_archived(card_url):
+        with crawl_metrics.stage('read_cache'):
+            entry = cache.read(card_url)
+        if entry is None:
+            raise FileNotFoundError(f"Không có trong cache: {card_url}")
+        body, meta = entry
+        crawl_metrics.count('bytes', len(body))
+        return body.decode(meta.get('encoding') or 'utf-8', errors='replace')
+    
+    def fetch_text(card_url):
+        with crawl_metrics.fetch_stage() as fetched:
+            fetched['response'] = response = http_client.fetch(card_url)
+        return response.text
+    
+    with JsonlWriter(jsonl_path, append=args.resume) as writer:
+        if args.workers > 0 or args.from_cache:
+            # Tải trên thread, parse trên process pool; đọc cache thì không cần giới hạn tốc độ
+            print(f"Parse song song: {args.workers or 'tất cả'} process, "
+                  f"tối đa {args.queue_size} trang chờ parse\n")
+            jobs = [(card['card_url'], (card['card_url'], card['card_name'])) for card in pending]
+            if args.from_cache:
+                fetch, rps = read_archived, 0
+            else:
+                fetch, rps = fetch_text, 0 if throttle else args.rps
+            parse = partial(parse_card_data, fast_structured=args.fast_structured)
+            parse_concurrently(jobs, fetch, parse, build_card_data_error,
+                               on_result=lambda i, card_data: save_card(pending[i], card_data),
+                               workers=args.workers or None, queue_size=args.queue_size,
+                               concurrency=args.concurrency, rps=rps)
+        elif args.use_async:
+            if throttle:
+                print(f"Chế độ async: {args.concurrency} request song song, tốc độ thích ứng "
+                      f"{args.rps}-{args.max_rps} request/giây\n")
+            else:
+                print(f"Chế độ async: {args.concurrency} request song song, tối đa {args.rps} request/giây\n")
+            jobs = [
+                (card['card_url'], crawl_card_data,
+                 (card['card_url'], card['card_name'], args.fast_structured))
+                for card in pending
+            ]
+            crawl_concurrently(jobs, concurrency=args.concurrency, rps=0 if throttle else args.rps,
+                               on_result=lambda i, card_data: save_card(pending[i], card_data))
+        else:
+            for idx, card in enumerate(pending, 1):
+                print(f"[{idx}/{len(pending)}] ", end='')
+                card_data = crawl_card_data(card['card_url'], card['card_name'], args.fast_structured)
+                save_card(card, card_data)
+                
+                # Delay nhỏ để tránh spam server (throttle tự giãn cách khi dùng --adaptive)
+                if idx < len(pending) and not throttle:
+                    time.sleep(1)
     
-    # Lưu kết quả
+    # Gộp JSONL thành file JSON dạng mảng, theo thứ tự trong video_links.json
     print(f"\nĐang lưu kết quả vào {output_path}...")
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(all_data, f, ensure_ascii=False, indent=2)
+    status_counts = {'success': 0}
+    
+    def count_status(card_data):
+        if card_data['status'] == 'success':
+            status_counts['success'] += 1
+    
+    with crawl_metrics.stage('finalize'):
+        finalize_jsonl(jsonl_path, output_path, key='card_url',
+                       order=[card['card_url'] for card in cards], on_record=count_status)
     
     # Thống kê
-    success_count = sum(1 for card in all_data if card['status'] == 'success')
+    success_count = status_counts['success']
     error_count = total - success_count
     
     print(f"\n✅ Hoàn thành!")
     print(f"   - Thành công: {success_count}/{total}")
     print(f"   - Lỗi: {error_count}/{total}")
+    if cache:
+        print(f"   - Cache: {cache.summary()}")
+    if throttle:
+        print(f"   - Điều tốc: {throttle.summary()}")
+    
+    # Metrics theo giai đoạn: JSON (kèm từng trang) và định dạng text của Prometheus
+    reports = crawl_metrics.write_reports(args.metrics or os.path.join(script_dir, 'tarot_cards_data.metrics'))
+    print(f"   - Thời gian theo giai đoạn:")
+    for line in crawl_metrics.format_summary().splitlines():
+        print(f"     {line}")
+    print(f"   - Metrics: {reports['json']}, {reports['prometheus']}")
     print(f"   - File output: {output_path}")
 
 if __name__ == '__main__':
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Tự tìm URL các lá bài trên tarotoo.com thay cho bước lưu tay card.html:
+bắt đầu từ trang danh sách lá bài và sitemap, đi theo các link nằm trong phạm vi
+(song song, giới hạn tốc độ theo host) và ghi ra danh sách lá bài cho các script crawl
+(tarot_card.json, video_links.json).
+
+Frontier (hàng đợi URL đã chuẩn hóa, tập đã tải, URL lỗi và các lá bài tìm thấy)
+được lưu vào discovery_state.json sau mỗi đợt, nên có thể dừng rồi chạy tiếp bằng --resume.
+
+Chạy:
+    python discover_cards.py
+    python discover_cards.py --resume --max-pages 500 --follow-cards
+"""
+
+import argparse
+import json
+import os
+import re
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+import requests
+from lxml import etree, html as lxml_html
+
+import http_client
+from async_crawl import crawl_concurrently
+from extract_video_links import parse_card_item
+from http_cache import HttpCache
+
+DEFAULT_SEEDS = (
+    'https://tarotoo.com/tarot-card-meanings',
+    'https://tarotoo.com/sitemap_index.xml',
+)
+DEFAULT_SCOPE = ('/tarot-card-meanings',)
+
+# /tarot-card-meanings/<slug> (không tính trang phân trang /page/N)
+DEFAULT_CARD_PATTERN = r'^/tarot-card-meanings/(?!page/)[a-z0-9-]+$'
+
+CARD_ITEM_XPATH = '//div[contains(concat(" ", normalize-space(@class), " "), " card-list__item ")]'
+
+# Thứ tự nhóm và thứ tự lá trong mỗi bộ, giống tarot_card.json
+CARD_TYPES = ('Major Arcana', 'Wands', 'Cups', 'Swords', 'Pentacles')
+MINOR_RANKS = ('ace', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine', 'ten',
+               'page', 'knight', 'queen', 'king')
+MAJOR_VIDEO_RE = re.compile(r'/(\d+)\.mp4$')
+
+
+def normalize_url(url: str, base: Optional[str] = None) -> Optional[str]:
+    """
+    Chuẩn hóa URL để khử trùng lặp: ghép với base, host viết thường, bỏ port mặc định,
+    fragment, query và dấu / ở cuối. Trả về None nếu không phải http(s).
+    """
+    url = urljoin(base, url.strip()) if base else url.strip()
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in ('http', 'https') or not parts.hostname:
+        return None
+    host = parts.hostname.lower()
+    if parts.port and parts.port != {'http': 80, 'https': 443}[scheme]:
+        host = f"{host}:{parts.port}"
+    path = re.sub(r'/{2,}', '/', parts.path) or '/'
+    if len(path) > 1:
+        path = path.rstrip('/')
+    return urlunsplit((scheme, host, path, '', ''))
+
+
+class Frontier:
+    """Hàng đợi URL không trùng lặp, lưu/đọc lại được từ file JSON."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.queue: deque = deque()
+        self.seen = set()
+        self.visited: List[str] = []
+        self.failed: Dict[str, str] = {}
+        self.cards: Dict[str, Dict] = {}
+
+    def add(self, url: str) -> bool:
+        """Thêm URL (đã chuẩn hóa) vào cuối hàng đợi nếu chưa từng gặp."""
+        if url in self.seen:
+            return False
+        self.seen.add(url)
+        self.queue.append(url)
+        return True
+
+    def next_batch(self, size: int) -> List[str]:
+        return [self.queue.popleft() for _ in range(min(size, len(self.queue)))]
+
+    def mark_visited(self, url: str) -> None:
+        self.visited.append(url)
+        self.failed.pop(url, None)
+
+    def mark_failed(self, url: str, error: Exception) -> None:
+        self.failed[url] = str(error)
+
+    def add_card(self, card: Dict) -> None:
+        """Ghi nhận một lá bài; thông tin đã có (vd. tên từ trang danh sách) không bị ghi đè bằng giá trị rỗng."""
+        existing = self.cards.setdefault(card['card_url'], {})
+        for key, value in card.items():
+            if value or key not in existing:
+                existing[key] = value
+
+    def load(self) -> bool:
+        """Đọc lại trạng thái đã lưu; các URL lỗi lần trước được đưa lại vào hàng đợi."""
+        if not self.path.exists():
+            return False
+        with open(self.path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        failed = state.get('failed', {})
+        # File trạng thái cũ có thể ghi một URL vừa trong visited vừa trong failed
+        # (tải được nhưng parse lỗi): coi là lỗi để được thử lại
+        self.visited = [url for url in state.get('visited', []) if url not in failed]
+        self.cards = state.get('cards', {})
+        self.failed = {}
+        self.seen = set(self.visited)
+        for url in failed:
+            self.add(url)
+        for url in state.get('queue', []):
+            self.add(url)
+        return True
+
+    def save(self) -> None:
+        """Ghi trạng thái ra file tạm rồi đổi tên."""
+        state = {
+            'queue': list(self.queue),
+            'visited': self.visited,
+            'failed': self.failed,
+            'cards': self.cards,
+        }
+        tmp_path = self.path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class Scope:
+    """Quy tắc URL nào được đi theo và URL nào là trang lá bài."""
+
+    def __init__(self, seeds: Iterable[str], prefixes: Iterable[str], card_pattern: str):
+        self.hosts = {urlsplit(seed).hostname for seed in seeds}
+        self.prefixes = tuple(prefixes)
+        self.card_re = re.compile(card_pattern)
+
+    def _on_host(self, url: str) -> bool:
+        return urlsplit(url).hostname in self.hosts
+
+    def is_sitemap(self, url: str) -> bool:
+        return self._on_host(url) and urlsplit(url).path.endswith('.xml')
+
+    def is_card(self, url: str) -> bool:
+        return self._on_host(url) and bool(self.card_re.match(urlsplit(url).path))
+
+    def in_scope(self, url: str) -> bool:
+        path = urlsplit(url).path
+        return self._on_host(url) and any(path == p or path.startswith(p.rstrip('/') + '/')
+                                          for p in self.prefixes)
+
+
+def card_type(card_url: str) -> str:
+    """Nhóm của lá bài theo slug: "<rank>-of-<bộ>" là Minor Arcana, còn lại là Major Arcana."""
+    slug = urlsplit(card_url).path.rstrip('/').rsplit('/', 1)[-1]
+    for suit in CARD_TYPES[1:]:
+        if slug.endswith('-of-' + suit.lower()):
+            return suit
+    return 'Major Arcana'
+
+
+def card_sort_key(card: Dict) -> Tuple[int, int]:
+    """Xếp như tarot_card.json: Major Arcana theo số trên video, rồi từng bộ từ Ace tới King."""
+    group = CARD_TYPES.index(card['type'])
+    if card['type'] == 'Major Arcana':
+        match = MAJOR_VIDEO_RE.search(card.get('video_mp4') or '')
+        return group, int(match.group(1)) if match else len(MINOR_RANKS)
+    rank = urlsplit(card['card_url']).path.rsplit('/', 1)[-1].split('-of-')[0]
+    return group, MINOR_RANKS.index(rank) if rank in MINOR_RANKS else len(MINOR_RANKS)
+
+
+def name_from_slug(card_url: str) -> str:
+    """Tên tạm từ slug khi chưa thấy lá bài trên trang danh sách ("two-of-swords" -> "Two of Swords")."""
+    slug = urlsplit(card_url).path.rstrip('/').rsplit('/', 1)[-1]
+    return ' '.join(word if word == 'of' else word.capitalize() for word in slug.split('-'))
+
+
+def fetch_page(url: str) -> Tuple[bytes, str]:
+    """Tải một trang, trả về (body, content type)."""
+    response = http_client.fetch(url)
+    return response.content, response.headers.get('Content-Type', '')
+
+
+def parse_sitemap(body: bytes) -> List[str]:
+    """Các <loc> trong sitemap (urlset) hoặc sitemap index."""
+    root = etree.fromstring(body, parser=etree.XMLParser(recover=True, resolve_entities=False))
+    if root is None:
+        return []
+    return [loc.strip() for loc in root.xpath('//*[local-name()="loc"]/text()')]
+
+
+def parse_page(url: str, body: bytes, scope: Scope) -> Tuple[List[str], List[Dict]]:
+    """
+    Lấy các link và các lá bài trên một trang HTML.
+
+    Returns:
+        (các URL đã chuẩn hóa tìm thấy, các lá bài từ div.card-list__item hoặc từ chính trang lá bài)
+    """
+    doc = lxml_html.fromstring(body, base_url=url)
+    links = []
+    for anchor in doc.iter('a'):
+        link = normalize_url(anchor.get('href') or '', url)
+        if link:
+            links.append(link)
+
+    cards = []
+    for item in doc.xpath(CARD_ITEM_XPATH):
+        card = parse_card_item(item)
+        if card and card['card_url']:
+            card['card_url'] = normalize_url(card['card_url'], url)
+            cards.append(card)
+
+    if scope.is_card(url):
+        heading = next(doc.iter('h1'), None)
+        name = heading.text_content().strip() if heading is not None else ''
+        cards.append({'card_name': name, 'card_url': url})
+    return links, cards
+
+
+def build_card_list(cards: Dict[str, Dict], existing: List[Dict]) -> List[Dict]:
+    """
+    Dựng danh sách theo định dạng tarot_card.json. Lá bài đã có trong existing giữ nguyên id,
+    lá bài mới được xếp theo card_sort_key và đánh id tiếp theo.
+    Lá bài trong existing không được tìm thấy lần này vẫn được giữ nguyên.
+    """
+    by_url = {normalize_url(card['card_url']): card for card in existing}
+    next_id = max([card['id'] for card in existing] + [0]) + 1
+
+    # Lá bài có trong file cũ nhưng lần này không tìm thấy (vd. chạy dở) vẫn được giữ
+    result = [card for url, card in by_url.items() if url not in cards]
+    new_cards = []
+    for url, found in cards.items():
+        card = {
+            'card_name': found.get('card_name') or name_from_slug(url),
+            'card_url': url,
+            'video_mp4': found.get('video_mp4') or '',
+            'type': card_type(url),
+        }
+        old = by_url.get(url)
+        if old:
+            # Giữ id và các giá trị đã có trong file cũ khi lần này không lấy được
+            result.append({'id': old['id'], 'card_name': card['card_name'] or old.get('card_name'),
+                           'card_url': old['card_url'],
+                           'video_mp4': card['video_mp4'] or old.get('video_mp4', ''),
+                           'type': old.get('type', card['type'])})
+        else:
+            new_cards.append(card)
+
+    for card in sorted(new_cards, key=card_sort_key):
+        result.append(dict(id=next_id, **card))
+        next_id += 1
+    return sorted(result, key=lambda card: card['id'])
+
+
+def parse_args():
+    """Đọc tham số dòng lệnh."""
+    script_dir = Path(__file__).parent
+    parser = argparse.ArgumentParser(description='Tự tìm URL các lá bài từ trang danh sách và sitemap')
+    parser.add_argument('--seed', action='append', default=None,
+                        help='URL bắt đầu (có thể lặp lại; mặc định: trang danh sách lá bài và sitemap_index.xml)')
+    parser.add_argument('--scope', action='append', default=None,
+                        help=f"Tiền tố đường dẫn được đi theo (mặc định: {', '.join(DEFAULT_SCOPE)})")
+    parser.add_argument('--card-pattern', default=DEFAULT_CARD_PATTERN,
+                        help='Regex cho đường dẫn của trang lá bài')
+    parser.add_argument('--follow-cards', action='store_true',
+                        help='Tải cả các trang lá bài (lấy tên từ <h1> và link tới các lá khác)')
+    parser.add_argument('--max-pages', type=int, default=200,
+                        help='Số trang tải tối đa trong lượt chạy này (mặc định: 200)')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='Số request chạy cùng lúc (mặc định: 4)')
+    parser.add_argument('--rps', type=float, default=2.0,
+                        help='Số request/giây tối đa cho mỗi host (mặc định: 2)')
+    parser.add_argument('--state', type=Path, default=script_dir / 'discovery_state.json',
+                        help='File lưu frontier (mặc định: discovery_state.json)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Chạy tiếp từ frontier đã lưu thay vì bắt đầu lại từ seed')
+    parser.add_argument('--output', type=Path, default=script_dir / 'tarot_card.json',
+                        help='Danh sách lá bài cho crawl_tarot_content.py (mặc định: tarot_card.json)')
+    parser.add_argument('--video-links', type=Path, default=script_dir / 'video_links.json',
+                        help='Danh sách cho crawl_tarot_data.py (mặc định: video_links.json)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Không dùng cache HTTP trên đĩa')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    script_dir = Path(__file__).parent
+    seeds = [normalize_url(seed) for seed in (args.seed or DEFAULT_SEEDS)]
+    scope = Scope(seeds, args.scope or DEFAULT_SCOPE, args.card_pattern)
+
+    if not args.no_cache:
+        http_client.set_cache(HttpCache(script_dir / '.http_cache'))
+
+    frontier = Frontier(args.state)
+    if args.resume and frontier.load():
+        print(f"⏩ Resume: {len(frontier.visited)} trang đã tải, {len(frontier.queue)} URL đang chờ, "
+              f"{len(frontier.cards)} lá bài\n")
+    else:
+        for seed in seeds:
+            frontier.add(seed)
+
+    def should_fetch(url: str) -> bool:
+        if scope.is_sitemap(url):
+            return True
+        if scope.is_card(url):
+            return args.follow_cards
+        return scope.in_scope(url)
+
+    def handle(url: str, result: Union[Tuple[bytes, str], Exception]) -> None:
+        if isinstance(result, Exception):
+            frontier.mark_failed(url, result)
+            print(f"❌ Error: {url}: {result}")
+            return
+        body, content_type = result
+        try:
+            if scope.is_sitemap(url) or ('xml' in content_type and 'html' not in content_type):
+                links, cards = parse_sitemap(body), []
+            else:
+                links, cards = parse_page(url, body, scope)
+        except (etree.LxmlError, ValueError) as e:
+            frontier.mark_failed(url, e)
+            print(f"❌ Error: Không parse được {url}: {e}")
+            return
+        # Chỉ tính là đã tải khi parse xong, để trang parse lỗi được thử lại khi --resume
+        frontier.mark_visited(url)
+
+        for card in cards:
+            frontier.add_card(card)
+        new_links = 0
+        for link in links:
+            link = normalize_url(link)
+            if not link:
+                continue
+            if scope.is_card(link):
+                frontier.add_card({'card_url': link})
+            if should_fetch(link) and frontier.add(link):
+                new_links += 1
+        print(f"✅ {url}: {len(links)} link, {len(cards)} lá bài, {new_links} URL mới")
+
+    def fetch(url: str) -> Union[Tuple[bytes, str], Exception]:
+        try:
+            return fetch_page(url)
+        except (requests.exceptions.RequestException, OSError) as e:
+            return e
+
+    # Mỗi đợt tải song song một phần hàng đợi; frontier được lưu sau mỗi đợt
+    fetched = 0
+    while frontier.queue and fetched < args.max_pages:
+        batch = frontier.next_batch(min(args.concurrency * 4, args.max_pages - fetched))
+        crawl_concurrently([(url, fetch, (url,)) for url in batch],
+                           concurrency=args.concurrency, rps=args.rps,
+                           on_result=lambda i, result: handle(batch[i], result))
+        fetched += len(batch)
+        frontier.save()
+
+    existing = []
+    if args.output.exists():
+        with open(args.output, 'r', encoding='utf-8') as f:
+            existing = json.load(f)
+    cards = build_card_list(frontier.cards, existing)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(cards, f, ensure_ascii=False, indent=2)
+    video_links = [
+        {'card_name': card['card_name'], 'card_url': card['card_url'],
+         'video_mp4': card['video_mp4'],
+         'video_webm': frontier.cards.get(normalize_url(card['card_url']), {}).get('video_webm')}
+        for card in cards
+    ]
+    with open(args.video_links, 'w', encoding='utf-8') as f:
+        json.dump(video_links, f, ensure_ascii=False, indent=2)
+
+    print(f"\n📊 Thống kê:")
+    print(f"   🌐 Đã tải: {len(frontier.visited)} trang, còn chờ: {len(frontier.queue)}, lỗi: {len(frontier.failed)}")
+    print(f"   🃏 Lá bài: {len(cards)} ({len(cards) - len(existing)} mới)")
+    if frontier.queue:
+        print(f"   ⏩ Còn URL chưa tải: chạy lại với --resume để tiếp tục")
+    print(f"\n✨ Hoàn thành! Đã lưu {args.output} và {args.video_links}")
+
+
+if __name__ == '__main__':
+    main()
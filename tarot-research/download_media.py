@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Tải các file video (MP4/WebM) trong video_links.json về máy, song song.
+File được ghi theo từng đoạn (không giữ cả file trong bộ nhớ) vào file .part,
+có thể tải tiếp bằng HTTP Range nếu bị dừng giữa chừng. File tải xong được lưu
+theo sha256 của nội dung (content-addressed) trong media_store/objects, kèm
+manifest.json ánh xạ URL -> sha256; lần chạy sau bỏ qua các file không đổi.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import http_client
+from async_crawl import crawl_concurrently
+
+CHUNK_SIZE = 1024 * 1024  # 1 MB mỗi lần ghi
+
+
+def _sha256_file(path: Path, hasher=None):
+    """Băm nội dung file theo từng đoạn (tiếp tục trên hasher nếu được truyền vào)."""
+    hasher = hasher or hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher
+
+
+def _write_json(path: Path, data) -> None:
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+class MediaStore:
+    """
+    Kho file theo nội dung:
+        objects/<2 ký tự đầu sha256>/<sha256><đuôi file>  nội dung đã kiểm tra checksum
+        partial/<sha256 của URL>.part (+ .json)         file đang tải dở và validator của nó
+        manifest.json                                    URL -> {sha256, size, path, etag, ...}
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+        self.objects_dir = self.root / 'objects'
+        self.partial_dir = self.root / 'partial'
+        self.manifest_path = self.root / 'manifest.json'
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.partial_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self.manifest: Dict[str, Dict] = {}
+        if self.manifest_path.exists():
+            try:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    self.manifest = json.load(f)
+            except ValueError:
+                self.manifest = {}
+
+    def object_path(self, sha256: str, suffix: str = '') -> Path:
+        return self.objects_dir / sha256[:2] / f"{sha256}{suffix}"
+
+    def partial_path(self, url: str) -> Path:
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return self.partial_dir / f"{key}.part"
+
+    def entry(self, url: str) -> Optional[Dict]:
+        """Entry trong manifest nếu file tương ứng vẫn còn đúng kích thước, ngược lại None."""
+        with self._lock:
+            entry = self.manifest.get(url)
+        if not entry:
+            return None
+        path = self.root / entry['path']
+        if not path.exists() or path.stat().st_size != entry['size']:
+            return None
+        return dict(entry)
+
+    def verify(self, entry: Dict) -> bool:
+        """Băm lại file đã lưu và so với sha256 trong manifest."""
+        return _sha256_file(self.root / entry['path']).hexdigest() == entry['sha256']
+
+    def commit(self, url: str, part_path: Path, sha256: str, size: int,
+               etag: Optional[str], last_modified: Optional[str]) -> Dict:
+        """Chuyển file .part đã kiểm tra vào objects/ và ghi manifest."""
+        path = self.object_path(sha256, Path(url.split('?', 1)[0]).suffix.lower())
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists() and path.stat().st_size == size:
+            # Nội dung đã có (URL khác cùng file, hoặc file không đổi)
+            part_path.unlink()
+        else:
+            os.replace(part_path, path)
+        meta_path = part_path.with_suffix('.json')
+        if meta_path.exists():
+            meta_path.unlink()
+
+        entry = {
+            'sha256': sha256,
+            'size': size,
+            'path': path.relative_to(self.root).as_posix(),
+            'etag': etag,
+            'last_modified': last_modified,
+            'downloaded_at': time.time(),
+        }
+        with self._lock:
+            self.manifest[url] = entry
+            _write_json(self.manifest_path, self.manifest)
+        return dict(entry)
+
+
+def _conditional_headers(entry: Optional[Dict]) -> Dict[str, str]:
+    headers = {}
+    if entry:
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+
+def _load_partial(part_path: Path) -> Optional[Dict]:
+    """Validator (etag/last_modified) của file .part, nếu file còn tiếp tục được."""
+    meta_path = part_path.with_suffix('.json')
+    if not part_path.exists() or not meta_path.exists():
+        return None
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except ValueError:
+        return None
+    return meta if (meta.get('etag') or meta.get('last_modified')) else None
+
+
+def download_media(url: str, store: MediaStore, verify: bool = False, _retry: bool = True) -> Dict:
+    """
+    Tải một file vào store, tiếp tục từ file .part nếu có.
+
+    Args:
+        url: URL của file video
+        store: Kho lưu file
+        verify: Băm lại file đã có trước khi coi là không đổi
+
+    Returns:
+        Dict {url, status, sha256, size, bytes} với status là
+        'unchanged', 'downloaded' hoặc 'resumed'
+
+    Raises:
+        requests.exceptions.RequestException, OSError: Khi tải lỗi (file .part được giữ lại)
+    """
+    entry = store.entry(url)
+    if entry and verify and not store.verify(entry):
+        entry = None
+
+    # Tải nguyên bản (không nén) để Range tính đúng theo byte của file
+    headers = {'Accept-Encoding': 'identity'}
+    headers.update(_conditional_headers(entry))
+
+    part_path = store.partial_path(url)
+    partial = _load_partial(part_path)
+    offset = part_path.stat().st_size if partial else 0
+    if offset:
+        headers['Range'] = f"bytes={offset}-"
+        # Server chỉ trả về phần còn lại nếu file chưa đổi, ngược lại trả về cả file
+        headers['If-Range'] = partial.get('etag') or partial['last_modified']
+
+    with http_client.fetch_stream(url, headers=headers) as response:
+        if entry and response.status_code == 304:
+            return {'url': url, 'status': 'unchanged', 'sha256': entry['sha256'],
+                    'size': entry['size'], 'bytes': 0}
+
+        if response.status_code == 416 and offset and _retry:
+            # File .part không còn khớp với file trên server: tải lại từ đầu
+            part_path.unlink()
+            return download_media(url, store, verify, _retry=False)
+        response.raise_for_status()
+
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        content_range = response.headers.get('Content-Range', '')
+        if response.status_code == 206 and content_range.startswith(f"bytes {offset}-"):
+            hasher = _sha256_file(part_path)
+            mode = 'ab'
+        else:
+            offset = 0
+            hasher = hashlib.sha256()
+            mode = 'wb'
+            _write_json(part_path.with_suffix('.json'),
+                        {'url': url, 'etag': etag, 'last_modified': last_modified})
+
+        written = 0
+        with open(part_path, mode) as f:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                f.write(chunk)
+                hasher.update(chunk)
+                written += len(chunk)
+
+        content_length = response.headers.get('Content-Length')
+        if content_length is not None and int(content_length) != written:
+            raise OSError(f"Tải thiếu dữ liệu: nhận {written}/{content_length} bytes")
+
+    sha256 = hasher.hexdigest()
+    size = offset + written
+    if entry and entry['sha256'] == sha256:
+        status = 'unchanged'
+    else:
+        status = 'resumed' if offset else 'downloaded'
+    store.commit(url, part_path, sha256, size, etag, last_modified)
+    return {'url': url, 'status': status, 'sha256': sha256, 'size': size, 'bytes': written}
+
+
+def download_one(url: str, store: MediaStore, verify: bool = False) -> Dict:
+    """Tải một file và in kết quả; lỗi được trả về dưới dạng status 'error'."""
+    try:
+        result = download_media(url, store, verify)
+    except Exception as e:
+        print(f"❌ Error: Không thể tải {url}: {e}")
+        return {'url': url, 'status': 'error', 'error': str(e)}
+
+    if result['status'] == 'unchanged':
+        print(f"⏩ Không đổi: {url}")
+    else:
+        label = 'Tải tiếp' if result['status'] == 'resumed' else 'Đã tải'
+        print(f"✅ {label}: {url} ({result['bytes'] / 1024 / 1024:.1f} MB, sha256 {result['sha256'][:12]})")
+    return result
+
+
+def load_media_urls(video_links_file: Path, include_webm: bool = True) -> List[str]:
+    """Danh sách URL video (không trùng lặp) từ video_links.json, hoặc video_links.txt nếu không có."""
+    urls = []
+    if video_links_file.suffix == '.json':
+        with open(video_links_file, 'r', encoding='utf-8') as f:
+            for item in json.load(f):
+                urls.append(item.get('video_mp4'))
+                if include_webm:
+                    urls.append(item.get('video_webm'))
+    else:
+        with open(video_links_file, 'r', encoding='utf-8') as f:
+            urls = [line.strip() for line in f]
+    return list(dict.fromkeys(url for url in urls if url))
+
+
+def parse_args():
+    """Đọc tham số dòng lệnh."""
+    parser = argparse.ArgumentParser(description='Tải video của các lá bài trong video_links.json')
+    parser.add_argument('--input', type=Path, default=None,
+                        help='video_links.json hoặc video_links.txt (mặc định: file cạnh script)')
+    parser.add_argument('--store', type=Path, default=None,
+                        help='Thư mục lưu file (mặc định: media_store cạnh script)')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='Số file tải cùng lúc (mặc định: 4)')
+    parser.add_argument('--rps', type=float, default=0,
+                        help='Số request/giây tối đa cho mỗi host (mặc định: 0 = không giới hạn)')
+    parser.add_argument('--mp4-only', action='store_true',
+                        help='Chỉ tải MP4, bỏ qua WebM')
+    parser.add_argument('--verify', action='store_true',
+                        help='Băm lại các file đã có để kiểm tra checksum trước khi bỏ qua')
+    return parser.parse_args()
+
+
+def main():
+    """Tải tất cả video vào store."""
+    args = parse_args()
+
+    script_dir = Path(__file__).parent
+    input_file = args.input
+    if input_file is None:
+        input_file = script_dir / 'video_links.json'
+        if not input_file.exists():
+            input_file = script_dir / 'video_links.txt'
+    store = MediaStore(args.store or script_dir / 'media_store')
+
+    urls = load_media_urls(input_file, include_webm=not args.mp4_only)
+    print(f"📋 Tìm thấy {len(urls)} file video trong {input_file}")
+    print(f"⚡ Tải {args.concurrency} file cùng lúc vào {store.root}\n")
+
+    counts = {'downloaded': 0, 'resumed': 0, 'unchanged': 0, 'error': 0}
+    total_bytes = [0]
+
+    def count(_, result):
+        counts[result['status']] += 1
+        total_bytes[0] += result.get('bytes', 0)
+
+    start = time.monotonic()
+    jobs = [(url, download_one, (url, store, args.verify)) for url in urls]
+    crawl_concurrently(jobs, concurrency=args.concurrency, rps=args.rps, on_result=count)
+    elapsed = time.monotonic() - start
+
+    print(f"\n📊 Thống kê:")
+    print(f"   ✅ Đã tải: {counts['downloaded']}, tải tiếp: {counts['resumed']}")
+    print(f"   ⏩ Không đổi: {counts['unchanged']}")
+    print(f"   ❌ Lỗi: {counts['error']}")
+    print(f"   📦 {total_bytes[0] / 1024 / 1024:.1f} MB trong {elapsed:.1f}s "
+          f"({total_bytes[0] / 1024 / 1024 / max(elapsed, 1e-9):.1f} MB/s)")
+    print(f"\n✨ Manifest: {store.manifest_path}")
+
+
+if __name__ == '__main__':
+    main()
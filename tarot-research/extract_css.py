@@ -48,71 +48,308 @@ def extract_internal_css(html_content):
     return '\n\n'.join(css_blocks)
 
 
-def filter_css_for_elements(css_content, classes, ids):
-    """Lọc CSS chỉ giữ lại các rule liên quan đến classes và ids được cung cấp"""
-    if not css_content:
-        return ""
+# Tìm ký tự đặc biệt tiếp theo; phần text ở giữa được chép nguyên
+CSS_SPECIAL_RE = re.compile(r'[{};"\'/]')
+CSS_STRING_RES = {
+    '"': re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"?', re.DOTALL),
+    "'": re.compile(r"'[^'\\]*(?:\\.[^'\\]*)*'?", re.DOTALL),
+}
+AT_RULE_NAME_RE = re.compile(r'@([-\w]+)')
+
+# @rule chứa các rule con; lọc đệ quy các rule bên trong
+CONDITIONAL_AT_RULES = frozenset(('media', 'supports', 'layer', 'container', 'document',
+                                  '-moz-document', 'scope', 'starting-style'))
+
+
+class CssRule:
+    """Một rule CSS: prelude (selector hoặc @rule) và nội dung block theo đúng thứ tự."""
+    
+    __slots__ = ('prelude', 'items')
+    
+    def __init__(self, prelude):
+        self.prelude = prelude
+        # Xen kẽ text khai báo (str) và rule con (CssRule)
+        self.items = []
+    
+    @property
+    def declarations(self):
+        """Phần khai báo của block, không gồm các rule con"""
+        return ''.join(item for item in self.items if isinstance(item, str))
+    
+    @property
+    def children(self):
+        return [item for item in self.items if isinstance(item, CssRule)]
+    
+    @property
+    def body(self):
+        """Toàn bộ nội dung giữa hai dấu ngoặc (đã bỏ comment)"""
+        return ''.join(item if isinstance(item, str) else item.to_css() for item in self.items)
+    
+    @property
+    def at_rule_name(self):
+        """Tên @rule viết thường (vd. 'media', '-webkit-keyframes'), hoặc None"""
+        match = AT_RULE_NAME_RE.match(self.prelude)
+        return match.group(1).lower() if match else None
+    
+    def to_css(self):
+        return f"{self.prelude} {{{self.body}}}"
+
+
+def iter_css_rules(css_content):
+    """
+    Đọc CSS một lượt và trả về lần lượt các rule cấp ngoài cùng (kèm rule con
+    lồng nhau ở mọi độ sâu) ngay khi rule đó đóng.
     
-    # Loại bỏ comments
-    css_content = re.sub(r'/\*.*?\*/', '', css_content, flags=re.DOTALL)
-    
-    filtered_rules = []
-    
-    # Tách CSS thành các rule riêng lẻ
-    # Xử lý cả nested rules (như @media, @keyframes, etc.)
-    # Tìm tất cả các selector và block của chúng
-    # Pattern: selector { properties } hoặc @rule { ... }
-    
-    # Trước tiên, tách các @rules (media queries, keyframes, etc.)
-    at_rule_pattern = r'(@[^{]+)\{([^{}]*(?:\{[^{}]*\}[^{}]*)*)\}'
-    remaining_css = css_content
-    
-    # Xử lý các @rules trước
-    at_rules = []
-    for match in re.finditer(at_rule_pattern, css_content, re.DOTALL):
-        at_rule = match.group(0)
-        # Kiểm tra xem @rule có chứa CSS liên quan không
-        rule_content = match.group(2)
-        # Tìm các rule bên trong @rule
-        inner_rules = re.findall(r'([^{]+)\{([^{}]+)\}', rule_content, re.DOTALL)
-        has_relevant_content = False
-        relevant_inner_rules = []
+    Comment bị bỏ, chuỗi trong dấu nháy được giữ nguyên (kể cả khi chứa { } ;).
+    Các câu lệnh cấp ngoài cùng không có block (@import, @charset) bị bỏ qua.
+    """
+    stack = []
+    pending = []
+    pos = 0
+    length = len(css_content)
+    
+    while True:
+        match = CSS_SPECIAL_RE.search(css_content, pos)
+        if not match:
+            break
+        start = match.start()
+        char = css_content[start]
+        if start > pos:
+            pending.append(css_content[pos:start])
+        
+        if char == '/':
+            if css_content.startswith('*', start + 1):
+                end = css_content.find('*/', start + 2)
+                pos = length if end == -1 else end + 2
+            else:
+                pending.append('/')
+                pos = start + 1
+            continue
         
-        for inner_selector, inner_props in inner_rules:
-            if is_selector_relevant(inner_selector, classes, ids):
-                has_relevant_content = True
-                relevant_inner_rules.append((inner_selector, inner_props))
+        if char in CSS_STRING_RES:
+            string_match = CSS_STRING_RES[char].match(css_content, start)
+            pending.append(string_match.group())
+            pos = string_match.end()
+            continue
         
-        if has_relevant_content:
-            # Tái tạo @rule với chỉ các rule liên quan
-            at_rule_header = match.group(1).strip()
-            inner_css = '\n'.join([f"  {sel.strip()} {{\n{props.strip()}\n  }}" 
-                                  for sel, props in relevant_inner_rules])
-            filtered_rules.append(f"{at_rule_header} {{\n{inner_css}\n}}")
+        text = ''.join(pending)
+        pending = []
+        pos = start + 1
         
-        # Loại bỏ @rule đã xử lý khỏi remaining_css
-        remaining_css = remaining_css.replace(at_rule, '', 1)
+        if char == '{':
+            stack.append(CssRule(text.strip()))
+        elif char == ';':
+            if stack:
+                stack[-1].items.append(text + ';')
+        elif stack:
+            rule = stack.pop()
+            if text:
+                rule.items.append(text)
+            if stack:
+                stack[-1].items.append(rule)
+            else:
+                yield rule
+
+
+def _format_block(header, body, depth):
+    indent = '  ' * depth
+    return f"{indent}{header} {{\n{body}\n{indent}}}"
+
+
+def _iter_declarations(body):
+    """Các cặp (thuộc tính viết thường, giá trị) trong một block khai báo"""
+    for declaration in body.split(';'):
+        prop, sep, value = declaration.partition(':')
+        if sep:
+            yield prop.strip().lower(), value.strip()
+
+
+def _unquote(value):
+    return value.strip().strip('"\'').strip().lower()
+
+
+# Các từ trong giá trị animation/font: tên keyframes, tên font (có thể gồm nhiều từ)
+NAME_WORD_RE = re.compile(r'[\w-]+')
+
+# Tên font dài nhất (số từ) được ghi nhận, vd. "noto sans display condensed"
+MAX_NAME_WORDS = 6
+
+
+def _name_key(name):
+    """Tên đã chuẩn hóa thành dãy từ cách nhau một khoảng trắng"""
+    return ' '.join(NAME_WORD_RE.findall(name))
+
+
+def _add_name_runs(value, names):
+    """
+    Thêm vào names mọi dãy từ liên tiếp (tối đa MAX_NAME_WORDS từ) trong từng phần
+    phân tách bằng dấu phẩy của value, để tra tên keyframes/font bằng một phép tra set
+    (khớp như một tên riêng biệt, giống tìm theo ranh giới từ trong giá trị)
+    """
+    for part in value.split(','):
+        words = NAME_WORD_RE.findall(part)
+        for start in range(len(words)):
+            for end in range(start + 1, min(len(words), start + MAX_NAME_WORDS) + 1):
+                names.add(' '.join(words[start:end]))
+
+
+class _CssFilter:
+    """Lọc cây rule: giữ style rule liên quan, đệ quy vào @media/@supports/...,
+    và chỉ giữ @keyframes/@font-face được các rule đã giữ sử dụng"""
     
-    # Xử lý các rule thông thường
-    rule_pattern = r'([^{]+)\{([^{}]*(?:\{[^{}]*\}[^{}]*)*)\}'
+    def __init__(self, index):
+        self.index = index
+        # Tên được các rule đã giữ dùng tới, gom trong collect và tra trong render
+        self.animation_names = set()
+        self.font_names = set()
     
-    for match in re.finditer(rule_pattern, remaining_css, re.DOTALL):
-        selector = match.group(1).strip()
-        properties = match.group(2).strip()
+    def collect(self, rule, depth):
+        """Trả về entry để render sau, hoặc None nếu bỏ rule"""
+        name = rule.at_rule_name
+        if name is None:
+            if not self.index.matches(rule.prelude):
+                return None
+            body = rule.body.strip()
+            for prop, value in _iter_declarations(body):
+                if prop.endswith('animation') or prop.endswith('animation-name'):
+                    _add_name_runs(value.lower(), self.animation_names)
+                elif prop in ('font', 'font-family'):
+                    _add_name_runs(value.lower(), self.font_names)
+            return _format_block(rule.prelude, body, depth)
         
-        # Bỏ qua nếu là phần của @rule đã xử lý
-        if selector.strip().startswith('@'):
-            continue
+        if name in CONDITIONAL_AT_RULES:
+            entries = [entry for entry in (self.collect(child, depth + 1) for child in rule.children)
+                       if entry is not None]
+            return ('group', rule.prelude, depth, entries) if entries else None
+        
+        if name.endswith('keyframes'):
+            return ('keyframes', _unquote(rule.prelude[len(name) + 1:]), depth, rule)
         
-        if is_selector_relevant(selector, classes, ids):
-            rule = f"{selector} {{\n{properties}\n}}"
-            filtered_rules.append(rule)
+        if name == 'font-face':
+            families = [_unquote(value) for prop, value in _iter_declarations(rule.declarations)
+                        if prop == 'font-family']
+            return ('font-face', families[0] if families else '', depth, rule)
+        
+        # Các @rule khác (@page, @property, ...) không gắn với class/id nào
+        return None
+    
+    def render(self, entry):
+        if entry is None or isinstance(entry, str):
+            return entry
+        kind, name, depth, payload = entry
+        if kind == 'group':
+            inner = [text for text in map(self.render, payload) if text]
+            return _format_block(name, '\n'.join(inner), depth) if inner else None
+        if kind == 'keyframes':
+            if not name or _name_key(name) not in self.animation_names:
+                return None
+            frames = '\n'.join(_format_block(frame.prelude, frame.declarations.strip(), depth + 1)
+                               for frame in payload.children)
+            return _format_block(payload.prelude, frames, depth)
+        # font-face
+        if not name or _name_key(name) not in self.font_names:
+            return None
+        return _format_block(payload.prelude, payload.declarations.strip(), depth)
+
+
+def filter_css_for_elements(css_content, classes, ids):
+    """
+    Lọc CSS chỉ giữ lại các rule liên quan đến classes và ids được cung cấp
+    
+    Parse CSS một lượt bằng iter_css_rules (hỗ trợ @rule lồng nhau ở mọi độ sâu),
+    giữ thứ tự rule như trong file gốc, và giữ các @keyframes/@font-face
+    được các rule đã giữ dùng tới (qua animation/font-family).
+    """
+    if not css_content:
+        return ""
+    
+    css_filter = _CssFilter(SelectorIndex(classes, ids))
+    entries = [css_filter.collect(rule, 0) for rule in iter_css_rules(css_content)]
     
+    # @keyframes/@font-face có thể nằm trước rule dùng nó nên chỉ render sau khi đã duyệt hết
+    filtered_rules = [text for text in map(css_filter.render, entries) if text]
     return '\n\n'.join(filtered_rules)
 
 
-def is_selector_relevant(selector, classes, ids):
-    """Kiểm tra xem selector có liên quan đến các class/id được cung cấp không"""
+# Ký tự được coi là một phần của tên class/id (giống các regex trong is_selector_relevant_regex)
+IDENT_RE = re.compile(r'[a-zA-Z0-9_-]+')
+IDENT_FULL_RE = re.compile(r'[a-zA-Z0-9_-]+\Z')
+
+# Ở đầu selector, tên class (không có dấu chấm) chỉ được tính khi theo sau là các ký tự này
+START_FOLLOWERS = frozenset(',:{>~+[.')
+
+
+class SelectorIndex:
+    """
+    Index các class/id để kiểm tra selector bằng phép giao tập hợp.
+    
+    Mỗi selector chỉ được tách token một lần thành các tên đứng sau '.', '#' hoặc
+    khoảng trắng, rồi so với tập class/id đã index, thay vì chạy vài regex cho mỗi class.
+    Cho cùng kết quả giữ/bỏ như is_selector_relevant_regex.
+    """
+    
+    def __init__(self, classes, ids):
+        self.classes = {cls for cls in classes if IDENT_FULL_RE.match(cls)}
+        self.ids = {id_name for id_name in ids if IDENT_FULL_RE.match(id_name)}
+        # Tên có ký tự ngoài [a-zA-Z0-9_-] không tách được thành token, dùng lại regex
+        self.other_classes = set(classes) - self.classes
+        self.other_ids = set(ids) - self.ids
+    
+    def tokenize(self, selector):
+        """
+        Tách selector thành (các token có thể là class, các token có thể là id).
+        """
+        class_tokens = set()
+        id_tokens = set()
+        for match in IDENT_RE.finditer(selector):
+            token = match.group()
+            start = match.start()
+            if start == 0:
+                end = match.end()
+                if (end == len(selector) or selector[end] in START_FOLLOWERS
+                        or selector[end].isspace()):
+                    class_tokens.add(token)
+                continue
+            prev = selector[start - 1]
+            if prev == '.':
+                class_tokens.add(token)
+            elif prev == '#':
+                id_tokens.add(token)
+            elif prev.isspace():
+                class_tokens.add(token)
+                id_tokens.add(token)
+        return class_tokens, id_tokens
+    
+    def matches(self, selector):
+        """Selector có liên quan đến các class/id đã index không"""
+        selector = selector.strip()
+        class_tokens, id_tokens = self.tokenize(selector)
+        if not self.classes.isdisjoint(class_tokens) or not self.ids.isdisjoint(id_tokens):
+            return True
+        if self.other_classes or self.other_ids:
+            return is_selector_relevant_regex(selector, self.other_classes, self.other_ids)
+        return False
+
+
+def is_selector_relevant(selector, classes, ids, index=None):
+    """
+    Kiểm tra xem selector có liên quan đến các class/id được cung cấp không
+    
+    Args:
+        selector: Selector CSS
+        classes, ids: Tập class/id lấy từ HTML
+        index: SelectorIndex dựng sẵn từ classes/ids; nên truyền vào khi kiểm tra nhiều selector
+    """
+    if index is None:
+        index = SelectorIndex(classes, ids)
+    return index.matches(selector)
+
+
+def is_selector_relevant_regex(selector, classes, ids):
+    """
+    Kiểm tra selector bằng regex cho từng class/id (cách cũ, O(classes × patterns)).
+    Vẫn dùng cho các tên có ký tự đặc biệt mà SelectorIndex không tách được thành token.
+    """
     selector = selector.strip()
     
     # Kiểm tra classes
@@ -6,6 +6,11 @@ Script để đọc file card.html và lấy danh sách tất cả các src ch
 import re
 from pathlib import Path
 
+# src="..." và data-src="..." (nháy đơn hoặc kép) trong một lần quét:
+# "data-src=" cũng kết thúc bằng "src=" nên một pattern là đủ.
+# Cần thêm srcset/poster/url(...) hoặc quét nhiều file thì dùng extract_asset_refs.py
+TAROTOO_SRC_RE = re.compile(r'src\s*=\s*["\']([^"\']*tarotoo\.com[^"\']*)["\']', re.IGNORECASE)
+
 def extract_tarotoo_src(html_file_path):
     """
     Đọc file HTML và trích xuất tất cả các giá trị src chứa "tarotoo.com"
@@ -20,21 +25,8 @@ def extract_tarotoo_src(html_file_path):
     with open(html_file_path, 'r', encoding='utf-8') as f:
         html_content = f.read()
     
-    src_list = []
-    
-    # Pattern để tìm các thuộc tính src và data-src
-    # Tìm cả src="..." và src='...' và data-src="..." và data-src='...'
-    patterns = [
-        r'src\s*=\s*["\']([^"\']*tarotoo\.com[^"\']*)["\']',
-        r'data-src\s*=\s*["\']([^"\']*tarotoo\.com[^"\']*)["\']',
-    ]
-    
-    for pattern in patterns:
-        matches = re.findall(pattern, html_content, re.IGNORECASE)
-        src_list.extend(matches)
-    
     # Loại bỏ trùng lặp và sắp xếp
-    unique_src_list = sorted(list(set(src_list)))
+    unique_src_list = sorted(set(TAROTOO_SRC_RE.findall(html_content)))
     
     return unique_src_list
 
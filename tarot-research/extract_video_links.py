@@ -5,75 +5,156 @@ Chương trình để lấy các link video từ các thẻ bài tarot trong fil
 Dựa vào cấu trúc mẫu trong cardList.html
 """
 
-from bs4 import BeautifulSoup
+import argparse
+import glob
 import json
-import re
+import os
 
-def extract_video_links(html_file_path):
+from lxml import etree
+
+# Class của thẻ bài trong trang danh sách
+CARD_ITEM_CLASS = 'card-list__item'
+
+def _has_class(element, class_name):
+    """Kiểm tra element có class class_name (so theo từng class, như class_ của BeautifulSoup)"""
+    return class_name in (element.get('class') or '').split()
+
+def _find(element, tag, class_name=None, **attrs):
+    """Phần tử con đầu tiên (theo thứ tự trong tài liệu) có tag, class và thuộc tính cho trước"""
+    for child in element.iter(tag):
+        if class_name and not _has_class(child, class_name):
+            continue
+        if all(child.get(k) == v for k, v in attrs.items()):
+            return child
+    return None
+
+def _get_text(element):
+    """Giống get_text(strip=True) của BeautifulSoup"""
+    return ''.join(text.strip() for text in element.itertext())
+
+def parse_card_item(card_item):
     """
-    Trích xuất các link video từ file HTML chứa các thẻ bài tarot
+    Lấy thông tin video từ một phần tử div.card-list__item (lxml)
     
-    Args:
-        html_file_path: Đường dẫn đến file card.html
-        
     Returns:
-        List các dictionary chứa thông tin về mỗi thẻ bài và video links
+        Dictionary thông tin thẻ bài, hoặc None nếu không có link video
     """
-    # Đọc file HTML
-    with open(html_file_path, 'r', encoding='utf-8') as f:
-        html_content = f.read()
+    # Tìm link của thẻ bài
+    card_link = _find(card_item, 'a', 'card-blog-item')
+    card_url = card_link.get('href', '') if card_link is not None else ''
     
-    # Parse HTML với BeautifulSoup
-    soup = BeautifulSoup(html_content, 'html.parser')
+    # Tìm tên thẻ bài
+    title_element = _find(card_item, 'h5', 'card-blog-item__title')
+    if title_element is not None:
+        title_span = _find(title_element, 'span')
+        card_name = _get_text(title_span if title_span is not None else title_element)
+    else:
+        card_name = ''
     
-    # Tìm tất cả các thẻ bài (card-list__item)
-    card_items = soup.find_all('div', class_='card-list__item')
+    # Tìm video element
+    video_element = _find(card_item, 'video', 'card-video')
+    if video_element is None:
+        return None
     
-    video_data = []
+    # Lấy link từ data-src (thuộc tính chính) và data-src-webm (nếu có)
+    video_mp4 = video_element.get('data-src', '')
+    video_webm = video_element.get('data-src-webm', '')
+    
+    # Nếu không có trong data-src, thử lấy từ source tag
+    if not video_mp4:
+        source_mp4 = _find(video_element, 'source', type='video/mp4')
+        if source_mp4 is not None:
+            video_mp4 = source_mp4.get('src', '')
+    
+    if not video_webm:
+        source_webm = _find(video_element, 'source', type='video/webm')
+        if source_webm is not None:
+            video_webm = source_webm.get('src', '')
+    
+    # Chỉ lấy nếu có ít nhất một link video
+    if not (video_mp4 or video_webm):
+        return None
     
-    for card_item in card_items:
-        # Tìm link của thẻ bài
-        card_link = card_item.find('a', class_='card-blog-item')
-        card_url = card_link.get('href', '') if card_link else ''
+    return {
+        'card_name': card_name,
+        'card_url': card_url,
+        'video_mp4': video_mp4,
+        'video_webm': video_webm if video_webm else None
+    }
+
+def iter_video_links(html_file_path):
+    """
+    Đọc dần file HTML bằng lxml iterparse và lần lượt trả về thông tin video của
+    từng thẻ bài (div.card-list__item). Mỗi thẻ bài được xử lý ngay khi parse xong
+    rồi giải phóng, các phần tử nằm ngoài thẻ bài cũng được xóa sau khi parse, nên
+    bộ nhớ không tăng theo kích thước trang.
+    """
+    current_item = None
+    for event, element in etree.iterparse(html_file_path, events=('start', 'end'),
+                                          html=True, encoding='utf-8'):
+        if event == 'start':
+            if current_item is None and element.tag == 'div' and _has_class(element, CARD_ITEM_CLASS):
+                current_item = element
+            continue
         
-        # Tìm tên thẻ bài
-        title_element = card_item.find('h5', class_='card-blog-item__title')
-        if title_element:
-            title_span = title_element.find('span')
-            card_name = title_span.get_text(strip=True) if title_span else title_element.get_text(strip=True)
-        else:
-            card_name = ''
+        if element is current_item:
+            current_item = None
+            card = parse_card_item(element)
+            if card:
+                yield card
+        elif current_item is not None:
+            # Còn nằm trong thẻ bài đang parse: giữ lại để parse_card_item dùng
+            continue
         
-        # Tìm video element
-        video_element = card_item.find('video', class_='card-video')
+        # Xóa phần tử đã xong và các anh em đứng trước nó khỏi cây
+        element.clear()
+        parent = element.getparent()
+        if parent is not None:
+            while element.getprevious() is not None:
+                del parent[0]
+
+def extract_video_links(html_file_path):
+    """
+    Trích xuất các link video từ file HTML chứa các thẻ bài tarot
+    
+    Args:
+        html_file_path: Đường dẫn đến file card.html
         
-        if video_element:
-            # Lấy link từ data-src (thuộc tính chính)
-            video_mp4 = video_element.get('data-src', '')
-            
-            # Lấy link từ data-src-webm (nếu có)
-            video_webm = video_element.get('data-src-webm', '')
-            
-            # Nếu không có trong data-src, thử lấy từ source tag
-            if not video_mp4:
-                source_mp4 = video_element.find('source', type='video/mp4')
-                if source_mp4:
-                    video_mp4 = source_mp4.get('src', '')
-            
-            if not video_webm:
-                source_webm = video_element.find('source', type='video/webm')
-                if source_webm:
-                    video_webm = source_webm.get('src', '')
-            
-            # Chỉ thêm vào danh sách nếu có ít nhất một link video
-            if video_mp4 or video_webm:
-                video_data.append({
-                    'card_name': card_name,
-                    'card_url': card_url,
-                    'video_mp4': video_mp4,
-                    'video_webm': video_webm if video_webm else None
-                })
+    Returns:
+        List các dictionary chứa thông tin về mỗi thẻ bài và video links
+    """
+    return list(iter_video_links(html_file_path))
+
+def iter_html_files(inputs):
+    """Các file HTML từ danh sách file, thư mục (các file .html/.htm, theo tên) hoặc glob"""
+    for item in inputs:
+        if os.path.isdir(item):
+            for name in sorted(os.listdir(item)):
+                if name.lower().endswith(('.html', '.htm')):
+                    yield os.path.join(item, name)
+        elif glob.has_magic(item):
+            for path in sorted(glob.glob(item)):
+                yield path
+        else:
+            yield item
+
+def extract_video_links_from_pages(inputs):
+    """
+    Trích xuất video links từ nhiều trang danh sách (vd. các trang phân trang đã lưu).
+    Thẻ bài xuất hiện trên nhiều trang (cùng card_url) chỉ được lấy một lần.
     
+    Args:
+        inputs: List file HTML, thư mục hoặc glob
+    """
+    video_data = []
+    seen_urls = set()
+    for html_file in iter_html_files(inputs):
+        for card in iter_video_links(html_file):
+            if card['card_url']:
+                if card['card_url'] in seen_urls:
+                    continue
+                seen_urls.add(card['card_url'])
+            video_data.append(card)
     return video_data
 
 def save_to_json(video_data, output_file='video_links.json'):
@@ -103,16 +184,26 @@ def print_summary(video_data):
             print(f"   Video WebM: {item['video_webm']}")
         print()
 
+def parse_args():
+    """Đọc tham số dòng lệnh"""
+    parser = argparse.ArgumentParser(description='Lấy link video của các thẻ bài từ trang danh sách đã lưu')
+    parser.add_argument('inputs', nargs='*', default=['card.html'],
+                        help='File HTML, thư mục chứa các trang đã lưu hoặc glob (mặc định: card.html)')
+    parser.add_argument('--json', default='video_links.json',
+                        help='File JSON output (mặc định: video_links.json)')
+    parser.add_argument('--txt', default='video_links.txt',
+                        help='File text chứa các link MP4 (mặc định: video_links.txt)')
+    return parser.parse_args()
+
 def main():
-    # Đường dẫn đến file card.html
-    html_file = 'card.html'
+    args = parse_args()
     
-    print(f"Đang đọc file: {html_file}")
+    print(f"Đang đọc: {', '.join(args.inputs)}")
     print("Đang trích xuất các link video từ các thẻ bài...\n")
     
     try:
         # Trích xuất video links
-        video_data = extract_video_links(html_file)
+        video_data = extract_video_links_from_pages(args.inputs)
         
         if not video_data:
             print("Không tìm thấy video nào trong file HTML!")
@@ -122,17 +213,15 @@ def main():
         print_summary(video_data)
         
         # Lưu vào file JSON
-        json_file = 'video_links.json'
-        save_to_json(video_data, json_file)
-        print(f"\nĐã lưu dữ liệu đầy đủ vào: {json_file}")
+        save_to_json(video_data, args.json)
+        print(f"\nĐã lưu dữ liệu đầy đủ vào: {args.json}")
         
         # Lưu chỉ các link MP4 vào file text
-        txt_file = 'video_links.txt'
-        save_to_txt(video_data, txt_file)
-        print(f"Đã lưu danh sách link MP4 vào: {txt_file}")
+        save_to_txt(video_data, args.txt)
+        print(f"Đã lưu danh sách link MP4 vào: {args.txt}")
         
-    except FileNotFoundError:
-        print(f"Lỗi: Không tìm thấy file {html_file}")
+    except (FileNotFoundError, OSError) as e:
+        print(f"Lỗi: Không đọc được file: {e}")
         print("Vui lòng đảm bảo file card.html nằm trong cùng thư mục với script này.")
     except Exception as e:
         print(f"Lỗi khi xử lý: {e}")
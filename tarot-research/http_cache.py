@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Cache HTTP trên ổ đĩa cho các trang tarot card.
+Mỗi URL lưu body và các validator (ETag/Last-Modified); khi crawl lại sẽ gửi
+If-None-Match/If-Modified-Since và dùng body trên đĩa nếu server trả về 304.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256 MB
+DEFAULT_MAX_AGE = 7 * 24 * 3600  # 7 ngày
+
+
+def _cache_key(url: str) -> str:
+    """Tên file trong cache cho một URL."""
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+
+class HttpCache:
+    """
+    Cache response theo URL, giới hạn số entry, tổng dung lượng và tuổi của entry.
+    Khi vượt giới hạn, các entry lâu không dùng nhất sẽ bị xóa trước (LRU).
+
+    Thống kê trong `stats`:
+        hits: số lần server trả về 304 và body được lấy từ đĩa
+        misses: số lần phải tải toàn bộ nội dung
+        stored: số response đã ghi vào cache
+        evicted: số entry bị xóa vì hết hạn hoặc vượt giới hạn
+    """
+
+    def __init__(self, cache_dir: Union[str, Path],
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_age: float = DEFAULT_MAX_AGE):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.stats = {'hits': 0, 'misses': 0, 'stored': 0, 'evicted': 0}
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        self._total_bytes = 0
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+        with self._lock:
+            self._evict()
+
+    def _meta_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _body_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.body"
+
+    def _load_index(self) -> None:
+        """Đọc metadata của các entry đã có trên đĩa."""
+        for meta_file in self.cache_dir.glob('*.json'):
+            key = meta_file.stem
+            try:
+                with open(meta_file, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                meta = None
+            if not meta or not self._body_path(key).exists():
+                self._remove_files(key)
+                continue
+            self._entries[key] = meta
+            self._total_bytes += meta.get('size', 0)
+
+    def _write_meta(self, key: str, meta: Dict) -> None:
+        tmp_path = self._meta_path(key).with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, self._meta_path(key))
+
+    def _remove_files(self, key: str) -> None:
+        for path in (self._meta_path(key), self._body_path(key)):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _drop(self, key: str) -> None:
+        meta = self._entries.pop(key, None)
+        if meta is not None:
+            self._total_bytes -= meta.get('size', 0)
+            self.stats['evicted'] += 1
+        self._remove_files(key)
+
+    def _is_expired(self, meta: Dict, now: float) -> bool:
+        return bool(self.max_age) and now - meta.get('stored_at', 0) > self.max_age
+
+    def _evict(self) -> None:
+        """Xóa entry hết hạn, sau đó xóa theo LRU cho tới khi nằm trong giới hạn."""
+        now = time.time()
+        for key in [k for k, meta in self._entries.items() if self._is_expired(meta, now)]:
+            self._drop(key)
+
+        if len(self._entries) <= self.max_entries and self._total_bytes <= self.max_bytes:
+            return
+        for key in sorted(self._entries, key=lambda k: self._entries[k].get('last_used', 0)):
+            if len(self._entries) <= self.max_entries and self._total_bytes <= self.max_bytes:
+                break
+            self._drop(key)
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        """
+        Lấy metadata của entry còn hạn cho url.
+
+        Returns:
+            Dict metadata (etag, last_modified, headers, ...) hoặc None nếu chưa có/hết hạn
+        """
+        key = _cache_key(url)
+        with self._lock:
+            meta = self._entries.get(key)
+            if meta is None:
+                return None
+            if self._is_expired(meta, time.time()):
+                self._drop(key)
+                return None
+            return dict(meta)
+
+    def conditional_headers(self, meta: Optional[Dict]) -> Dict[str, str]:
+        """Headers để revalidate entry với server."""
+        headers = {}
+        if meta:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def load(self, url: str) -> Optional[bytes]:
+        """
+        Đọc body đã lưu cho url (dùng khi server trả về 304) và đánh dấu là vừa dùng.
+
+        Returns:
+            Body dạng bytes, hoặc None nếu entry không còn trên đĩa
+        """
+        key = _cache_key(url)
+        with self._lock:
+            meta = self._entries.get(key)
+            if meta is None:
+                return None
+            try:
+                body = self._body_path(key).read_bytes()
+            except OSError:
+                self._drop(key)
+                return None
+            meta['last_used'] = time.time()
+            self._write_meta(key, meta)
+            self.stats['hits'] += 1
+            return body
+
+    def store(self, url: str, body: bytes, headers: Dict[str, str],
+              encoding: Optional[str] = None) -> None:
+        """
+        Ghi response vào cache. Response không có ETag/Last-Modified thì bỏ qua
+        vì không thể revalidate.
+
+        Args:
+            url: URL đã tải
+            body: Nội dung đã giải nén
+            headers: Headers của response
+            encoding: Encoding mà requests đã xác định từ headers
+        """
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+
+        key = _cache_key(url)
+        now = time.time()
+        meta = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'content_type': headers.get('Content-Type'),
+            'encoding': encoding,
+            'size': len(body),
+            'stored_at': now,
+            'last_used': now,
+        }
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries[key].get('size', 0)
+            tmp_path = self._body_path(key).with_suffix('.body.tmp')
+            tmp_path.write_bytes(body)
+            os.replace(tmp_path, self._body_path(key))
+            self._write_meta(key, meta)
+            self._entries[key] = meta
+            self._total_bytes += len(body)
+            self.stats['stored'] += 1
+            self._evict()
+
+    def read(self, url: str) -> Optional[Tuple[bytes, Dict]]:
+        """
+        Đọc body đã lưu cho url mà không revalidate với server và không tính vào
+        thống kê, dùng để trích xuất lại một corpus đã lưu mà không cần mạng.
+
+        Returns:
+            (body, metadata), hoặc None nếu url không có trong cache
+        """
+        key = _cache_key(url)
+        with self._lock:
+            meta = self._entries.get(key)
+            if meta is None:
+                return None
+            meta = dict(meta)
+        try:
+            return self._body_path(key).read_bytes(), meta
+        except OSError:
+            return None
+
+    def record_miss(self) -> None:
+        """Ghi nhận một lần phải tải toàn bộ nội dung."""
+        with self._lock:
+            self.stats['misses'] += 1
+
+    def summary(self) -> str:
+        """Chuỗi thống kê ngắn để in cuối lượt crawl."""
+        return (f"{self.stats['hits']} hit (304), {self.stats['misses']} miss, "
+                f"{len(self._entries)} entry / {self._total_bytes / 1024:.0f} KB trên đĩa")
+
+
+def open_archive(cache_dir: Union[str, Path]) -> HttpCache:
+    """
+    Mở thư mục cache như một corpus lưu trữ để trích xuất lại bằng HttpCache.read:
+    không entry nào bị xóa vì hết hạn hoặc vượt giới hạn dung lượng.
+    """
+    return HttpCache(cache_dir, max_entries=sys.maxsize, max_bytes=sys.maxsize, max_age=0)
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+HTTP client dùng chung cho các script crawl tarot.
+Giữ một requests.Session với connection pool (keep-alive), nén gzip/br
+và timeout/headers có thể cấu hình, để các lá bài dùng lại kết nối tới tarotoo.com.
+Có thể gắn thêm HttpCache (http_cache.py) để revalidate bằng ETag/Last-Modified
+và AdaptiveThrottle (throttle.py) để tự điều chỉnh tốc độ theo từng host.
+Lỗi kết nối/timeout và các status 408/429/5xx được thử lại với backoff lũy thừa có jitter,
+tôn trọng header Retry-After.
+"""
+
+import threading
+import time
+from typing import Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.request import ACCEPT_ENCODING
+
+from http_cache import HttpCache
+from throttle import DEFAULT_MAX_DELAY, RETRY_STATUSES, AdaptiveThrottle, backoff_delay, parse_retry_after
+
+# ACCEPT_ENCODING của urllib3 chỉ chứa các thuật toán giải nén được:
+# "gzip,deflate" và thêm "br" khi đã cài brotli/brotlicffi
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Encoding': ACCEPT_ENCODING,
+    'Connection': 'keep-alive',
+}
+
+# (connect timeout, read timeout) tính bằng giây
+DEFAULT_TIMEOUT: Tuple[float, float] = (10, 30)
+DEFAULT_POOL_SIZE = 16
+# Số lần thử lại tối đa cho mỗi request (không tính lần gửi đầu tiên)
+DEFAULT_RETRIES = 3
+
+# Lỗi mạng tạm thời, nên thử lại
+RETRY_EXCEPTIONS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+Timeout = Union[float, Tuple[float, float]]
+
+_config = {
+    'headers': dict(DEFAULT_HEADERS),
+    'timeout': DEFAULT_TIMEOUT,
+    'pool_size': DEFAULT_POOL_SIZE,
+    'retries': DEFAULT_RETRIES,
+}
+_session: Optional[requests.Session] = None
+_cache: Optional[HttpCache] = None
+_throttle: Optional[AdaptiveThrottle] = None
+_lock = threading.Lock()
+
+
+def create_session(headers: Optional[Dict[str, str]] = None,
+                   pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """
+    Tạo một Session mới với connection pool cho http và https.
+
+    Args:
+        headers: Headers mặc định cho mọi request (mặc định: DEFAULT_HEADERS)
+        pool_size: Số kết nối keep-alive tối đa giữ lại cho mỗi host
+    """
+    session = requests.Session()
+    session.headers.update(headers if headers is not None else DEFAULT_HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def configure(headers: Optional[Dict[str, str]] = None,
+              timeout: Optional[Timeout] = None,
+              pool_size: Optional[int] = None,
+              retries: Optional[int] = None) -> None:
+    """
+    Thay đổi cấu hình của client dùng chung.
+    Session hiện tại (nếu có) được đóng và tạo lại ở lần fetch tiếp theo.
+
+    Args:
+        headers: Headers bổ sung/ghi đè lên DEFAULT_HEADERS
+        timeout: Timeout mặc định, số giây hoặc (connect, read)
+        pool_size: Kích thước connection pool cho mỗi host
+        retries: Số lần thử lại khi lỗi tạm thời (0 để tắt)
+    """
+    global _session
+    with _lock:
+        if headers:
+            _config['headers'].update(headers)
+        if timeout is not None:
+            _config['timeout'] = timeout
+        if pool_size is not None:
+            _config['pool_size'] = pool_size
+        if retries is not None:
+            _config['retries'] = max(0, retries)
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def set_cache(cache: Optional[HttpCache]) -> None:
+    """Gắn (hoặc gỡ khi truyền None) cache trên đĩa cho client dùng chung."""
+    global _cache
+    _cache = cache
+
+
+def get_cache() -> Optional[HttpCache]:
+    """Cache đang được gắn, hoặc None."""
+    return _cache
+
+
+def set_throttle(throttle: Optional[AdaptiveThrottle]) -> None:
+    """Gắn (hoặc gỡ khi truyền None) bộ điều tốc thích ứng cho client dùng chung."""
+    global _throttle
+    _throttle = throttle
+
+
+def get_throttle() -> Optional[AdaptiveThrottle]:
+    """Bộ điều tốc đang được gắn, hoặc None."""
+    return _throttle
+
+
+def get_session() -> requests.Session:
+    """Lấy Session dùng chung, tạo mới nếu chưa có."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = create_session(_config['headers'], _config['pool_size'])
+        return _session
+
+
+def _response_from_cache(response: requests.Response, url: str, meta: Dict,
+                         body: bytes) -> requests.Response:
+    """Dựng response 200 từ body trên đĩa, dùng cho trường hợp server trả về 304."""
+    cached = requests.Response()
+    cached.status_code = 200
+    cached.reason = 'OK'
+    cached.url = url
+    cached.request = response.request
+    cached.elapsed = response.elapsed
+    cached.headers = CaseInsensitiveDict(response.headers)
+    if meta.get('content_type'):
+        cached.headers['Content-Type'] = meta['content_type']
+    cached.encoding = meta.get('encoding')
+    cached._content = body
+    cached.from_cache = True
+    return cached
+
+
+def _get_with_retries(url: str, timeout: Timeout, **kwargs) -> requests.Response:
+    """
+    GET qua Session dùng chung; lỗi mạng và status trong RETRY_STATUSES được thử lại
+    tối đa _config['retries'] lần. Response lỗi cuối cùng được trả về để nơi gọi
+    raise_for_status; Retry-After dài hơn DEFAULT_MAX_DELAY thì không chờ mà trả về luôn.
+    """
+    throttle = _throttle
+    retries = _config['retries']
+    attempt = 0
+    while True:
+        if throttle:
+            throttle.acquire(url)
+        try:
+            response = get_session().get(url, timeout=timeout, **kwargs)
+        except RETRY_EXCEPTIONS:
+            if throttle:
+                throttle.on_error(url)
+            if attempt >= retries:
+                raise
+            delay = throttle.retry_delay(attempt) if throttle else backoff_delay(attempt)
+        else:
+            retry_after = None
+            if response.status_code in RETRY_STATUSES:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if throttle:
+                throttle.on_response(url, response.status_code,
+                                     response.elapsed.total_seconds(), retry_after)
+            if (response.status_code not in RETRY_STATUSES or attempt >= retries
+                    or (retry_after or 0) > DEFAULT_MAX_DELAY):
+                return response
+            response.close()
+            delay = (throttle.retry_delay(attempt, retry_after) if throttle
+                     else backoff_delay(attempt, retry_after))
+        time.sleep(delay)
+        attempt += 1
+
+
+def fetch(url: str, timeout: Optional[Timeout] = None, use_cache: bool = True,
+          **kwargs) -> requests.Response:
+    """
+    Gửi GET request qua Session dùng chung (thử lại khi lỗi tạm thời) và kiểm tra status code.
+    Nếu đã gắn cache, request sẽ được revalidate và response 304 được trả về
+    như một response 200 với body lấy từ đĩa (thuộc tính from_cache = True).
+
+    Args:
+        url: URL cần tải
+        timeout: Ghi đè timeout mặc định cho request này
+        use_cache: Đặt False để bỏ qua cache cho request này
+        **kwargs: Các tham số khác truyền thẳng cho Session.get
+
+    Raises:
+        requests.exceptions.RequestException: Khi lỗi kết nối hoặc status code 4xx/5xx
+            (sau khi đã thử lại hết số lần cho phép)
+    """
+    cache = _cache if use_cache else None
+    meta = cache.lookup(url) if cache else None
+    headers = kwargs.pop('headers', None)
+    request_headers = dict(headers or {})
+    if meta:
+        request_headers.update(cache.conditional_headers(meta))
+
+    response = _get_with_retries(
+        url,
+        headers=request_headers,
+        timeout=timeout if timeout is not None else _config['timeout'],
+        **kwargs
+    )
+
+    if meta and response.status_code == 304:
+        body = cache.load(url)
+        if body is not None:
+            return _response_from_cache(response, url, meta, body)
+        # Entry vừa bị xóa khỏi đĩa: tải lại không kèm validator
+        return fetch(url, timeout=timeout, use_cache=False, headers=headers, **kwargs)
+
+    response.raise_for_status()
+    response.from_cache = False
+    if cache:
+        cache.record_miss()
+        cache.store(url, response.content, response.headers, response.encoding)
+    return response
+
+
+def fetch_stream(url: str, headers: Optional[Dict[str, str]] = None,
+                 timeout: Optional[Timeout] = None) -> requests.Response:
+    """
+    Gửi GET request dạng stream (body chưa được đọc) qua Session dùng chung,
+    không qua cache và không kiểm tra status code, để tải file lớn theo từng đoạn
+    (206/304/416 do nơi gọi xử lý). Dùng với `with` để trả kết nối về pool.
+    """
+    return get_session().get(
+        url,
+        headers=headers,
+        timeout=timeout if timeout is not None else _config['timeout'],
+        stream=True
+    )
+
+
+def close() -> None:
+    """Đóng Session dùng chung và giải phóng các kết nối đang giữ."""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Tải các ảnh trong tarotoo_src_list.txt và tạo các bản WebP/AVIF thu nhỏ theo
+nhiều chiều rộng (responsive), để client React dùng srcset thay vì ảnh gốc.
+Ảnh gốc được tải vào media_store (download_media.py), việc resize/encode chạy
+trên process pool ngay khi từng ảnh tải xong. Kết quả ghi vào
+image_assets/manifest.json: URL -> ảnh gốc, kích thước, các bản thu nhỏ và dung lượng.
+
+Cần Pillow (tùy chọn, xem requirements.txt); AVIF cần Pillow >= 11.2
+hoặc gói pillow-avif-plugin.
+"""
+
+import argparse
+import json
+import os
+import re
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+from async_crawl import crawl_concurrently
+from download_media import MediaStore, download_one
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+
+DEFAULT_WIDTHS = (160, 320, 640, 1024)
+DEFAULT_FORMATS = ('webp', 'avif')
+DEFAULT_QUALITY = 80
+
+# Ảnh raster resize được; SVG là ảnh vector nên chỉ lưu bản gốc
+RASTER_SUFFIXES = ('.jpg', '.jpeg', '.png', '.webp', '.gif')
+VECTOR_SUFFIXES = ('.svg',)
+
+SRC_LINE_RE = re.compile(r'^\s*\d+\.\s+(\S+)\s*$')
+
+
+def load_src_list(src_list_file: Path) -> List[str]:
+    """Các URL ảnh (raster và SVG, không trùng lặp) trong tarotoo_src_list.txt."""
+    urls = []
+    with open(src_list_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            match = SRC_LINE_RE.match(line)
+            if match:
+                urls.append(match.group(1))
+    suffixes = RASTER_SUFFIXES + VECTOR_SUFFIXES
+    return [url for url in dict.fromkeys(urls)
+            if Path(url.split('?', 1)[0]).suffix.lower() in suffixes]
+
+
+def available_formats(formats: Sequence[str]) -> List[str]:
+    """Các định dạng trong formats mà Pillow đang cài encode được."""
+    supported = []
+    for fmt in formats:
+        if fmt == 'avif' and not features.check('avif'):
+            try:
+                import pillow_avif  # noqa: F401  (đăng ký plugin AVIF cho Pillow cũ)
+            except ImportError:
+                print("⚠️  Pillow không hỗ trợ AVIF (cần Pillow >= 11.2 hoặc pillow-avif-plugin), bỏ qua AVIF")
+                continue
+        supported.append(fmt)
+    return supported
+
+
+def _target_widths(original_width: int, widths: Sequence[int]) -> List[int]:
+    """Các chiều rộng cần tạo, không phóng to ảnh quá kích thước gốc."""
+    targets = sorted({w for w in widths if w < original_width})
+    if not targets or max(widths) >= original_width:
+        targets.append(original_width)
+    return targets
+
+
+def make_variants(source_path: str, sha256: str, out_dir: str, widths: Sequence[int],
+                  formats: Sequence[str], quality: int = DEFAULT_QUALITY) -> Dict:
+    """
+    Tạo các bản thu nhỏ của một ảnh (chạy trong process con).
+    Tên file dựa trên sha256 của ảnh gốc nên bản đã tạo từ lần trước được giữ nguyên.
+
+    Args:
+        source_path: Đường dẫn ảnh gốc
+        sha256: sha256 của ảnh gốc
+        out_dir: Thư mục ghi các bản thu nhỏ
+        widths: Các chiều rộng mong muốn (px)
+        formats: Các định dạng output ('webp', 'avif')
+        quality: Chất lượng nén (0-100)
+
+    Returns:
+        Dict {width, height, variants: [{format, width, height, path, bytes}]}
+    """
+    if 'avif' in formats and not features.check('avif'):
+        import pillow_avif  # noqa: F401
+
+    out_dir = Path(out_dir)
+    variants = []
+    with Image.open(source_path) as image:
+        image.seek(0)
+        original_width, original_height = image.size
+        if image.mode not in ('RGB', 'RGBA'):
+            has_alpha = image.mode in ('LA', 'PA') or 'transparency' in image.info
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+
+        for width in _target_widths(original_width, widths):
+            height = max(1, round(original_height * width / original_width))
+            resized = None
+            for fmt in formats:
+                path = out_dir / sha256[:2] / f"{sha256[:16]}-{width}w.{fmt}"
+                if not path.exists():
+                    if resized is None:
+                        resized = image if width == original_width else \
+                            image.resize((width, height), Image.LANCZOS)
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    tmp_path = path.with_name(path.name + '.tmp')
+                    resized.save(tmp_path, format=fmt.upper(), quality=quality)
+                    os.replace(tmp_path, path)
+                variants.append({
+                    'format': fmt,
+                    'width': width,
+                    'height': height,
+                    'path': path.relative_to(out_dir).as_posix(),
+                    'bytes': path.stat().st_size,
+                })
+
+    return {'width': original_width, 'height': original_height, 'variants': variants}
+
+
+def parse_args():
+    """Đọc tham số dòng lệnh."""
+    parser = argparse.ArgumentParser(description='Tạo ảnh responsive WebP/AVIF từ tarotoo_src_list.txt')
+    parser.add_argument('--input', type=Path, default=None,
+                        help='File danh sách src (mặc định: tarotoo_src_list.txt cạnh script)')
+    parser.add_argument('--store', type=Path, default=None,
+                        help='Thư mục lưu ảnh gốc (mặc định: media_store cạnh script)')
+    parser.add_argument('--output', type=Path, default=None,
+                        help='Thư mục ghi ảnh thu nhỏ và manifest (mặc định: image_assets cạnh script)')
+    parser.add_argument('--widths', type=lambda s: [int(w) for w in s.split(',')],
+                        default=list(DEFAULT_WIDTHS),
+                        help='Các chiều rộng, phân cách bằng dấu phẩy (mặc định: 160,320,640,1024)')
+    parser.add_argument('--formats', type=lambda s: s.split(','), default=list(DEFAULT_FORMATS),
+                        help='Các định dạng output (mặc định: webp,avif)')
+    parser.add_argument('--quality', type=int, default=DEFAULT_QUALITY,
+                        help='Chất lượng nén 0-100 (mặc định: 80)')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='Số ảnh tải cùng lúc (mặc định: 4)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Số process resize/encode (mặc định: số CPU)')
+    return parser.parse_args()
+
+
+def main():
+    """Tải ảnh, tạo các bản thu nhỏ và ghi manifest."""
+    args = parse_args()
+    if Image is None:
+        print("❌ Cần cài Pillow: pip install Pillow")
+        return
+
+    script_dir = Path(__file__).parent
+    src_list_file = args.input or script_dir / 'tarotoo_src_list.txt'
+    store = MediaStore(args.store or script_dir / 'media_store')
+    out_dir = args.output or script_dir / 'image_assets'
+    out_dir.mkdir(parents=True, exist_ok=True)
+    formats = available_formats(args.formats)
+
+    urls = load_src_list(src_list_file)
+    print(f"📋 Tìm thấy {len(urls)} ảnh trong {src_list_file}")
+    print(f"🖼️  Chiều rộng: {', '.join(map(str, args.widths))} px, định dạng: {', '.join(formats)}\n")
+
+    manifest: Dict[str, Dict] = {}
+    futures: Dict[str, Future] = {}
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        def on_download(_, result: Dict) -> None:
+            # Gửi ảnh sang process pool ngay khi tải xong, song song với các ảnh đang tải
+            url = result['url']
+            if result['status'] == 'error':
+                manifest[url] = {'status': 'error', 'error': result['error']}
+                return
+            entry = store.entry(url)
+            manifest[url] = {
+                'status': 'success',
+                'sha256': entry['sha256'],
+                'bytes': entry['size'],
+                'original': entry['path'],
+                'variants': [],
+            }
+            if Path(entry['path']).suffix.lower() in RASTER_SUFFIXES:
+                futures[url] = pool.submit(make_variants, str(store.root / entry['path']),
+                                           entry['sha256'], str(out_dir), args.widths, formats,
+                                           args.quality)
+
+        jobs = [(url, download_one, (url, store)) for url in urls]
+        crawl_concurrently(jobs, concurrency=args.concurrency, rps=0, on_result=on_download)
+
+        for url, future in futures.items():
+            try:
+                manifest[url].update(future.result())
+            except Exception as e:
+                print(f"❌ Error: Không thể xử lý ảnh {url}: {e}")
+                manifest[url].update({'status': 'error', 'error': str(e)})
+
+    # Giữ thứ tự như trong danh sách src
+    manifest = {url: manifest[url] for url in urls if url in manifest}
+    manifest_path = out_dir / 'manifest.json'
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    ok = [m for m in manifest.values() if m['status'] == 'success']
+    original_bytes = sum(m['bytes'] for m in ok if m['variants'])
+    smallest_bytes = sum(min(v['bytes'] for v in m['variants']) for m in ok if m['variants'])
+    print(f"\n📊 Thống kê:")
+    print(f"   ✅ Thành công: {len(ok)}/{len(urls)}")
+    print(f"   🖼️  Bản thu nhỏ: {sum(len(m['variants']) for m in ok)}")
+    if original_bytes:
+        print(f"   📦 Ảnh gốc: {original_bytes / 1024:.0f} KB, bản nhỏ nhất: {smallest_bytes / 1024:.0f} KB")
+    print(f"\n✨ Manifest: {manifest_path}")
+
+
+if __name__ == '__main__':
+    main()
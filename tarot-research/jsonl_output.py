@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Ghi kết quả crawl dạng JSONL (mỗi lá bài một dòng) ngay khi crawl xong,
+để có thể chạy tiếp (resume) sau khi bị dừng giữa chừng và không phải giữ
+toàn bộ kết quả trong bộ nhớ. Bước finalize chuyển JSONL về file JSON dạng mảng
+giống hệt output cũ (json.dump(..., ensure_ascii=False, indent=2)).
+"""
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Set, Union
+
+PathLike = Union[str, Path]
+
+# Khoảng trắng giữa các token JSON
+_JSON_WS_RE = re.compile(r'[ \t\n\r]*')
+
+# Phần còn lại của buffer có thể vẫn thuộc về một số JSON
+_JSON_NUMBER_TAIL_RE = re.compile(r'[0-9.eE+-]*')
+
+
+class JsonlWriter:
+    """
+    Ghi từng record thành một dòng JSON, flush sau mỗi dòng (checkpoint).
+
+    Dùng với `with`:
+        with JsonlWriter(path) as writer:
+            writer.write(result)
+    """
+
+    def __init__(self, path: PathLike, append: bool = True, fsync: bool = False):
+        """
+        Args:
+            path: Đường dẫn file .jsonl
+            append: True để ghi tiếp vào file cũ (resume), False để ghi lại từ đầu
+            fsync: True để ép ghi xuống đĩa sau mỗi record (chậm hơn, an toàn khi mất điện)
+        """
+        self.path = Path(path)
+        self.fsync = fsync
+        self.count = 0
+
+        needs_newline = False
+        if append and self.path.exists() and self.path.stat().st_size > 0:
+            # Dòng cuối có thể bị ghi dở khi process bị kill: tách nó ra dòng riêng
+            with open(self.path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b'\n'
+
+        self._file = open(self.path, 'a' if append else 'w', encoding='utf-8')
+        if needs_newline:
+            self._file.write('\n')
+
+    def write(self, record: Dict) -> None:
+        """Ghi một record và flush ngay."""
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write('\n')
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.count += 1
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> 'JsonlWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def iter_jsonl(path: PathLike) -> Iterator[Dict]:
+    """Đọc lần lượt các record trong file JSONL, bỏ qua dòng rỗng hoặc bị ghi dở."""
+    path = Path(path)
+    if not path.exists():
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def load_completed_keys(path: PathLike, key: str = 'cardId',
+                        retry_statuses: Iterable[str] = ('error',)) -> Set[Any]:
+    """
+    Lấy tập các key (vd. cardId) đã có trong file JSONL để bỏ qua khi resume.
+    Record có status nằm trong retry_statuses không được tính, để lần chạy sau crawl lại.
+    Nếu một key xuất hiện nhiều lần, record ghi sau cùng được dùng.
+    """
+    retry_statuses = set(retry_statuses)
+    latest_status: Dict[Any, Optional[str]] = {}
+    for record in iter_jsonl(path):
+        if key in record:
+            latest_status[record[key]] = record.get('status')
+    return {k for k, status in latest_status.items() if status not in retry_statuses}
+
+
+def _index_offsets(path: Path, key: str) -> Dict[Any, int]:
+    """Vị trí byte của record cuối cùng cho mỗi key (giữ thứ tự xuất hiện lần đầu)."""
+    offsets: Dict[Any, int] = {}
+    with open(path, 'rb') as f:
+        while True:
+            offset = f.tell()
+            line = f.readline()
+            if not line:
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and key in record:
+                offsets[record[key]] = offset
+    return offsets
+
+
+def finalize_jsonl(jsonl_path: PathLike, json_path: PathLike, key: str = 'cardId',
+                   order: Optional[Iterable[Any]] = None,
+                   on_record: Optional[Callable[[Dict], None]] = None) -> int:
+    """
+    Chuyển file JSONL thành file JSON dạng mảng, cùng định dạng với
+    json.dump(results, f, ensure_ascii=False, indent=2).
+    Chỉ giữ trong bộ nhớ vị trí của từng record, không giữ cả nội dung.
+
+    Args:
+        jsonl_path: File JSONL nguồn
+        json_path: File JSON đích
+        key: Trường dùng để khử trùng lặp (record ghi sau cùng được giữ)
+        order: Thứ tự các key mong muốn (vd. thứ tự lá bài trong file input);
+               các key không có trong order được xếp sau, theo thứ tự xuất hiện
+        on_record: Hàm được gọi với từng record đã ghi (vd. để đếm thống kê)
+
+    Returns:
+        Số record đã ghi vào file JSON
+    """
+    return write_json_array(json_path, iter_latest_records(jsonl_path, key, order),
+                            on_record=on_record)
+
+
+def iter_latest_records(jsonl_path: PathLike, key: str = 'cardId',
+                        order: Optional[Iterable[Any]] = None) -> Iterator[Dict]:
+    """
+    Lần lượt record ghi sau cùng của mỗi key trong file JSONL, theo thứ tự order
+    (các key không có trong order được xếp sau, theo thứ tự xuất hiện).
+    Chỉ giữ trong bộ nhớ vị trí của từng record.
+    """
+    jsonl_path = Path(jsonl_path)
+    offsets = _index_offsets(jsonl_path, key) if jsonl_path.exists() else {}
+    if not offsets:
+        return
+
+    seen = set()
+    with open(jsonl_path, 'rb') as src:
+        for k in list(order or []) + list(offsets):
+            if k in offsets and k not in seen:
+                seen.add(k)
+                src.seek(offsets[k])
+                yield json.loads(src.readline())
+
+
+def write_json_array(json_path: PathLike, records: Iterable[Dict],
+                     on_record: Optional[Callable[[Dict], None]] = None) -> int:
+    """
+    Ghi lần lượt các record thành file JSON dạng mảng, cùng định dạng với
+    json.dump(records, f, ensure_ascii=False, indent=2), không cần giữ cả mảng trong bộ nhớ.
+    Ghi ra file tạm rồi đổi tên.
+
+    Returns:
+        Số record đã ghi
+    """
+    count = 0
+    tmp_path = Path(json_path).with_suffix('.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as out:
+        out.write('[')
+        for record in records:
+            text = json.dumps(record, ensure_ascii=False, indent=2)
+            out.write(',\n' if count else '\n')
+            out.write('\n'.join('  ' + line for line in text.split('\n')))
+            if on_record:
+                on_record(record)
+            count += 1
+        out.write('\n]' if count else ']')
+    os.replace(tmp_path, json_path)
+    return count
+
+
+def iter_json_array(json_path: PathLike, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """
+    Đọc lần lượt các phần tử của file JSON dạng mảng (như file write_json_array ghi ra)
+    mà không json.load cả mảng: chỉ giữ trong bộ nhớ phần tử đang đọc và phần file đã đọc
+    nhưng chưa dùng (khoảng chunk_size ký tự).
+
+    Raises:
+        ValueError: File không phải mảng JSON hợp lệ
+    """
+    decoder = json.JSONDecoder()
+    # '[': chờ mở mảng, 'first': phần tử đầu hoặc ']', 'value': phần tử sau ',', 'next': ',' hoặc ']'
+    state = '['
+    buffer, pos, eof = '', 0, False
+    with open(json_path, 'r', encoding='utf-8') as f:
+        while True:
+            pos = _JSON_WS_RE.match(buffer, pos).end()
+            if pos == len(buffer):
+                if eof:
+                    raise ValueError(f"{json_path}: không phải mảng JSON hoặc mảng chưa đóng")
+                buffer, pos = f.read(chunk_size), 0
+                eof = not buffer
+                continue
+
+            char = buffer[pos]
+            if state == '[':
+                if char != '[':
+                    raise ValueError(f"{json_path}: không phải mảng JSON")
+                state, pos = 'first', pos + 1
+            elif state == 'next' or (state == 'first' and char == ']'):
+                if char == ']':
+                    return
+                if char != ',':
+                    raise ValueError(f"{json_path}: thiếu ',' hoặc ']' sau một phần tử")
+                state, pos = 'value', pos + 1
+            else:
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                    # Số ở cuối phần đã đọc có thể còn phần chưa đọc tới ("1." + "5e3")
+                    complete = eof or not (_JSON_NUMBER_TAIL_RE.fullmatch(buffer, end)
+                                           if isinstance(item, (int, float)) else end == len(buffer))
+                except ValueError:
+                    if eof:
+                        raise
+                    complete = False
+                if not complete:
+                    # Phần tử chưa đọc hết: đọc thêm ít nhất bằng phần đang có, để tổng thời gian
+                    # decode lại vẫn tuyến tính theo kích thước phần tử
+                    more = f.read(max(chunk_size, len(buffer) - pos))
+                    eof = not more
+                    buffer, pos = buffer[pos:] + more, 0
+                    continue
+                yield item
+                state, pos = 'next', end
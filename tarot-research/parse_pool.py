@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Pipeline hai tầng cho crawl: tầng tải (thread, I/O mạng hoặc đọc cache) và
+tầng parse (process pool, CPU). Các thread tải đẩy body thô vào một queue có
+giới hạn, process pool chạy extractor trên nhiều core cùng lúc.
+Khi queue đầy, tầng tải phải chờ (backpressure), nên số body nằm trong bộ nhớ
+luôn bị chặn bởi queue_size + số job đang parse, bất kể corpus lớn cỡ nào.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import crawl_metrics
+from async_crawl import crawl_concurrently
+
+# Mỗi job là (url, tham số cho hàm parse/on_error)
+ParseJob = Tuple[str, Sequence[Any]]
+
+# Đánh dấu tầng tải đã xong
+_DONE = object()
+
+
+def _timed_parse(parse: Callable[..., Any], body: Any, *args: Any) -> Tuple[Any, float, Dict]:
+    """
+    Chạy parse trong process con, trả về kèm thời gian chạy (giây) và record metrics
+    (các giai đoạn, bộ đếm) mà parse ghi trong process con.
+    """
+    record = crawl_metrics.new_page_record()
+    start = time.perf_counter()
+    with crawl_metrics.attach(record):
+        result = parse(body, *args)
+    return result, time.perf_counter() - start, record
+
+
+def _merge_child_record(child: Dict) -> None:
+    """Ghi các giai đoạn và bộ đếm đo trong process con vào metrics (và trang) hiện tại."""
+    metrics = crawl_metrics.get_metrics()
+    for name, seconds in child['stages'].items():
+        metrics.observe_stage(name, seconds)
+    for name, value in child.items():
+        if name not in ('url', 'status', 'stages'):
+            metrics.count(name, value)
+
+
+def _fetch_stage(jobs: List[ParseJob], fetch: Callable[[str], Any], body_queue: queue.Queue,
+                 concurrency: int, rps: float, errors: List[BaseException],
+                 pages: List[Dict], started: List[float]) -> None:
+    """Tải lần lượt các job và đẩy (vị trí job, body, lỗi) vào queue."""
+    def fetch_one(index: int, url: str) -> Tuple[int, Any, Optional[Exception]]:
+        started[index] = time.perf_counter()
+        # Giai đoạn fetch, số byte... được ghi vào record của trang
+        with crawl_metrics.attach(pages[index]):
+            try:
+                return index, fetch(url), None
+            except Exception as e:
+                return index, None, e
+
+    try:
+        # put() chặn event loop khi queue đầy: không job tải mới nào được bắt đầu
+        # cho tới khi tầng parse lấy bớt body ra
+        crawl_concurrently([(url, fetch_one, (i, url)) for i, (url, _) in enumerate(jobs)],
+                           concurrency=concurrency, rps=rps,
+                           on_result=lambda _, item: body_queue.put(item))
+    except BaseException as e:
+        errors.append(e)
+    finally:
+        body_queue.put(_DONE)
+
+
+def parse_concurrently(jobs: List[ParseJob],
+                       fetch: Callable[[str], Any],
+                       parse: Callable[..., Any],
+                       on_error: Callable[..., Any],
+                       on_result: Callable[[int, Any], None],
+                       workers: Optional[int] = None,
+                       queue_size: int = 16,
+                       concurrency: int = 8,
+                       rps: float = 4.0,
+                       reuse: Optional[Callable[[int, Any], Any]] = None) -> None:
+    """
+    Tải và parse song song: fetch chạy trên thread, parse chạy trên process pool.
+
+    Args:
+        jobs: List các (url, tham số). url được truyền cho fetch
+        fetch: Hàm tải body của url (vd. http_client.fetch(url).content), chạy trên thread
+        parse: Hàm parse(body, *tham số) -> kết quả, chạy trong process con nên phải
+               là hàm cấp module và body/kết quả phải pickle được
+        on_error: Hàm on_error(*tham số, lỗi) -> kết quả, gọi khi fetch hoặc parse lỗi
+        on_result: Hàm gọi với (vị trí job, kết quả) ngay khi có kết quả,
+                   luôn trên thread gọi parse_concurrently (ghi file an toàn)
+        workers: Số process parse (mặc định: số CPU)
+        queue_size: Số body đã tải tối đa đang chờ parse
+        concurrency: Số request tải cùng lúc
+        rps: Số request/giây tối đa cho mỗi host (<= 0 để bỏ giới hạn, vd. khi đọc cache)
+        reuse: Hàm reuse(vị trí job, body) -> kết quả có sẵn hoặc None, gọi trước khi
+               gửi sang process pool để bỏ qua việc parse các trang không đổi
+
+    Mỗi job được ghi một record trang trong crawl_metrics như crawl_metrics.page ở chế độ
+    tuần tự: các giai đoạn và bộ đếm của fetch, reuse và parse (đo trong process con rồi
+    gửi về), status của kết quả (nếu là dict có 'status') và tổng thời gian từ lúc bắt đầu tải.
+    """
+    if not jobs:
+        return
+
+    workers = max(1, workers or os.cpu_count() or 1)
+    body_queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+    errors: List[BaseException] = []
+    pages = [crawl_metrics.new_page_record(url) for url, _ in jobs]
+    started = [time.perf_counter()] * len(jobs)
+    producer = threading.Thread(target=_fetch_stage,
+                                args=(jobs, fetch, body_queue, max(1, concurrency), rps, errors,
+                                      pages, started),
+                                daemon=True)
+    producer.start()
+
+    # Mỗi process giữ tối đa 2 job (1 đang chạy, 1 chờ sẵn)
+    max_pending = workers * 2
+    pending = {}
+
+    def finish(index: int, result: Any) -> None:
+        record = pages[index]
+        if isinstance(result, dict):
+            record['status'] = result.get('status')
+        record['total'] = round(time.perf_counter() - started[index], 6)
+        crawl_metrics.get_metrics().add_page(record)
+        on_result(index, result)
+
+    def deliver(done) -> None:
+        for future in done:
+            index = pending.pop(future)
+            args = jobs[index][1]
+            try:
+                result, seconds, child = future.result()
+                with crawl_metrics.attach(pages[index]):
+                    crawl_metrics.get_metrics().observe_stage('worker', seconds)
+                    _merge_child_record(child)
+            except Exception as e:
+                result = on_error(*args, e)
+            finish(index, result)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            item = body_queue.get()
+            if item is _DONE:
+                break
+            index, body, error = item
+            if error is not None:
+                finish(index, on_error(*jobs[index][1], error))
+                continue
+            with crawl_metrics.attach(pages[index]):
+                reused = reuse(index, body) if reuse else None
+            if reused is not None:
+                finish(index, reused)
+                continue
+            if len(pending) >= max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                deliver(done)
+            pending[pool.submit(_timed_parse, parse, body, *jobs[index][1])] = index
+            deliver([future for future in pending if future.done()])
+
+        done, _ = wait(pending)
+        deliver(done)
+
+    producer.join()
+    if errors:
+        raise errors[0]
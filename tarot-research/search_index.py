@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Dựng index tìm kiếm toàn văn (inverted index) cho nội dung lá bài sau bước
+crawl_tarot_content, để client chỉ tải vài shard nhỏ thay vì quét toàn bộ blocks.
+
+Chuẩn hóa (client phải làm giống hệt để tra cứu):
+    - bỏ thẻ HTML, giải entity, chữ thường
+    - bỏ dấu tiếng Việt (NFD rồi bỏ dấu kết hợp, "đ" -> "d"): "tình yêu" khớp "tinh yeu"
+    - bỏ sở hữu cách tiếng Anh ("fool's" -> "fool") và dấu nháy trong từ ("don't" -> "dont")
+    - tách token theo chữ/số; vị trí là thứ tự token trong block (kể cả stopword),
+      stopword không được index nhưng vẫn chiếm vị trí để tìm cụm từ chính xác
+
+Output (thư mục search_index):
+    manifest.json   phiên bản, quy tắc shard, stopword, số block, các lá bài và shard -> số byte
+    <shard>.json    term -> [[cardId, block index, [vị trí, khoảng cách tới vị trí trước, ...]], ...]
+                    shard là prefix_length ký tự đầu của term (a-z0-9), còn lại vào shard "_"
+
+Chạy:
+    python search_index.py build                       # tarot_cards_content.json -> search_index/
+    python search_index.py build --input tarot_cards_content.db --prefix-length 1
+    python search_index.py query "new beginnings"
+    python search_index.py query '"wheel of fortune"' --by-card
+"""
+
+import argparse
+import html
+import json
+import math
+import os
+import re
+import unicodedata
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from bulk_export import iter_records
+
+INDEX_VERSION = 1
+DEFAULT_PREFIX_LENGTH = 2
+MANIFEST_NAME = 'manifest.json'
+MISC_SHARD = '_'
+
+TAG_RE = re.compile(r'<[^>]*>')
+POSSESSIVE_RE = re.compile(r"['’]s\b")
+APOSTROPHE_RE = re.compile(r"['’]")
+# Dấu thanh/dấu phụ sau khi tách NFD (sắc, huyền, hỏi, ngã, nặng, mũ, móc, trăng...)
+COMBINING_MARK_RE = re.compile('[\u0300-\u036f]')
+TOKEN_RE = re.compile(r'[^\W_]+')
+SHARD_KEY_RE = re.compile(r'[a-z0-9]+')
+QUERY_PART_RE = re.compile(r'"([^"]*)"|([^\s"]+)')
+
+# Từ quá phổ biến trong tiếng Anh: postings rất dài mà gần như không giúp lọc kết quả
+STOPWORDS = frozenset(
+    'a an and are as at be but by for from has have he her his in into is it its of on or '
+    'she so than that the their them then there these they this to was were will with you your'.split()
+)
+
+# (cardId, block index) -> vị trí các token trong block
+Posting = Tuple[int, int, List[int]]
+
+
+def normalize(text: str) -> str:
+    """Chữ thường, bỏ dấu tiếng Việt và dấu nháy trong từ tiếng Anh."""
+    text = text.lower()
+    if not text.isascii():
+        text = text.replace('đ', 'd')
+        text = COMBINING_MARK_RE.sub('', unicodedata.normalize('NFD', text))
+    return APOSTROPHE_RE.sub('', POSSESSIVE_RE.sub('', text))
+
+
+def tokenize(text: str) -> List[str]:
+    """Các token đã chuẩn hóa theo thứ tự xuất hiện (kể cả stopword)."""
+    return TOKEN_RE.findall(normalize(text))
+
+
+def block_text(block_html: str) -> str:
+    """Text của một block đã sanitize (thẻ được thay bằng khoảng trắng để không dính chữ)."""
+    return html.unescape(TAG_RE.sub(' ', block_html))
+
+
+def shard_key(term: str, prefix_length: int = DEFAULT_PREFIX_LENGTH) -> str:
+    """Tên shard chứa term."""
+    prefix = term[:prefix_length]
+    return prefix if SHARD_KEY_RE.fullmatch(prefix) else MISC_SHARD
+
+
+def _encode_positions(positions: List[int]) -> List[int]:
+    return [positions[0]] + [b - a for a, b in zip(positions, positions[1:])]
+
+
+def _decode_positions(deltas: List[int]) -> List[int]:
+    positions = []
+    total = 0
+    for delta in deltas:
+        total += delta
+        positions.append(total)
+    return positions
+
+
+def build_index(records: Iterable[Dict]) -> Tuple[Dict[str, List[Posting]], Dict[str, Dict]]:
+    """
+    Dựng inverted index từ các record của tarot_cards_content.
+
+    Returns:
+        (term -> postings theo thứ tự lá bài/block, cardId -> {'url', 'blocks'})
+    """
+    postings: Dict[str, List[Posting]] = defaultdict(list)
+    cards: Dict[str, Dict] = {}
+    for record in records:
+        cards[str(record['cardId'])] = {'url': record['url'], 'blocks': len(record['blocks'])}
+        for block in record['blocks']:
+            positions: Dict[str, List[int]] = defaultdict(list)
+            for position, term in enumerate(tokenize(block_text(block['html']))):
+                if term not in STOPWORDS:
+                    positions[term].append(position)
+            for term, term_positions in positions.items():
+                postings[term].append((record['cardId'], block['index'], term_positions))
+    return postings, cards
+
+
+def _previous_shards(out_dir: Path) -> List[str]:
+    """Tên file shard trong manifest của lần dựng trước (rỗng nếu chưa có hoặc không đọc được)."""
+    try:
+        with open(out_dir / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+            return [f'{key}.json' for key in json.load(f).get('shards', {})]
+    except (OSError, ValueError, AttributeError):
+        return []
+
+
+def write_index(postings: Dict[str, List[Posting]], cards: Dict[str, Dict], out_dir: Path,
+                prefix_length: int = DEFAULT_PREFIX_LENGTH) -> Dict:
+    """
+    Ghi các shard rồi manifest.json (JSON gọn), sau đó mới xóa các shard của lần dựng trước
+    không còn dùng. Chỉ xóa file có tên trong manifest cũ, nên out_dir có thể chứa file khác.
+    Trả về manifest.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    previous = _previous_shards(out_dir)
+    shards: Dict[str, Dict[str, List]] = defaultdict(dict)
+    for term in sorted(postings):
+        shards[shard_key(term, prefix_length)][term] = [
+            [card_id, block_index, _encode_positions(positions)]
+            for card_id, block_index, positions in postings[term]
+        ]
+
+    manifest = {
+        'version': INDEX_VERSION,
+        'prefix_length': prefix_length,
+        'stopwords': sorted(STOPWORDS),
+        'total_blocks': sum(card['blocks'] for card in cards.values()),
+        'cards': cards,
+        'shards': {},
+    }
+    for key, terms in sorted(shards.items()):
+        path = out_dir / f'{key}.json'
+        data = json.dumps(terms, ensure_ascii=False, separators=(',', ':'))
+        path.write_text(data, encoding='utf-8')
+        manifest['shards'][key] = len(data.encode('utf-8'))
+
+    tmp_path = out_dir / (MANIFEST_NAME + '.tmp')
+    tmp_path.write_text(json.dumps(manifest, ensure_ascii=False, separators=(',', ':')), encoding='utf-8')
+    os.replace(tmp_path, out_dir / MANIFEST_NAME)
+
+    # Shard của lần dựng trước không còn term nào: xóa sau khi manifest mới đã thay thế,
+    # để manifest không bao giờ trỏ tới shard đã bị xóa
+    keep = {f'{key}.json' for key in manifest['shards']}
+    for name in previous:
+        if name not in keep and name != MANIFEST_NAME:
+            try:
+                (out_dir / name).unlink()
+            except FileNotFoundError:
+                pass
+    return manifest
+
+
+def parse_query(query: str) -> List[List[Tuple[str, int]]]:
+    """
+    Tách câu truy vấn thành các nhóm (term, vị trí tương đối) đã bỏ stopword.
+    Cụm trong ngoặc kép là một nhóm (phải đứng liền nhau), mỗi từ ngoài ngoặc là một nhóm riêng.
+    """
+    groups = []
+    for match in QUERY_PART_RE.finditer(query):
+        phrase, word = match.groups()
+        tokens = tokenize(phrase if phrase is not None else word)
+        if phrase is not None:
+            group = [(term, offset) for offset, term in enumerate(tokens) if term not in STOPWORDS]
+            if group:
+                groups.append(group)
+        else:
+            groups.extend([(term, 0)] for term in tokens if term not in STOPWORDS)
+    return groups
+
+
+class SearchIndex:
+    """Đọc index đã dựng, chỉ tải shard của các term có trong truy vấn."""
+
+    def __init__(self, index_dir: Path):
+        self.index_dir = Path(index_dir)
+        with open(self.index_dir / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('version') != INDEX_VERSION:
+            raise ValueError(f"Không hỗ trợ phiên bản index {self.manifest.get('version')}")
+        self.prefix_length = self.manifest['prefix_length']
+        self._shards: Dict[str, Dict[str, List]] = {}
+
+    def _shard(self, key: str) -> Dict[str, List]:
+        shard = self._shards.get(key)
+        if shard is None:
+            shard = {}
+            if key in self.manifest['shards']:
+                with open(self.index_dir / f'{key}.json', 'r', encoding='utf-8') as f:
+                    shard = json.load(f)
+            self._shards[key] = shard
+        return shard
+
+    @property
+    def loaded_bytes(self) -> int:
+        """Tổng kích thước các shard đã tải."""
+        return sum(self.manifest['shards'].get(key, 0) for key in self._shards)
+
+    def postings(self, term: str) -> List[Posting]:
+        """Postings của một term đã chuẩn hóa (vị trí đã giải mã)."""
+        return [(card_id, block_index, _decode_positions(deltas))
+                for card_id, block_index, deltas in self._shard(shard_key(term, self.prefix_length)).get(term, [])]
+
+    def expand_prefix(self, prefix: str) -> List[str]:
+        """Các term bắt đầu bằng prefix (vd. để gợi ý khi đang gõ)."""
+        head = prefix[:self.prefix_length]
+        if SHARD_KEY_RE.fullmatch(head):
+            keys = [key for key in self.manifest['shards'] if key != MISC_SHARD and key.startswith(head)]
+        else:
+            keys = [MISC_SHARD]
+        return sorted(term for key in keys for term in self._shard(key) if term.startswith(prefix))
+
+    def _match_group(self, group: List[Tuple[str, int]],
+                     prefix: bool) -> Dict[Tuple[int, int], Tuple[float, List[int]]]:
+        """(cardId, block) -> (điểm, vị trí khớp) của các block chứa cả nhóm."""
+        total = self.manifest['total_blocks']
+        per_term = []
+        for term, offset in group:
+            terms = self.expand_prefix(term) if prefix else [term]
+            merged: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+            weight = 0.0
+            for expanded in terms:
+                found = self.postings(expanded)
+                for card_id, block_index, positions in found:
+                    merged[(card_id, block_index)].extend(positions)
+                weight = max(weight, math.log(1 + total / len(found)) if found else 0.0)
+            per_term.append((offset, weight, merged))
+
+        first_offset, _, first = per_term[0]
+        results = {}
+        for doc in set(first).intersection(*(merged for _, _, merged in per_term[1:])):
+            if len(per_term) > 1:
+                # Cụm từ: mọi term phải nằm đúng khoảng cách so với term đầu tiên
+                others = [(offset, set(merged[doc])) for offset, _, merged in per_term[1:]]
+                starts = [p - first_offset for p in first[doc]
+                          if all(p - first_offset + offset in positions for offset, positions in others)]
+                if not starts:
+                    continue
+                positions = sorted({start + offset for start in starts for offset, _, _ in per_term})
+                score = sum(weight for _, weight, _ in per_term) * (1 + math.log(len(starts)))
+            else:
+                positions = sorted(first[doc])
+                score = per_term[0][1] * (1 + math.log(len(positions)))
+            results[doc] = (score, positions)
+        return results
+
+    def search(self, query: str, limit: int = 20, by_card: bool = False,
+               prefix: bool = False) -> List[Dict]:
+        """
+        Tìm các block chứa mọi từ/cụm từ trong truy vấn, xếp theo điểm tf-idf.
+
+        Args:
+            query: Câu truy vấn; cụm trong ngoặc kép phải khớp liền nhau
+            limit: Số kết quả tối đa
+            by_card: Chỉ giữ block có điểm cao nhất của mỗi lá bài
+            prefix: Từ cuối cùng được khớp như tiền tố (tìm khi đang gõ)
+
+        Returns:
+            List các {'cardId', 'block', 'score', 'positions'}, vị trí là thứ tự token trong block
+        """
+        groups = parse_query(query)
+        if not groups:
+            return []
+        matches = None
+        for i, group in enumerate(groups):
+            found = self._match_group(group, prefix and i == len(groups) - 1 and len(group) == 1)
+            if matches is None:
+                matches = found
+            else:
+                matches = {doc: (matches[doc][0] + score, sorted(set(matches[doc][1]) | set(positions)))
+                           for doc, (score, positions) in found.items() if doc in matches}
+            if not matches:
+                return []
+
+        hits = sorted(({'cardId': card_id, 'block': block_index, 'score': round(score, 4),
+                        'positions': positions}
+                       for (card_id, block_index), (score, positions) in matches.items()),
+                      key=lambda hit: (-hit['score'], hit['cardId'], hit['block']))
+        if by_card:
+            seen = set()
+            hits = [hit for hit in hits if not (hit['cardId'] in seen or seen.add(hit['cardId']))]
+        return hits[:limit]
+
+
+def parse_args():
+    """Đọc tham số dòng lệnh."""
+    script_dir = Path(__file__).parent
+    parser = argparse.ArgumentParser(description='Dựng và tra cứu index tìm kiếm nội dung lá bài')
+    sub = parser.add_subparsers(dest='command')
+    sub.required = True
+
+    p = sub.add_parser('build', help='Dựng index từ kết quả crawl_tarot_content')
+    p.add_argument('--input', type=Path, default=script_dir / 'tarot_cards_content.json',
+                   help='tarot_cards_content.json, .jsonl hoặc SQLite (.db) '
+                        '(mặc định: tarot_cards_content.json cạnh script)')
+    p.add_argument('--out-dir', type=Path, default=script_dir / 'search_index',
+                   help='Thư mục output (mặc định: search_index cạnh script)')
+    p.add_argument('--prefix-length', type=int, default=DEFAULT_PREFIX_LENGTH,
+                   help=f'Số ký tự đầu của term dùng để chia shard (mặc định: {DEFAULT_PREFIX_LENGTH})')
+
+    p = sub.add_parser('query', help='Tìm trong index đã dựng')
+    p.add_argument('query')
+    p.add_argument('--index-dir', type=Path, default=script_dir / 'search_index',
+                   help='Thư mục index (mặc định: search_index cạnh script)')
+    p.add_argument('--limit', type=int, default=10, help='Số kết quả tối đa (mặc định: 10)')
+    p.add_argument('--by-card', action='store_true', help='Mỗi lá bài chỉ lấy block khớp nhất')
+    p.add_argument('--prefix', action='store_true', help='Khớp từ cuối như tiền tố')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.command == 'build':
+        print(f"📖 Đang đọc {args.input}...")
+        postings, cards = build_index(iter_records(args.input))
+        manifest = write_index(postings, cards, args.out_dir, args.prefix_length)
+        sizes = sorted(manifest['shards'].values())
+        print(f"\n📊 {len(cards)} lá bài, {manifest['total_blocks']} block, {len(postings)} term")
+        if sizes:
+            print(f"   🗂️  {len(sizes)} shard, tổng {sum(sizes):,} byte "
+                  f"(trung vị {sizes[len(sizes) // 2]:,}, lớn nhất {sizes[-1]:,})")
+        print(f"\n✨ Hoàn thành! Index đã được lưu vào {args.out_dir}")
+        return
+
+    index = SearchIndex(args.index_dir)
+    hits = index.search(args.query, limit=args.limit, by_card=args.by_card, prefix=args.prefix)
+    if not hits:
+        print(f"🔍 Không tìm thấy \"{args.query}\"")
+        return
+    print(f"🔍 {len(hits)} kết quả (đã tải {index.loaded_bytes:,} byte index):")
+    for hit in hits:
+        url = index.manifest['cards'][str(hit['cardId'])]['url']
+        print(f"   {hit['score']:>8.3f}  card {hit['cardId']:>3} block {hit['block']:>3}  {url}")
+
+
+if __name__ == '__main__':
+    main()
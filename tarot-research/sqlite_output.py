@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Lưu kết quả crawl nội dung lá bài (tarot_cards_content) vào SQLite, với index
+theo cardId, url và loại block, để tra cứu/cập nhật một lá bài mà không phải
+đọc lại cả file JSON. Các record được ghi theo lô trong một transaction khi crawl,
+và có thể xuất ngược lại đúng định dạng tarot_cards_content.json.
+
+Dùng từ dòng lệnh:
+    python sqlite_output.py import tarot_cards_content.json tarot_cards_content.db
+    python sqlite_output.py export tarot_cards_content.db tarot_cards_content.json
+    python sqlite_output.py get tarot_cards_content.db 1
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+from jsonl_output import write_json_array
+
+PathLike = Union[str, Path]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cards (
+    card_id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    status TEXT NOT NULL,
+    total_blocks INTEGER NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_cards_url ON cards (url);
+
+CREATE TABLE IF NOT EXISTS blocks (
+    card_id INTEGER NOT NULL REFERENCES cards (card_id) ON DELETE CASCADE,
+    block_index INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    html TEXT NOT NULL,
+    PRIMARY KEY (card_id, block_index)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_blocks_type ON blocks (type, card_id);
+"""
+
+
+class SqliteStore:
+    """
+    Kho SQLite cho các record {'url', 'status', 'cardId', 'total_blocks', 'blocks', 'error'?}.
+
+    Dùng với `with` (giống JsonlWriter):
+        with SqliteStore(path) as store:
+            store.write(result)
+    """
+
+    def __init__(self, path: PathLike, batch_size: int = 50):
+        """
+        Args:
+            path: Đường dẫn file .db (tạo mới nếu chưa có)
+            batch_size: Số record ghi trong một transaction trước khi commit
+        """
+        self.path = Path(path)
+        self.batch_size = max(1, batch_size)
+        self.count = 0
+        self._uncommitted = 0
+
+        # isolation_level=None: tự quản lý BEGIN/COMMIT cho từng lô
+        self._conn = sqlite3.connect(str(self.path), isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('PRAGMA foreign_keys=ON')
+        self._conn.executescript(SCHEMA)
+
+    def _begin(self) -> None:
+        if not self._conn.in_transaction:
+            self._conn.execute('BEGIN')
+
+    def write(self, record: Dict) -> None:
+        """Thêm hoặc thay thế một lá bài cùng toàn bộ blocks của nó (commit theo lô)."""
+        self._begin()
+        card_id = record['cardId']
+        self._conn.execute('DELETE FROM blocks WHERE card_id = ?', (card_id,))
+        self._conn.execute(
+            'INSERT OR REPLACE INTO cards (card_id, url, status, total_blocks, error) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (card_id, record['url'], record['status'], record['total_blocks'], record.get('error'))
+        )
+        self._conn.executemany(
+            'INSERT INTO blocks (card_id, block_index, type, html) VALUES (?, ?, ?, ?)',
+            [(card_id, block['index'], block['type'], block['html']) for block in record['blocks']]
+        )
+        self.count += 1
+        self._uncommitted += 1
+        if self._uncommitted >= self.batch_size:
+            self.flush()
+
+    def write_many(self, records: Iterable[Dict]) -> int:
+        """Ghi nhiều record (vd. khi import từ file JSON), trả về số record đã ghi."""
+        count = 0
+        for record in records:
+            self.write(record)
+            count += 1
+        self.flush()
+        return count
+
+    def flush(self) -> None:
+        """Commit lô đang ghi dở."""
+        if self._conn.in_transaction:
+            self._conn.execute('COMMIT')
+        self._uncommitted = 0
+
+    def update_block(self, card_id: int, index: int, html: Optional[str] = None,
+                     block_type: Optional[str] = None) -> bool:
+        """
+        Sửa html và/hoặc type của một block mà không ghi lại cả lá bài.
+
+        Returns:
+            True nếu block tồn tại và đã được cập nhật
+        """
+        updates = []
+        params: List[Any] = []
+        if html is not None:
+            updates.append('html = ?')
+            params.append(html)
+        if block_type is not None:
+            updates.append('type = ?')
+            params.append(block_type)
+        if not updates:
+            return False
+        self._begin()
+        cursor = self._conn.execute(
+            f"UPDATE blocks SET {', '.join(updates)} WHERE card_id = ? AND block_index = ?",
+            params + [card_id, index]
+        )
+        self.flush()
+        return cursor.rowcount > 0
+
+    def delete(self, card_id: int) -> bool:
+        """Xóa một lá bài và các block của nó."""
+        self._begin()
+        cursor = self._conn.execute('DELETE FROM cards WHERE card_id = ?', (card_id,))
+        self.flush()
+        return cursor.rowcount > 0
+
+    def _build_record(self, row) -> Dict:
+        card_id, url, status, total_blocks, error = row
+        blocks = [
+            {'index': index, 'type': block_type, 'html': html}
+            for index, block_type, html in self._conn.execute(
+                'SELECT block_index, type, html FROM blocks WHERE card_id = ? ORDER BY block_index',
+                (card_id,)
+            )
+        ]
+        # Cùng thứ tự key với build_content_result/build_content_error
+        record = {
+            'url': url,
+            'status': status,
+            'cardId': card_id,
+            'total_blocks': total_blocks,
+            'blocks': blocks
+        }
+        if error is not None:
+            record['error'] = error
+        return record
+
+    def get(self, card_id: int) -> Optional[Dict]:
+        """Record của một lá bài theo cardId, hoặc None."""
+        row = self._conn.execute(
+            'SELECT card_id, url, status, total_blocks, error FROM cards WHERE card_id = ?',
+            (card_id,)
+        ).fetchone()
+        return self._build_record(row) if row else None
+
+    def get_by_url(self, url: str) -> Optional[Dict]:
+        """Record của lá bài có URL này, hoặc None."""
+        row = self._conn.execute(
+            'SELECT card_id, url, status, total_blocks, error FROM cards WHERE url = ?',
+            (url,)
+        ).fetchone()
+        return self._build_record(row) if row else None
+
+    def blocks_by_type(self, block_type: str) -> Iterator[Dict]:
+        """Các block thuộc một loại (vd. 'h2'), kèm cardId, theo thứ tự lá bài rồi vị trí block."""
+        cursor = self._conn.execute(
+            'SELECT card_id, block_index, html FROM blocks WHERE type = ? '
+            'ORDER BY card_id, block_index',
+            (block_type,)
+        )
+        for card_id, index, html in cursor:
+            yield {'cardId': card_id, 'index': index, 'type': block_type, 'html': html}
+
+    def card_ids(self) -> List[int]:
+        return [row[0] for row in self._conn.execute('SELECT card_id FROM cards ORDER BY card_id')]
+
+    def iter_records(self, order: Optional[Iterable[Any]] = None) -> Iterator[Dict]:
+        """
+        Lần lượt từng record (không giữ cả kho trong bộ nhớ).
+
+        Args:
+            order: Thứ tự cardId mong muốn (vd. thứ tự trong tarot_card.json);
+                   các lá bài không có trong order được xếp sau, theo cardId
+        """
+        ids = self.card_ids()
+        present = set(ids)
+        seen = set()
+        for card_id in list(order or []) + ids:
+            if card_id in present and card_id not in seen:
+                seen.add(card_id)
+                yield self.get(card_id)
+
+    def export_json(self, json_path: PathLike, order: Optional[Iterable[Any]] = None,
+                    on_record: Optional[Callable[[Dict], None]] = None) -> int:
+        """
+        Xuất ra file JSON dạng mảng giống hệt tarot_cards_content.json.
+
+        Returns:
+            Số record đã ghi
+        """
+        self.flush()
+        return write_json_array(json_path, self.iter_records(order), on_record=on_record)
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
+
+    def __enter__(self) -> 'SqliteStore':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def import_json(json_path: PathLike, db_path: PathLike, batch_size: int = 500) -> int:
+    """Nạp file tarot_cards_content.json có sẵn vào SQLite, trả về số lá bài."""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        records = json.load(f)
+    with SqliteStore(db_path, batch_size=batch_size) as store:
+        return store.write_many(records)
+
+
+def parse_args():
+    """Đọc tham số dòng lệnh."""
+    parser = argparse.ArgumentParser(description='Nhập/xuất nội dung lá bài giữa JSON và SQLite')
+    sub = parser.add_subparsers(dest='command')
+    sub.required = True
+
+    p = sub.add_parser('import', help='Nạp file JSON vào SQLite')
+    p.add_argument('json_file', type=Path)
+    p.add_argument('db_file', type=Path)
+
+    p = sub.add_parser('export', help='Xuất SQLite ra file JSON (định dạng tarot_cards_content.json)')
+    p.add_argument('db_file', type=Path)
+    p.add_argument('json_file', type=Path)
+    p.add_argument('--order', type=Path,
+                   help='File tarot_card.json để xuất theo đúng thứ tự lá bài')
+
+    p = sub.add_parser('get', help='In record của một lá bài')
+    p.add_argument('db_file', type=Path)
+    p.add_argument('card_id', type=int)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.command == 'import':
+        count = import_json(args.json_file, args.db_file)
+        print(f"✅ Đã nạp {count} lá bài vào {args.db_file}")
+    elif args.command == 'export':
+        order = None
+        if args.order:
+            with open(args.order, 'r', encoding='utf-8') as f:
+                order = [card['id'] for card in json.load(f)]
+        with SqliteStore(args.db_file) as store:
+            count = store.export_json(args.json_file, order=order)
+        print(f"✅ Đã xuất {count} lá bài ra {args.json_file}")
+    else:
+        with SqliteStore(args.db_file) as store:
+            record = store.get(args.card_id)
+        if record is None:
+            print(f"❌ Không có card ID {args.card_id} trong {args.db_file}")
+            sys.exit(1)
+        print(json.dumps(record, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Điều tốc thích ứng theo từng host cho http_client, thay cho các lệnh time.sleep cố định.
+Tốc độ (request/giây) tăng dần khi server trả lời nhanh và không lỗi, giảm một nửa khi
+gặp 429/5xx và giảm nhẹ khi response chậm (AIMD, giống điều khiển tắc nghẽn của TCP).
+Header Retry-After (số giây hoặc ngày giờ HTTP) chặn mọi request tới host đó cho tới
+hết thời gian server yêu cầu; request lỗi được thử lại sau một khoảng backoff lũy thừa
+có jitter để các worker không cùng gửi lại một lúc.
+
+Dùng:
+    throttle = AdaptiveThrottle(start_rps=2, max_rps=8)
+    http_client.set_throttle(throttle)
+    ...
+    print(throttle.summary())
+"""
+
+import random
+import threading
+import time
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+# Status nên thử lại: timeout phía server, bị giới hạn tốc độ, lỗi tạm thời của server/proxy
+RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+# Status báo server đang quá tải: giảm tốc độ mạnh
+OVERLOAD_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 60.0
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Số giây cần chờ theo header Retry-After ("120" hoặc "Wed, 21 Oct 2015 07:28:00 GMT"),
+    None nếu không có hoặc không đọc được.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if when is None:
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    current = now if now is not None else time.time()
+    return max(0.0, when.timestamp() - current)
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None,
+                  base: float = DEFAULT_BASE_DELAY, cap: float = DEFAULT_MAX_DELAY) -> float:
+    """
+    Thời gian chờ trước lần thử lại thứ attempt (tính từ 0): "full jitter",
+    ngẫu nhiên trong [0, min(cap, base * 2^attempt)], và không ít hơn Retry-After.
+    """
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+class _HostState:
+    __slots__ = ('rate', 'next_slot', 'blocked_until')
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.next_slot = 0.0
+        self.blocked_until = 0.0
+
+
+class AdaptiveThrottle:
+    """
+    Giới hạn tốc độ theo host, tự điều chỉnh theo response. An toàn khi gọi từ nhiều thread
+    (acquire chờ ngay trên thread gửi request).
+
+    Args:
+        start_rps: Tốc độ ban đầu cho mỗi host
+        min_rps: Tốc độ thấp nhất khi bị giảm liên tục
+        max_rps: Tốc độ cao nhất khi tăng dần
+        increase: Số request/giây cộng thêm sau mỗi response nhanh và thành công
+        decrease: Hệ số nhân khi gặp 429/5xx hoặc lỗi kết nối
+        slow_after: Response lâu hơn số giây này bị coi là chậm (hệ số nhân slow_decrease)
+        slow_decrease: Hệ số nhân khi response chậm
+        base_delay, max_delay: Tham số backoff giữa các lần thử lại (xem backoff_delay)
+    """
+
+    def __init__(self, start_rps: float = 2.0, min_rps: float = 0.25, max_rps: float = 8.0,
+                 increase: float = 0.25, decrease: float = 0.5,
+                 slow_after: float = 2.0, slow_decrease: float = 0.8,
+                 base_delay: float = DEFAULT_BASE_DELAY, max_delay: float = DEFAULT_MAX_DELAY):
+        self.min_rps = min_rps
+        self.max_rps = max(max_rps, min_rps)
+        self.start_rps = min(max(start_rps, self.min_rps), self.max_rps)
+        self.increase = increase
+        self.decrease = decrease
+        self.slow_after = slow_after
+        self.slow_decrease = slow_decrease
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stats = {'requests': 0, 'retries': 0, 'throttled': 0, 'slow': 0, 'errors': 0,
+                      'wait_seconds': 0.0}
+        self._hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, url: str) -> _HostState:
+        host = urlsplit(url).netloc
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self.start_rps)
+        return state
+
+    def acquire(self, url: str) -> None:
+        """Chờ tới lượt gửi request tới host của url (theo tốc độ hiện tại và Retry-After)."""
+        with self._lock:
+            state = self._state(url)
+            now = time.monotonic()
+            slot = max(now, state.next_slot, state.blocked_until)
+            state.next_slot = slot + 1.0 / state.rate
+            self.stats['requests'] += 1
+            self.stats['wait_seconds'] += slot - now
+        if slot > now:
+            time.sleep(slot - now)
+
+    def on_response(self, url: str, status: int, elapsed: float,
+                    retry_after: Optional[float] = None) -> None:
+        """Cập nhật tốc độ của host theo status code và thời gian chờ response (giây)."""
+        with self._lock:
+            state = self._state(url)
+            if status in OVERLOAD_STATUSES:
+                self.stats['throttled'] += 1
+                state.rate = max(self.min_rps, state.rate * self.decrease)
+            elif elapsed >= self.slow_after:
+                self.stats['slow'] += 1
+                state.rate = max(self.min_rps, state.rate * self.slow_decrease)
+            elif status < 400:
+                state.rate = min(self.max_rps, state.rate + self.increase)
+            if retry_after:
+                # Mọi worker cùng dừng gửi tới host này cho tới khi hết Retry-After
+                state.blocked_until = max(state.blocked_until, time.monotonic() + retry_after)
+
+    def on_error(self, url: str) -> None:
+        """Lỗi kết nối/timeout: giảm tốc độ như khi server quá tải."""
+        with self._lock:
+            state = self._state(url)
+            self.stats['errors'] += 1
+            state.rate = max(self.min_rps, state.rate * self.decrease)
+
+    def retry_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Thời gian chờ trước lần thử lại thứ attempt, đồng thời đếm số lần thử lại."""
+        delay = backoff_delay(attempt, retry_after, self.base_delay, self.max_delay)
+        with self._lock:
+            self.stats['retries'] += 1
+            self.stats['wait_seconds'] += delay
+        return delay
+
+    def rates(self) -> Dict[str, float]:
+        """Tốc độ hiện tại (request/giây) của từng host."""
+        with self._lock:
+            return {host: state.rate for host, state in self._hosts.items()}
+
+    def summary(self) -> str:
+        """Chuỗi thống kê ngắn để in cuối lượt crawl."""
+        rates = ', '.join(f"{host} {rate:.2f}/s" for host, rate in sorted(self.rates().items()))
+        return (f"{self.stats['requests']} request, {self.stats['retries']} lần thử lại, "
+                f"{self.stats['throttled']} lần bị giới hạn (429/5xx), {self.stats['slow']} response chậm, "
+                f"{self.stats['errors']} lỗi kết nối, chờ tổng {self.stats['wait_seconds']:.1f}s"
+                + (f"; tốc độ cuối: {rates}" if rates else ''))